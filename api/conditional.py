@@ -0,0 +1,87 @@
+"""
+Conditional GET support.
+Responses carry a strong ETag derived from the request's normalized parameters and the
+version of the data behind it, plus Last-Modified. Handlers compute both from cheap
+metadata and answer If-None-Match / If-Modified-Since with 304 before building a body.
+"""
+import hashlib
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from fastapi import Request, Response
+
+class DataVersions:
+    """
+    Per-symbol data versions behind the ETags. They mirror shared state rather than count
+    locally, so every API process (and the same process after a restart) tags the same data
+    alike: with the database backend, the data_versions table that every write of bars or
+    indicator values bumps (see database.db.announce_write). Symbols without a row are at
+    version 0; without a database only the passing of session minutes (data_as_of) changes
+    the data, and every symbol stays there.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, Tuple[int, datetime]] = {}
+        self.started = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def update(self, versions: Dict[str, Tuple[int, datetime]]):
+        """Take over (version, time of the last bump) per symbol as read from the shared state."""
+        with self._lock:
+            for symbol, (version, bumped) in versions.items():
+                # A reload racing a notification must not move a symbol back
+                if version >= self._versions.get(symbol, (0, _EPOCH))[0]:
+                    self._versions[symbol] = (version, _as_utc(bumped))
+
+    def get(self, symbol: str) -> Tuple[int, datetime]:
+        """(version, time of the last bump); (0, epoch) if nothing was written for the symbol."""
+        with self._lock:
+            return self._versions.get(symbol, (0, _EPOCH))
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def make_etag(*parts) -> str:
+    return '"' + hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:32] + '"'
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive bar timestamps are UTC; HTTP dates have one-second resolution
+    value = value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+    return value.replace(microsecond=0)
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+def validator_headers(etag: str, last_modified: datetime) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(_as_utc(last_modified), usegmt=True),
+        "Cache-Control": "no-cache" # always revalidate, but reuse the body on 304
+    }
+
+def not_modified(request: Request, etag: str, last_modified: datetime) -> Optional[Response]:
+    """A 304 response if the client's validators still match, otherwise None."""
+    headers = validator_headers(etag, last_modified)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return None
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        if since.tzinfo is not None and _as_utc(last_modified) <= since:
+            return Response(status_code=304, headers=headers)
+    return None
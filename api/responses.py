@@ -0,0 +1,130 @@
+"""
+Response encoding for the REST API: a JSON response class backed by the fast encoder,
+and per-route opt-in compression (brotli when available, else gzip) above a size threshold.
+"""
+import zlib
+from typing import Callable, Optional
+from fastapi.responses import JSONResponse
+from data_ingestion.serialization import dumps
+
+try:
+    import brotli
+except ImportError: # optional dependency
+    brotli = None
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with data_ingestion.serialization (orjson when installed)."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def compress(min_size: int = 1024) -> Callable:
+    """
+    Route decorator (applied below @app.get) opting the route into response compression
+    for bodies of at least `min_size` bytes; streaming bodies are always compressed.
+    """
+    def mark(endpoint):
+        endpoint.compress_min_size = min_size
+        return endpoint
+    return mark
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._impl = brotli.Compressor(quality=4)
+            self._chunk, self._finish = self._impl.process, self._impl.finish
+        else:
+            self._impl = zlib.compressobj(6, zlib.DEFLATED, 31) # 31: gzip container
+            self._chunk, self._finish = self._impl.compress, self._impl.flush
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._chunk(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses of routes marked with @compress(). The route is
+    known once routing has put its endpoint into the scope, i.e. by the time the
+    response starts, so unmarked routes pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        encoding = _choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                start_message = message # held back until the first body chunk decides
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                min_size = getattr(scope.get("endpoint"), "compress_min_size", None)
+                response_headers = start_message.get("headers", [])
+                already_encoded = any(k.lower() == b"content-encoding" for k, _ in response_headers)
+                if (min_size is None or already_encoded or start_message["status"] in (204, 304)
+                        or (not more_body and len(body) < min_size)):
+                    await send(start_message)
+                else:
+                    compressor = _Compressor(encoding)
+                    new_headers = [(b"content-encoding", encoding.encode()), (b"vary", b"Accept-Encoding")]
+                    if not more_body:
+                        # Whole body at once: compress it now so Content-Length stays exact
+                        body = compressor.chunk(body) + compressor.finish()
+                        new_headers.append((b"content-length", str(len(body)).encode()))
+                    start_message["headers"] = [
+                        # A strong ETag names the identity bytes; the encoded body gets the weak form
+                        (k, b"W/" + v if k.lower() == b"etag" and not v.startswith(b"W/") else v)
+                        for k, v in response_headers if k.lower() != b"content-length"
+                    ] + new_headers
+                    await send(start_message)
+                    if not more_body:
+                        await send({"type": "http.response.body", "body": body, "more_body": False})
+                        return
+                start_message = None
+
+            if compressor is None:
+                await send(message)
+                return
+            data = compressor.chunk(body)
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
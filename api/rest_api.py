@@ -2,36 +2,150 @@
 REST API for stock data and indicators.
 Uses FastAPI and the indicators module.
 """
-from fastapi import FastAPI, HTTPException, Query
-from typing import List, Optional, Dict
-from datetime import datetime, timedelta
-import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Dict, Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import asynccontextmanager
+from itertools import islice
+import os
+import threading
+import time
+import numpy as np
 from data_ingestion.mock_provider import get_provider
-from data_ingestion.models import StockDayData
+from data_ingestion.models import StockDayData, OHLCVBar
+from data_ingestion.history import get_history_source
+from data_ingestion.tick_cache import BarIngester, get_tick_cache
 from indicators.calculator import (
     calculate_sma, calculate_ema, calculate_rsi, 
     calculate_macd, calculate_bollinger_bands, calculate_all_indicators
 )
+from indicators.scanner import SignalScanner
+from api.singleflight import SingleFlight
+from api.conditional import DataVersions, make_etag, not_modified, validator_headers
+from api.responses import CompressionMiddleware, FastJSONResponse, compress
+from data_ingestion.serialization import dumps, format_timestamps, points
+from telemetry.metrics import CONTENT_TYPE, REGISTRY, Counter, Histogram, MetricsMiddleware
+from telemetry.startup import Startup, ensure_loaded, lazy_import
 
-app = FastAPI(title="Stock App API", version="0.2.0")
+# pandas is only needed once a request builds a DataFrame (indicators, signals)
+pd = lazy_import("pandas")
+
+startup = Startup("stock_api")
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm up in the background: /health answers right away, /ready once this is done
+    startup.start_warm_up(_warm_up_steps())
+    if FOLLOW_BAR_INSERTS:
+        threading.Thread(target=_follow_bar_inserts, daemon=True, name="bar-notifications").start()
+    yield
+
+app = FastAPI(title="Stock App API", version="0.2.0", default_response_class=FastJSONResponse, lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware, prefix="stock_api") # outermost: latency includes compression
 
 # Mock Data Provider instance
 provider = get_provider()
 
+# Concurrent identical indicator/signal requests (e.g. every dashboard right after a bar
+# close) share one in-flight computation
+coalescer = SingleFlight(timeout=float(os.getenv("API_COALESCE_TIMEOUT", "10")))
+
+# Per-symbol data versions for ETags; with the database backend they are read from its
+# data_versions table whenever new bars or materialized indicator values of a symbol are
+# announced (BARS_CHANNEL / INDICATORS_CHANNEL)
+data_versions = DataVersions()
+
+FOLLOW_BAR_INSERTS = os.getenv("HISTORY_BACKEND", "mock").lower() == "db"
+
+def _follow_bar_inserts():
+    # psycopg2 is only needed for this backend
+    from database.db import BARS_CHANNEL, INDICATORS_CHANNEL, get_data_versions, listen_symbols
+    while True:
+        try:
+            # (Re)load every version once listening, as writes while no one listened were not announced
+            listen_symbols([BARS_CHANNEL, INDICATORS_CHANNEL],
+                           lambda symbols: data_versions.update(get_data_versions(sorted(symbols))),
+                           on_listen=lambda: data_versions.update(get_data_versions()))
+        except Exception as e:
+            print(f"Listening for new bars failed: {e!r}")
+        time.sleep(5)
+
+indicator_seconds = Histogram("stock_api_indicator_compute_seconds", "Indicator computation time", ("indicator",))
+coalesced_requests = Counter("stock_api_coalesced_requests", "Indicator/signal requests by coalescing outcome", ("outcome",))
+coalesced_requests.labels("executed").set_function(lambda: coalescer.executed)
+coalesced_requests.labels("shared").set_function(lambda: coalescer.shared)
+
+def _daily_frame(symbol: str, days: int) -> "pd.DataFrame":
+    """The latest `days` daily bars of the history source as a DataFrame with a 'date' column."""
+    source = get_history_source()
+    end = datetime.now()
+    chunks = list(source.iter_chunks(symbol, "1d", source.default_start("1d", end, days), end))
+    if not chunks:
+        return pd.DataFrame(columns=['date', 'open', 'high', 'low', 'close', 'volume'])
+    columns = {name: np.concatenate([c[name] for c in chunks])[-days:] for name in chunks[0]}
+    df = pd.DataFrame({name: columns[name] for name in ('open', 'high', 'low', 'close', 'volume')})
+    df.insert(0, 'date', pd.to_datetime(columns['timestamp']).to_pydatetime())
+    return df
+
+def _daily_validators(symbol: str, *parts):
+    """ETag and Last-Modified of a response computed from the symbol's recent daily bars."""
+    version, bumped = data_versions.get(symbol)
+    now = datetime.now()
+    as_of = get_history_source().data_as_of(symbol, "1d", now, now)
+    return make_etag(*parts, symbol, version, as_of.isoformat()), max(as_of.replace(tzinfo=timezone.utc), bumped)
+
+TRACKED_SYMBOLS = ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NVDA", "META"]
+
+# Keeps the tracked symbols' one-minute bars since the start of the day in this process's tick
+# cache, so their recent history is served from memory; started (after a backfill) by the warm-up
+bar_ingester = BarIngester(get_tick_cache(), get_history_source().base, TRACKED_SYMBOLS,
+                           poll_seconds=float(os.getenv("BAR_INGEST_SECONDS", "5")))
+
+# Incremental SMA(10)/SMA(50)/RSI(14) state for the whole tracked universe, warmed up
+# from history on first use and advanced by POST /signals/bars on every bar close.
+_scanner: Optional[SignalScanner] = None
+_scanner_lock = threading.Lock()
+
+def get_scanner() -> SignalScanner:
+    global _scanner
+    with _scanner_lock:
+        if _scanner is None:
+            scanner = SignalScanner(TRACKED_SYMBOLS, fast=10, slow=50, rsi_window=14)
+            histories = [_daily_frame(symbol, 100) for symbol in TRACKED_SYMBOLS]
+            length = min(len(df) for df in histories)
+            closes = np.array([df['close'].to_numpy()[-length:] for df in histories])
+            scanner.seed(closes, [d.isoformat() for d in histories[0]['date'].iloc[-length:]])
+            _scanner = scanner
+        return _scanner
+
 @app.get("/")
 def root():
     return {"message": "Stock App API", "version": "0.2.0"}
 
 @app.get("/stocks/symbols")
-def get_symbols():
+def get_symbols(request: Request, response: Response):
     """List available stock symbols."""
+    etag = make_etag("symbols", TRACKED_SYMBOLS)
+    cached = not_modified(request, etag, data_versions.started)
+    if cached is not None:
+        return cached
+    response.headers.update(validator_headers(etag, data_versions.started))
     return {
-        "symbols": ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "NVDA", "META"]
+        "symbols": TRACKED_SYMBOLS
     }
 
 @app.get("/stocks/{symbol}/profile")
-def get_stock_profile(symbol: str):
+def get_stock_profile(symbol: str, request: Request, response: Response):
     """Get stock profile/details."""
+    # Profiles are static for the lifetime of the process
+    etag = make_etag("profile", symbol, app.version)
+    cached = not_modified(request, etag, data_versions.started)
+    if cached is not None:
+        return cached
+    response.headers.update(validator_headers(etag, data_versions.started))
     profiles = {
         "AAPL": {"name": "Apple Inc.", "sector": "Technology", "industry": "Consumer Electronics"},
         "GOOGL": {"name": "Alphabet Inc.", "sector": "Technology", "industry": "Internet Services"},
@@ -43,27 +157,109 @@ def get_stock_profile(symbol: str):
     }
     return profiles.get(symbol, {"symbol": symbol, "name": f"{symbol} Corp.", "sector": "Unknown"})
 
+def _parse_time(value: Optional[str], name: str, end_of_day: bool = False) -> Optional[datetime]:
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if end_of_day and len(value) == 10:
+        # A bare date as the upper bound includes that whole day
+        parsed += timedelta(days=1, microseconds=-1)
+    return parsed
+
+def _ndjson_bars(bars: Iterable[OHLCVBar]) -> Iterator[bytes]:
+    # Lines are flushed in batches so large ranges stream without building the response
+    lines = []
+    for bar in bars:
+        lines.append(dumps(bar.to_dict()))
+        if len(lines) == 1000:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
 @app.get("/stocks/{symbol}/history")
+@compress()
 def get_history(
     symbol: str,
+    request: Request,
+    response: Response,
     interval: str = Query("1d", regex="^(1m|5m|15m|1h|1d)$"),
     from_date: Optional[str] = None,
     to_date: Optional[str] = None,
-    limit: int = Query(100, le=1000)
+    limit: Optional[int] = Query(None, ge=1, description="Bars per page (max 1000); unbounded for ndjson"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    format: str = Query("json", regex="^(json|ndjson)$")
 ):
-    """Fetch historical OHLCV data."""
-    days = min(limit, 365)
-    data = provider.get_historical_data(symbol, days=days)
-    
+    """
+    Fetch historical OHLCV data resampled to `interval` over [from_date, to_date].
+    Pages are keyset-paginated: pass the returned next_cursor to get the bars after it.
+    Without from_date the range covers the latest `limit` bars up to to_date (default now).
+    format=ndjson streams one bar per line for the whole range (or `limit` bars); to resume
+    an interrupted stream, pass the last received timestamp as cursor.
+    """
+    source = get_history_source()
+    end = _parse_time(to_date, "to_date", end_of_day=True) or datetime.now()
+    after = _parse_time(cursor, "cursor")
+    if format == "json":
+        if limit is not None and limit > 1000:
+            raise HTTPException(status_code=400, detail="limit must be at most 1000 for json pages")
+        page_size = limit or 100
+    else:
+        page_size = limit
+    start = _parse_time(from_date, "from_date") or source.default_start(interval, end, page_size or 100)
+    if start > end:
+        raise HTTPException(status_code=400, detail="from_date must not be after to_date")
+
+    # The range's content only changes as session minutes pass in it or the symbol's version is bumped
+    version, bumped = data_versions.get(symbol)
+    as_of = source.data_as_of(symbol, interval, start, end)
+    etag = make_etag("history", symbol, interval, start.isoformat(), to_date, cursor, page_size, format,
+                     version, as_of.isoformat())
+    last_modified = max(as_of.replace(tzinfo=timezone.utc), bumped)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+
+    bars = source.iter_bars(symbol, interval, start, end, after=after)
+    if format == "ndjson":
+        if page_size is not None:
+            bars = islice(bars, page_size)
+        return StreamingResponse(_ndjson_bars(bars), media_type="application/x-ndjson",
+                                 headers=validator_headers(etag, last_modified))
+    response.headers.update(validator_headers(etag, last_modified))
+
+    data = [bar.to_dict() for bar in islice(bars, page_size + 1)]
+    next_cursor = None
+    if len(data) > page_size:
+        data = data[:page_size]
+        next_cursor = data[-1]["timestamp"]
     return {
         "symbol": symbol,
         "interval": interval,
-        "data": [d.to_dict() for d in data]
+        "from": start.isoformat(),
+        "to": end.isoformat() if to_date else None, # open-ended ranges follow new bars
+        "data": data,
+        "next_cursor": next_cursor
     }
 
+def _coalesced(key: tuple, fn):
+    """Run fn once for all concurrent identical requests; waiters time out with 504."""
+    try:
+        return coalescer.do(key, fn)
+    except FutureTimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out waiting for an identical in-flight request")
+
 @app.get("/stocks/{symbol}/indicators")
+@compress()
 def get_indicators(
     symbol: str,
+    request: Request,
+    response: Response,
     indicators: str = Query("sma", description="Comma-separated: sma,rsi,macd,ema,bb"),
     window: int = Query(20, description="Window size for SMA/EMA/RSI")
 ):
@@ -71,96 +267,140 @@ def get_indicators(
     Fetch technical indicator data.
     Examples: /stocks/AAPL/indicators?indicators=sma,rsi,macd
     """
+    # Identical requests (same symbol, indicator set and window, in any order) share one computation
+    indicators_list = tuple(sorted({i.strip().lower() for i in indicators.split(',') if i.strip()}))
+    etag, last_modified = _daily_validators(symbol, "indicators", indicators_list, window)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+    response.headers.update(validator_headers(etag, last_modified))
+    return _coalesced(("indicators", etag), lambda: _compute_indicators(symbol, indicators_list, window))
+
+# Daily bars an /indicators response covers, and the bars before them that only warm up the
+# computed series, so they have values from the first bar on and EMA-based ones have converged
+# to the full-history values the materializer stores
+INDICATOR_BARS = 200
+INDICATOR_WARMUP_BARS = 100
+
+def _series_points(timestamps: List[str], series: "pd.Series", first: int, decimals: int) -> List[Dict]:
+    # Every value keeps its own bar's timestamp (series share the frame's RangeIndex);
+    # bars before `first` are warm-up
+    values = series.iloc[first:].dropna()
+    return points([timestamps[i] for i in values.index], values.to_numpy(), decimals)
+
+# With the database backend, series kept current by database.materializer are read back
+# with one range query (see database.indicator_store) instead of being recomputed on every request
+MATERIALIZED_INDICATORS = os.getenv("HISTORY_BACKEND", "mock").lower() == "db"
+
+def _materialized_names(indicators_list: tuple, window: int) -> Dict[str, Dict[str, str]]:
+    """Indicator -> {response part: series name}; single-series indicators use the part ''."""
+    names = {
+        'sma': {'': f"sma_{window}"},
+        'ema': {'': f"ema_{window}"},
+        'rsi': {'': "rsi_14"},
+        'macd': {part: f"macd_{part}" for part in ("line", "signal", "histogram")},
+        'bb': {"middle": f"sma_{window}", "upper": f"bb_upper_{window}", "lower": f"bb_lower_{window}"}
+    }
+    return {i: names[i] for i in indicators_list if i in names}
+
+def _read_materialized(symbol: str, indicators_list: tuple, window: int) -> Optional[Dict]:
+    """The response from the indicator store, or None if this set is not materialized (yet)."""
+    from database.materializer import INTERVAL, WINDOWS
+    from database.indicator_store import get_indicator_store
+    if INTERVAL != "1d" or window not in WINDOWS:
+        return None
+    wanted = _materialized_names(indicators_list, window)
+    end = datetime.now()
+    start = get_history_source().default_start("1d", end, INDICATOR_BARS)
+    with indicator_seconds.labels('materialized').time():
+        series = get_indicator_store().read(symbol, sorted({n for parts in wanted.values() for n in parts.values()}),
+                                 start, end)
+    if not any(len(times) for times, _ in series.values()):
+        return None
+    decimals = {'macd': 4}
+    result = {"symbol": symbol}
+    for indicator, parts in wanted.items():
+        key = 'bollinger_bands' if indicator == 'bb' else indicator
+        rendered = {
+            part: points(format_timestamps(series[name][0]), series[name][1], decimals.get(indicator, 2))
+            for part, name in parts.items()
+        }
+        result[key] = rendered[''] if '' in rendered else rendered
+    return result
+
+def _compute_indicators(symbol: str, indicators_list: tuple, window: int) -> Dict:
+    if MATERIALIZED_INDICATORS:
+        result = _read_materialized(symbol, indicators_list, window)
+        if result is not None:
+            return result
+
     # Get price history as DataFrame
-    history = provider.get_historical_data(symbol, days=200)
-    df = pd.DataFrame([{
-        'date': d.date,
-        'open': d.open,
-        'high': d.high,
-        'low': d.low,
-        'close': d.close,
-        'volume': d.volume
-    } for d in history])
+    df = _daily_frame(symbol, INDICATOR_BARS + max(window, INDICATOR_WARMUP_BARS))
     
     if df.empty:
         return {"error": "No data available"}
     
     result = {"symbol": symbol}
-    indicators_list = [i.strip().lower() for i in indicators.split(',')]
     
     close = df['close']
+    timestamps = format_timestamps(df['date'])
+    first = max(len(df) - INDICATOR_BARS, 0)
     
     if 'sma' in indicators_list:
-        sma = calculate_sma(close, window)
-        result['sma'] = [
-            {"timestamp": str(df['date'].iloc[i]), "value": round(v, 2)}
-            for i, v in enumerate(sma.dropna()) if i >= window-1
-        ]
+        with indicator_seconds.labels('sma').time():
+            sma = calculate_sma(close, window)
+            result['sma'] = _series_points(timestamps, sma, first, 2)
     
     if 'ema' in indicators_list:
-        ema = calculate_ema(close, window)
-        result['ema'] = [
-            {"timestamp": str(df['date'].iloc[i]), "value": round(v, 2)}
-            for i, v in enumerate(ema.dropna()) if i >= window-1
-        ]
+        with indicator_seconds.labels('ema').time():
+            ema = calculate_ema(close, window)
+            result['ema'] = _series_points(timestamps, ema, first, 2)
     
     if 'rsi' in indicators_list:
-        rsi_window = 14
-        rsi = calculate_rsi(close, rsi_window)
-        result['rsi'] = [
-            {"timestamp": str(df['date'].iloc[i]), "value": round(v, 2)}
-            for i, v in enumerate(rsi.dropna()) if i >= rsi_window + window - 2
-        ]
+        with indicator_seconds.labels('rsi').time():
+            rsi = calculate_rsi(close, 14)
+            result['rsi'] = _series_points(timestamps, rsi, first, 2)
     
     if 'macd' in indicators_list:
-        macd_line, signal_line, histogram = calculate_macd(close)
-        result['macd'] = {
-            "line": [
-                {"timestamp": str(df['date'].iloc[i]), "value": round(v, 4)}
-                for i, v in enumerate(macd_line.dropna()) if i >= 26
-            ],
-            "signal": [
-                {"timestamp": str(df['date'].iloc[i]), "value": round(v, 4)}
-                for i, v in enumerate(signal_line.dropna()) if i >= 26
-            ],
-            "histogram": [
-                {"timestamp": str(df['date'].iloc[i]), "value": round(v, 4)}
-                for i, v in enumerate(histogram.dropna()) if i >= 26
-            ]
-        }
+        with indicator_seconds.labels('macd').time():
+            macd_line, signal_line, histogram = calculate_macd(close)
+            result['macd'] = {
+                "line": _series_points(timestamps, macd_line, first, 4),
+                "signal": _series_points(timestamps, signal_line, first, 4),
+                "histogram": _series_points(timestamps, histogram, first, 4)
+            }
     
     if 'bb' in indicators_list:
-        sma_bb, upper, lower = calculate_bollinger_bands(close, window)
-        result['bollinger_bands'] = {
-            "middle": [
-                {"timestamp": str(df['date'].iloc[i]), "value": round(v, 2)}
-                for i, v in enumerate(sma_bb.dropna()) if i >= window-1
-            ],
-            "upper": [
-                {"timestamp": str(df['date'].iloc[i]), "value": round(v, 2)}
-                for i, v in enumerate(upper.dropna()) if i >= window-1
-            ],
-            "lower": [
-                {"timestamp": str(df['date'].iloc[i]), "value": round(v, 2)}
-                for i, v in enumerate(lower.dropna()) if i >= window-1
-            ]
-        }
+        with indicator_seconds.labels('bb').time():
+            sma_bb, upper, lower = calculate_bollinger_bands(close, window)
+            result['bollinger_bands'] = {
+                "middle": _series_points(timestamps, sma_bb, first, 2),
+                "upper": _series_points(timestamps, upper, first, 2),
+                "lower": _series_points(timestamps, lower, first, 2)
+            }
     
     return result
 
 @app.get("/stocks/{symbol}/signals")
 def get_signals(
     symbol: str,
+    request: Request,
+    response: Response,
     strategy: str = Query("default", description="Strategy name")
 ):
     """
     Generate trading signals based on indicators.
     Simple example: SMA crossover, RSI overbought/oversold.
     """
-    history = provider.get_historical_data(symbol, days=100)
-    df = pd.DataFrame([{
-        'date': d.date, 'close': d.close
-    } for d in history])
+    etag, last_modified = _daily_validators(symbol, "signals", strategy)
+    cached = not_modified(request, etag, last_modified)
+    if cached is not None:
+        return cached
+    response.headers.update(validator_headers(etag, last_modified))
+    return _coalesced(("signals", etag), lambda: _compute_signals(symbol))
+
+def _compute_signals(symbol: str) -> Dict:
+    df = _daily_frame(symbol, 100)
     
     close = df['close']
     
@@ -200,10 +440,87 @@ def get_signals(
         }
     }
 
+@app.get("/signals/scan")
+@compress()
+def scan_signals(
+    signal_type: Optional[str] = Query(None, regex="^(bullish|bearish)$"),
+    indicators: str = Query("sma_crossover,rsi", description="Comma-separated: sma_crossover,rsi"),
+    events_only: bool = Query(False, description="Only crossovers that happened within `lookback` bars"),
+    lookback: int = Query(1, ge=1),
+    min_strength: float = Query(0.0, ge=0),
+    symbols: Optional[str] = Query(None, description="Comma-separated subset of the universe"),
+    limit: int = Query(50, ge=1, le=5000)
+):
+    """
+    Scan every tracked symbol for SMA crossover / RSI signals.
+    Crossover events rank first, then signals by strength (SMA spread in %, RSI distance past its threshold).
+    Example: /signals/scan?signal_type=bullish&events_only=true
+    """
+    scanner = get_scanner()
+    with _scanner_lock:
+        results = scanner.scan(
+            signal_type=signal_type,
+            indicators=[i.strip().lower() for i in indicators.split(',') if i.strip()],
+            events_only=events_only,
+            lookback=lookback,
+            min_strength=min_strength,
+            symbols=[s.strip().upper() for s in symbols.split(',')] if symbols else None,
+            limit=limit
+        )
+        bar_time = scanner.last_timestamp
+    return {"timestamp": bar_time, "count": len(results), "signals": results}
+
+@app.post("/signals/bars")
+def push_bar_closes(bar: Dict):
+    """
+    Advance the scanner by one bar close for the universe.
+    Expects {"timestamp": "...", "closes": {"AAPL": 171.2, ...}}; symbols without a close carry their last one.
+    Symbols outside the tracked universe are not applied and are listed under "ignored".
+    """
+    closes = bar.get("closes")
+    if not isinstance(closes, dict):
+        raise HTTPException(status_code=400, detail="'closes' must map symbols to prices")
+    invalid = sorted(str(symbol) for symbol, close in closes.items()
+                     if isinstance(close, bool) or not isinstance(close, (int, float)) or not np.isfinite(close))
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Closes must be finite numbers: {', '.join(invalid)}")
+    scanner = get_scanner()
+    applied = {symbol: close for symbol, close in closes.items() if symbol in scanner.index}
+    with _scanner_lock:
+        try:
+            events = scanner.update_from_dict(applied, bar.get("timestamp"))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return {"events": events, "ignored": sorted(set(closes) - set(applied))}
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics of this process."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "version": "0.2.0"}
 
+@app.get("/ready")
+def readiness_check():
+    """503 until warm-up has finished; the body is the startup profile either way."""
+    return FastJSONResponse(startup.report(), status_code=200 if startup.ready else 503)
+
+def _warm_up_steps():
+    # What the first requests after a scale-out would otherwise pay for
+    return [
+        ("modules", lambda: ensure_loaded(pd)),
+        ("tick_cache", lambda: bar_ingester.start()),
+        ("history", lambda: [_daily_frame(symbol, INDICATOR_BARS + INDICATOR_WARMUP_BARS) for symbol in TRACKED_SYMBOLS]),
+        ("scanner", get_scanner),
+        # First calls of the rolling/ewm paths import and set up more of pandas
+        ("indicators", lambda: dumps(_compute_indicators(TRACKED_SYMBOLS[0], ("bb", "ema", "macd", "rsi", "sma"), 20))),
+        ("signals", lambda: dumps(_compute_signals(TRACKED_SYMBOLS[0])))
+    ]
+
+startup.mark_imported()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,54 @@
+"""
+Request coalescing.
+Concurrent calls for the same key share one in-flight computation: the first caller
+runs it and every caller that arrives before it finishes waits on the same future.
+Nothing is cached; once the computation completes the next call runs it again.
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class SingleFlight:
+    """Thread-safe single-flight group for the sync (threadpool) request handlers."""
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.executed = 0 # computations actually run
+        self.shared = 0 # calls served by another caller's computation
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Return fn()'s result, running fn at most once for all concurrent callers of `key`.
+        An exception raised by fn is re-raised in every waiting caller. Waiters give up
+        with concurrent.futures.TimeoutError after `timeout` seconds; the computation
+        itself keeps running for its own caller.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,67 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks [--scale small|medium|large] [-k FILTER] [--output FILE]
+                         [--compare BASELINE.json] [--threshold 0.10]
+
+Results are written as JSON (by default to benchmarks/results/<commit>-<scale>.json).
+With --compare, cases whose median got slower than the baseline by more than the
+threshold are listed and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from benchmarks.harness import CASES, SCALES, compare, environment, format_seconds, result_key, run_case
+import benchmarks.cases # registers the cases
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the benchmark suite.")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("-k", "--filter", default="", help="only cases whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per repeat")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>-<scale>.json)")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed median slowdown (0.10 = 10%%)")
+    args = parser.parse_args(argv)
+
+    env = environment()
+    results = []
+    for bench in CASES:
+        if args.filter not in bench.name:
+            continue
+        for param in bench.params_for(args.scale):
+            result = run_case(bench, param, args.repeats, args.min_time)
+            results.append(result)
+            print(f"{result_key(result):60s} median {format_seconds(result['median']):>12s}"
+                  f"  min {format_seconds(result['min']):>12s}  ({result['loops']} loops)", flush=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{env['commit'] or 'unknown'}-{args.scale}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "environment": env,
+            "scale": args.scale,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "results": results
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline["results"], args.threshold)
+    print(f"\nCompared with {baseline['environment'].get('commit')} ({len(rows)} common cases):")
+    for row in rows:
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(f"{row['case']:60s} {format_seconds(row['baseline']):>12s} -> "
+              f"{format_seconds(row['current']):>12s}  x{row['ratio']:.2f}{flag}")
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Benchmark cases. Every dataset is generated from a fixed seed so runs on different commits
+time exactly the same work.
+"""
+import asyncio
+import os
+import random
+import sys
+import numpy as np
+import pandas as pd
+from indicators.calculator import (
+    calculate_sma, calculate_ema, calculate_rsi,
+    calculate_macd, calculate_bollinger_bands,
+    calculate_stochastic, calculate_atr, calculate_vwap
+)
+from indicators.streaming import StreamingStochastic
+from data_ingestion.data_generator import DataGenerator
+from benchmarks.harness import case
+
+# paper-trading is a flat directory of modules; appended (not prepended) so its api.py
+# cannot shadow the api package
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "paper-trading"))
+from orders import OrderType, OrderSide
+from portfolio import PortfolioManager
+from execution import ExecutionEngine
+from pnl import PnLCalculator
+
+SEED = 20240101
+
+def price_series(length: int, seed: int = SEED) -> pd.Series:
+    """Geometric random walk starting at 100."""
+    rng = np.random.default_rng(seed)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, length))))
+
+SERIES_LENGTHS = dict(small=[1_000], medium=[1_000, 100_000], large=[1_000, 100_000, 1_000_000])
+
+@case("calculate_sma", "length", **SERIES_LENGTHS)
+def bench_sma(length):
+    prices = price_series(length)
+    yield lambda: calculate_sma(prices, 20)
+
+@case("calculate_ema", "length", **SERIES_LENGTHS)
+def bench_ema(length):
+    prices = price_series(length)
+    yield lambda: calculate_ema(prices, 20)
+
+@case("calculate_rsi", "length", **SERIES_LENGTHS)
+def bench_rsi(length):
+    prices = price_series(length)
+    yield lambda: calculate_rsi(prices, 14)
+
+@case("calculate_macd", "length", **SERIES_LENGTHS)
+def bench_macd(length):
+    prices = price_series(length)
+    yield lambda: calculate_macd(prices)
+
+@case("calculate_bollinger_bands", "length", **SERIES_LENGTHS)
+def bench_bollinger_bands(length):
+    prices = price_series(length)
+    yield lambda: calculate_bollinger_bands(prices, 20)
+
+def ohlcv_frame(length: int, seed: int = SEED) -> pd.DataFrame:
+    """Minute bars around price_series(): high/low wicks and random volume."""
+    rng = np.random.default_rng(seed + 1)
+    close = price_series(length, seed)
+    wick = np.abs(rng.normal(0, 0.002, (2, length)))
+    return pd.DataFrame({
+        "high": close * (1 + wick[0]),
+        "low": close * (1 - wick[1]),
+        "close": close.to_numpy(),
+        "volume": rng.integers(100, 10_000, length).astype(np.float64)
+    }, index=pd.date_range("2024-01-02 09:30", periods=length, freq="min"))
+
+@case("calculate_stochastic", "length", **SERIES_LENGTHS)
+def bench_stochastic(length):
+    bars = ohlcv_frame(length)
+    yield lambda: calculate_stochastic(bars["high"], bars["low"], bars["close"])
+
+@case("calculate_atr", "length", **SERIES_LENGTHS)
+def bench_atr(length):
+    bars = ohlcv_frame(length)
+    yield lambda: calculate_atr(bars["high"], bars["low"], bars["close"])
+
+@case("calculate_vwap", "length", **SERIES_LENGTHS)
+def bench_vwap(length):
+    bars = ohlcv_frame(length)
+    yield lambda: calculate_vwap(bars["high"], bars["low"], bars["close"], bars["volume"])
+
+@case("StreamingStochastic.update", "window", small=[14, 1_000], medium=[14, 1_000, 5_000])
+def bench_streaming_stochastic(window):
+    # Per-update cost must not grow with the window (monotonic deques)
+    bars = ohlcv_frame(10_000)
+    rows = list(zip(bars["high"].tolist(), bars["low"].tolist(), bars["close"].tolist()))
+
+    def run():
+        indicator = StreamingStochastic(k_window=window)
+        for high, low, close in rows:
+            indicator.update(high, low, close)
+    yield run
+
+@case("DataGenerator.generate_day_data", "days", small=[252], medium=[252, 2_520], large=[252, 2_520, 25_200])
+def bench_generate_day_data(days):
+    generator = DataGenerator(initial_price=100.0)
+
+    def run():
+        random.seed(SEED) # DataGenerator draws from the global random module
+        return generator.generate_day_data("AAPL", days=days)
+    yield run
+
+@case("ExecutionEngine.process_market_data", "open_orders",
+      small=[10, 1_000], medium=[10, 1_000, 100_000])
+def bench_process_market_data(open_orders):
+    # Limit buys and sell stops resting below the market: every tick scans all of them
+    # and none fills, so each call does identical work
+    rng = random.Random(SEED)
+    engine = ExecutionEngine(PortfolioManager(initial_cash=1e12))
+    symbols = ["AAPL", "GOOGL", "MSFT", "AMZN"]
+    for i in range(open_orders):
+        symbol = symbols[i % len(symbols)]
+        if i % 2:
+            engine.place_order(symbol, OrderType.LIMIT, OrderSide.BUY, 10, price=rng.uniform(50, 90))
+        else:
+            engine.place_order(symbol, OrderType.STOP_LOSS, OrderSide.SELL, 10,
+                               price=rng.uniform(50, 90), stop_price=rng.uniform(50, 90))
+    yield lambda: engine.process_market_data("2024-01-02T15:00:00", "AAPL", 100.0, 99.99, 100.01)
+
+@case("PnLCalculator.calculate_total_pnl", "transactions",
+      small=[100, 10_000], medium=[100, 10_000, 100_000])
+def bench_total_pnl(transactions):
+    rng = random.Random(SEED)
+    portfolio = PortfolioManager(initial_cash=1e12)
+    symbols = [f"SYM{i}" for i in range(50)]
+    for i in range(transactions):
+        symbol = symbols[i % len(symbols)]
+        # Buy twice for every sell so positions stay open for the unrealized part
+        if i % 3 == 2:
+            portfolio.sell(i, symbol, 1, rng.uniform(90, 110))
+        else:
+            portfolio.buy(i, symbol, 1, rng.uniform(90, 110))
+    calculator = PnLCalculator(portfolio)
+    prices = {symbol: 100.0 for symbol in symbols}
+    yield lambda: calculator.calculate_total_pnl(prices)
+
+@case("websocket broadcast_to_all", "clients", small=[10, 100], large=[10, 100, 500])
+def bench_broadcast(clients):
+    # Real loopback connections to the server's handler; one call broadcasts a quote and
+    # waits until every client has received it
+    import websockets
+    from data_ingestion import websocket_server
+
+    loop = asyncio.new_event_loop()
+    quote = {"symbol": "AAPL", "price": 187.32, "change": 1.21, "change_percent": 0.65,
+             "volume": 51234567, "timestamp": "2024-01-02T15:00:00"}
+
+    async def start():
+        server = await websockets.serve(websocket_server.handle_client, "127.0.0.1", 0)
+        port = next(iter(server.sockets)).getsockname()[1]
+        connections = [await websockets.connect(f"ws://127.0.0.1:{port}") for _ in range(clients)]
+        while len(websocket_server.connected_clients) < clients:
+            await asyncio.sleep(0.001)
+        return server, connections
+
+    async def round_trip():
+        await websocket_server.broadcast_to_all(quote)
+        await asyncio.gather(*(connection.recv() for connection in connections))
+
+    server, connections = loop.run_until_complete(start())
+    try:
+        yield lambda: loop.run_until_complete(round_trip())
+    finally:
+        async def stop():
+            await asyncio.gather(*(connection.close() for connection in connections))
+            server.close()
+            await server.wait_closed()
+        loop.run_until_complete(stop())
+        loop.close()
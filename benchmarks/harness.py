@@ -0,0 +1,116 @@
+"""
+Minimal benchmark harness.
+A case is a generator function registered with @case: it builds its fixed-seed dataset for
+one parameter value, yields the callable to time, and tears down after the yield. Each
+callable is run in loops calibrated to take at least `min_time` seconds per repeat, and
+the per-call timings of all repeats are summarized. Results are plain dicts so a run can
+be saved as JSON and compared against the run of another commit.
+"""
+import contextlib
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+SCALES = ("small", "medium", "large")
+
+class Case:
+    def __init__(self, name: str, fn: Callable[..., Iterator[Callable[[], object]]],
+                 params: Dict[str, Sequence], param_name: str):
+        self.name = name
+        self.fn = fn
+        self.params = params
+        self.param_name = param_name
+
+    def params_for(self, scale: str) -> Sequence:
+        return self.params[scale]
+
+CASES: List[Case] = []
+
+def case(name: str, param_name: str, small: Sequence, medium: Sequence = None, large: Sequence = None):
+    """Register a benchmark; medium/large default to the next smaller scale's parameters."""
+    medium = small if medium is None else medium
+    large = medium if large is None else large
+
+    def register(fn):
+        CASES.append(Case(name, fn, {"small": small, "medium": medium, "large": large}, param_name))
+        return fn
+    return register
+
+def _time_loops(fn: Callable[[], object], loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return time.perf_counter() - start
+
+def measure(fn: Callable[[], object], repeats: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """Per-call timings in seconds over `repeats` repeats of a calibrated number of loops."""
+    fn() # warm-up: caches, lazy imports, first-call allocations
+    loops = 1
+    while True:
+        elapsed = _time_loops(fn, loops)
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        # Aim a little above min_time so the next round usually ends calibration
+        loops = max(loops * 2, int(loops * min_time * 1.2 / max(elapsed, 1e-9)))
+    samples = [elapsed / loops] + [_time_loops(fn, loops) / loops for _ in range(repeats - 1)]
+    return {
+        "loops": loops,
+        "repeats": repeats,
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0
+    }
+
+def run_case(bench: Case, param, repeats: int, min_time: float) -> Dict:
+    # Library code prints on order placement and fills; keep it out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with contextlib.contextmanager(bench.fn)(param) as fn:
+            timings = measure(fn, repeats=repeats, min_time=min_time)
+    return {"name": bench.name, "param_name": bench.param_name, "param": param, **timings}
+
+def environment() -> Dict[str, Optional[str]]:
+    """Commit and interpreter/library versions the results were taken with."""
+    import numpy
+    import pandas
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpu_count": str(os.cpu_count()),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__
+    }
+
+def result_key(result: Dict) -> str:
+    return f"{result['name']}[{result['param_name']}={result['param']}]"
+
+def compare(current: List[Dict], baseline: List[Dict], threshold: float) -> List[Dict]:
+    """Median ratios current/baseline for cases present in both runs; regressed if above 1 + threshold."""
+    previous = {result_key(r): r for r in baseline}
+    rows = []
+    for result in current:
+        key = result_key(result)
+        if key not in previous:
+            continue
+        ratio = result["median"] / previous[key]["median"]
+        rows.append({"case": key, "baseline": previous[key]["median"], "current": result["median"],
+                     "ratio": ratio, "regressed": ratio > 1 + threshold})
+    return rows
+
+def format_seconds(value: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:.3f} {unit}"
+    return f"{value / 1e-9:.1f} ns"
@@ -0,0 +1,317 @@
+"""
+Load generator for local instances of the WebSocket server, the REST API and the
+paper-trading API.
+
+    python -m benchmarks.loadgen --clients 2000 --symbols AAPL:5,MSFT:3,TSLA:1 \\
+        --rest-pollers 50 --order-pollers 10 --duration 60 [--output report.json]
+
+WebSocket clients subscribe to a weighted mix of symbols and measure end-to-end latency
+from the `sent_at` wall-clock timestamp the server embeds in every quote frame; REST
+pollers measure request round trips. Because the latency relies on sender and receiver
+sharing a clock, and to keep the tool from being pointed at anything but a developer's
+own instances, every target must resolve to a loopback address.
+"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import random
+import socket
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import numpy as np
+import websockets
+
+def require_loopback(url: str):
+    """Raise ValueError unless every address `url`'s host resolves to is a loopback address."""
+    host = urlsplit(url).hostname
+    if not host:
+        raise ValueError(f"No host in {url}")
+    addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    remote = [a for a in addresses if not ipaddress.ip_address(a.split("%")[0]).is_loopback]
+    if remote:
+        raise ValueError(f"{url} resolves to non-loopback addresses {remote}; only local instances may be load-tested")
+
+def parse_symbol_mix(text: str) -> Tuple[List[str], List[float]]:
+    """'AAPL:5,MSFT:3,TSLA' -> (['AAPL', 'MSFT', 'TSLA'], [5.0, 3.0, 1.0])"""
+    symbols, weights = [], []
+    for item in text.split(","):
+        symbol, _, weight = item.strip().partition(":")
+        symbols.append(symbol.upper())
+        weights.append(float(weight) if weight else 1.0)
+    return symbols, weights
+
+class Recorder:
+    """Latencies, counts and errors per stream; only samples taken while `active` count."""
+
+    def __init__(self):
+        self.active = False
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.bytes: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.error_kinds: Dict[str, int] = defaultdict(int)
+        self.started = self.stopped = None
+
+    def record(self, stream: str, latency: Optional[float], size: int = 0):
+        if not self.active:
+            return
+        self.counts[stream] += 1
+        self.bytes[stream] += size
+        if latency is not None:
+            self.latencies[stream].append(latency)
+
+    def error(self, stream: str, exc: BaseException):
+        if self.active:
+            self.errors[stream] += 1
+            self.error_kinds[f"{stream}: {type(exc).__name__}"] += 1
+
+    def start(self):
+        self.active, self.started = True, time.perf_counter()
+
+    def stop(self):
+        self.active, self.stopped = False, time.perf_counter()
+
+    def report(self) -> Dict:
+        duration = self.stopped - self.started
+        streams = {}
+        for stream in sorted(set(self.counts) | set(self.errors)):
+            samples = np.asarray(self.latencies.get(stream, ()), dtype=np.float64) * 1000
+            total = self.counts[stream] + self.errors[stream]
+            entry = {
+                "count": self.counts[stream],
+                "errors": self.errors[stream],
+                "error_rate": self.errors[stream] / total if total else 0.0,
+                "throughput_per_s": self.counts[stream] / duration,
+                "bytes_per_s": self.bytes[stream] / duration
+            }
+            if samples.size:
+                p50, p99, p999 = np.percentile(samples, [50, 99, 99.9])
+                entry.update(latency_ms={"mean": float(samples.mean()), "p50": float(p50), "p99": float(p99),
+                                         "p999": float(p999), "max": float(samples.max())})
+            streams[stream] = entry
+        return {"duration_s": duration, "streams": streams, "error_kinds": dict(self.error_kinds)}
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client (Content-Length and chunked bodies) on asyncio streams."""
+
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self._reader = self._writer = None
+
+    async def request(self, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, bytes]:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = f"{method} {self.prefix}{path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+        self._writer.write(head.encode("latin-1") + b"\r\n" + payload)
+        try:
+            return await self._read_response()
+        except BaseException:
+            self.close() # the connection state is unknown; reconnect on the next request
+            raise
+
+    async def _read_response(self) -> Tuple[int, bytes]:
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Server closed the connection")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            data = b"".join(chunks)
+        else:
+            data = await self._reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, data
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+async def websocket_client(url: str, symbols: List[str], recorder: Recorder, stop: asyncio.Event):
+    try:
+        connection = await websockets.connect(url, open_timeout=30)
+    except Exception as e:
+        recorder.error("ws connect", e)
+        return
+    try:
+        for symbol in symbols:
+            await connection.send(json.dumps({"action": "subscribe", "symbol": symbol}))
+        while not stop.is_set():
+            try:
+                message = await asyncio.wait_for(connection.recv(), timeout=1.0)
+            except asyncio.TimeoutError:
+                continue
+            received = time.time()
+            data = json.loads(message)
+            sent_at = data.get("sent_at")
+            recorder.record("ws quote" if sent_at is not None else "ws control",
+                            received - sent_at if sent_at is not None else None, len(message))
+    except Exception as e:
+        if not stop.is_set():
+            recorder.error("ws receive", e)
+    finally:
+        await connection.close()
+
+async def rest_poller(base_url: str, symbols: List[str], weights: List[float], interval: float,
+                      rng: random.Random, recorder: Recorder, stop: asyncio.Event):
+    connection = HttpConnection(base_url)
+    routes = [("GET /stocks/{symbol}/indicators", "/stocks/{}/indicators?indicators=sma,ema,rsi,macd"),
+              ("GET /stocks/{symbol}/signals", "/stocks/{}/signals")]
+    while not stop.is_set():
+        stream, template = rng.choice(routes)
+        symbol = rng.choices(symbols, weights)[0]
+        await _timed_request(connection, stream, "GET", template.format(symbol), None, recorder)
+        await asyncio.sleep(rng.expovariate(1 / interval) if interval > 0 else 0)
+    connection.close()
+
+async def order_poller(base_url: str, account_id: str, symbols: List[str], weights: List[float],
+                       interval: float, rng: random.Random, recorder: Recorder, stop: asyncio.Event):
+    # Far-from-market limit orders placed and cancelled again, so accounts do not accumulate orders
+    connection = HttpConnection(base_url)
+    while not stop.is_set():
+        order = {"symbol": rng.choices(symbols, weights)[0], "order_type": "LIMIT", "side": "BUY",
+                 "quantity": 1, "price": 0.01}
+        response = await _timed_request(connection, "POST /orders", "POST",
+                                        f"/accounts/{account_id}/orders", order, recorder)
+        if response is not None:
+            order_id = json.loads(response).get("order_id")
+            if order_id:
+                await _timed_request(connection, "DELETE /orders/{order_id}", "DELETE",
+                                     f"/accounts/{account_id}/orders/{order_id}", None, recorder)
+        await asyncio.sleep(rng.expovariate(1 / interval) if interval > 0 else 0)
+    connection.close()
+
+async def _timed_request(connection: HttpConnection, stream: str, method: str, path: str,
+                         body: Optional[dict], recorder: Recorder) -> Optional[bytes]:
+    start = time.perf_counter()
+    try:
+        status, data = await connection.request(method, path, body)
+    except Exception as e:
+        recorder.error(stream, e)
+        return None
+    if status >= 400:
+        recorder.error(stream, RuntimeError(f"HTTP {status}"))
+        return None
+    recorder.record(stream, time.perf_counter() - start, len(data))
+    return data
+
+def _raise_fd_limit(wanted: int):
+    try:
+        import resource
+    except ImportError: # not available on Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < wanted:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+async def run(args) -> Dict:
+    symbols, weights = parse_symbol_mix(args.symbols)
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    stop = asyncio.Event()
+    tasks = []
+
+    # Ramp the swarm up over --ramp seconds; measurement starts once everyone is connected
+    batch = max(1, args.clients // max(1, int(args.ramp * 10)))
+    for i in range(args.clients):
+        picks = min(args.subscriptions, len(symbols))
+        chosen = set()
+        while len(chosen) < picks:
+            chosen.add(rng.choices(symbols, weights)[0])
+        tasks.append(asyncio.create_task(websocket_client(args.ws_url, sorted(chosen), recorder, stop)))
+        if (i + 1) % batch == 0:
+            await asyncio.sleep(0.1)
+    for _ in range(args.rest_pollers):
+        tasks.append(asyncio.create_task(rest_poller(
+            args.api_url, symbols, weights, args.rest_interval, random.Random(rng.random()), recorder, stop)))
+    for i in range(args.order_pollers):
+        tasks.append(asyncio.create_task(order_poller(
+            args.paper_url, f"load-{i}", symbols, weights, args.order_interval,
+            random.Random(rng.random()), recorder, stop)))
+
+    await asyncio.sleep(args.warmup)
+    recorder.start()
+    await asyncio.sleep(args.duration)
+    recorder.stop()
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    report = recorder.report()
+    report["config"] = {k: v for k, v in vars(args).items() if k != "output"}
+    return report
+
+def print_report(report: Dict):
+    print(f"\n{'stream':34s} {'count':>9s} {'err%':>6s} {'per s':>9s} {'p50 ms':>9s} {'p99 ms':>9s} {'p999 ms':>9s} {'max ms':>9s}")
+    for stream, entry in report["streams"].items():
+        latency = entry.get("latency_ms", {})
+        cells = [f"{latency[k]:9.2f}" if k in latency else f"{'-':>9s}" for k in ("p50", "p99", "p999", "max")]
+        print(f"{stream:34s} {entry['count']:9d} {entry['error_rate'] * 100:6.2f} "
+              f"{entry['throughput_per_s']:9.1f} " + " ".join(cells))
+    for kind, count in report["error_kinds"].items():
+        print(f"  {count} x {kind}")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadgen", description="Load-test local instances.")
+    parser.add_argument("--ws-url", default="ws://127.0.0.1:8765")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--paper-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--clients", type=int, default=1000, help="WebSocket clients")
+    parser.add_argument("--symbols", default="AAPL:5,MSFT:4,NVDA:3,GOOGL:2,AMZN:2,TSLA:2,META:1",
+                        help="weighted symbol mix, SYMBOL[:weight],...")
+    parser.add_argument("--subscriptions", type=int, default=1, help="symbols per WebSocket client")
+    parser.add_argument("--rest-pollers", type=int, default=20)
+    parser.add_argument("--rest-interval", type=float, default=1.0, help="mean seconds between polls")
+    parser.add_argument("--order-pollers", type=int, default=0)
+    parser.add_argument("--order-interval", type=float, default=1.0)
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds to connect all clients over")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds after ramp-up before measuring")
+    parser.add_argument("--duration", type=float, default=60.0, help="measured seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    targets = [args.ws_url]
+    if args.rest_pollers:
+        targets.append(args.api_url)
+    if args.order_pollers:
+        targets.append(args.paper_url)
+    try:
+        for url in targets:
+            require_loopback(url)
+    except (ValueError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    _raise_fd_limit(args.clients + args.rest_pollers + args.order_pollers + 256)
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if any(entry["errors"] for entry in report["streams"].values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Alert rule engine for the WebSocket stream.
+Rules are indexed per symbol and per watched series (price or an indicator) in sorted
+threshold lists, so evaluating a tick is two binary searches per series plus the cost
+of the rules that actually fire.
+"""
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
+import re
+
+RULE_TYPES = ("price", "percent", "indicator")
+DIRECTIONS = ("above", "below", "cross")
+INDICATOR_PATTERN = re.compile(r"^(sma|ema|rsi)_(\d{1,3})$")
+
+@dataclass
+class AlertRule:
+    """
+    A registered alert. `series` is 'price' or an indicator key such as 'rsi_14'; `sides`
+    lists the (direction, threshold) entries it occupies in the index ('above'/'below').
+    """
+    alert_id: int
+    owner: Any
+    symbol: str
+    series: str
+    sides: List[Tuple[str, float]]
+    repeat: bool = False
+    spec: Dict = field(default_factory=dict)
+
+    def to_dict(self):
+        return {
+            "alert_id": self.alert_id,
+            "symbol": self.symbol,
+            "series": self.series,
+            "thresholds": {side: round(threshold, 4) for side, threshold in self.sides},
+            "repeat": self.repeat,
+            **self.spec
+        }
+
+class ThresholdIndex:
+    """
+    Rules of one (symbol, series), kept in two sorted lists: 'above' rules fire when the
+    value rises through their threshold, 'below' rules when it falls through it.
+    """
+
+    def __init__(self):
+        self.up_keys: List[float] = []
+        self.up_rules: List[AlertRule] = []
+        self.down_keys: List[float] = []
+        self.down_rules: List[AlertRule] = []
+        self.last_value: Optional[float] = None
+
+    def __len__(self):
+        return len(self.up_rules) + len(self.down_rules)
+
+    def _side(self, direction: str) -> Tuple[List[float], List[AlertRule]]:
+        if direction == "above":
+            return self.up_keys, self.up_rules
+        return self.down_keys, self.down_rules
+
+    def add(self, rule: AlertRule, direction: str, threshold: float):
+        keys, rules = self._side(direction)
+        pos = bisect_right(keys, threshold)
+        keys.insert(pos, threshold)
+        rules.insert(pos, rule)
+
+    def remove(self, rule: AlertRule, direction: str, threshold: float):
+        keys, rules = self._side(direction)
+        pos = bisect_left(keys, threshold)
+        while pos < len(rules) and keys[pos] == threshold:
+            if rules[pos] is rule:
+                del keys[pos]
+                del rules[pos]
+                return
+            pos += 1
+
+    def evaluate(self, value: Optional[float]) -> List[AlertRule]:
+        """Rules whose threshold lies between the previous value and `value` (crossed)."""
+        if value is not None and value != value:
+            value = None # NaN (e.g. RSI over a flat window) never crosses anything
+        previous, self.last_value = self.last_value, value
+        if previous is None or value is None or value == previous:
+            return []
+        if value > previous:
+            keys, rules = self.up_keys, self.up_rules
+            lo, hi = bisect_right(keys, previous), bisect_right(keys, value)
+        else:
+            keys, rules = self.down_keys, self.down_rules
+            lo, hi = bisect_left(keys, value), bisect_left(keys, previous)
+        if lo == hi:
+            return []
+        fired = rules[lo:hi]
+        # One-shot rules leave the index as they fire; repeating ones stay armed
+        if all(not rule.repeat for rule in fired):
+            del keys[lo:hi]
+            del rules[lo:hi]
+        else:
+            kept = [(k, r) for k, r in zip(keys[lo:hi], fired) if r.repeat]
+            keys[lo:hi] = [k for k, _ in kept]
+            rules[lo:hi] = [r for _, r in kept]
+        return fired
+
+class AlertBook:
+    """All alert rules of a server, indexed by symbol and series."""
+
+    def __init__(self):
+        self._ids = count(1)
+        self.rules: Dict[int, AlertRule] = {}
+        self.indexes: Dict[str, Dict[str, ThresholdIndex]] = {} # symbol -> series -> index
+
+    def add(self, owner, spec: Dict, current_price: Optional[float] = None,
+            current_value: Optional[float] = None) -> AlertRule:
+        """
+        Register a rule from a client message:
+          {"type": "price", "direction": "above"|"below"|"cross", "value": 150}
+          {"type": "percent", "value": 2.5}                   (+/- from the current price)
+          {"type": "indicator", "indicator": "rsi_14", "direction": "above", "value": 70}
+        Rules fire when the watched value crosses the threshold, not when it already is beyond it.
+        'cross' and percent rules without a direction watch both sides under one alert id.
+        `current_value` is the watched series' latest value (the price, or the indicator's);
+        it seeds a new index so that the very next tick can already cross a threshold.
+        """
+        rule_type = spec.get("type", "price")
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Unknown alert type: {rule_type}")
+        symbol = spec.get("symbol")
+        if not symbol:
+            raise ValueError("Alert requires a symbol")
+        try:
+            value = float(spec["value"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Alert requires a numeric 'value'")
+
+        series = "price"
+        direction = spec.get("direction", "cross")
+        if rule_type == "percent":
+            if current_price is None:
+                raise ValueError("No current price to anchor a percent alert")
+            if direction == "above":
+                thresholds = [("above", current_price * (1 + abs(value) / 100))]
+            elif direction == "below":
+                thresholds = [("below", current_price * (1 - abs(value) / 100))]
+            else:
+                thresholds = [("above", current_price * (1 + abs(value) / 100)),
+                              ("below", current_price * (1 - abs(value) / 100))]
+        else:
+            if rule_type == "indicator":
+                series = str(spec.get("indicator", "")).lower()
+                if not INDICATOR_PATTERN.match(series):
+                    raise ValueError("Indicator must look like rsi_14, sma_20 or ema_12")
+            if direction not in DIRECTIONS:
+                raise ValueError(f"Direction must be one of {DIRECTIONS}")
+            thresholds = [(direction, value)] if direction != "cross" else [("above", value), ("below", value)]
+
+        rule = AlertRule(
+            alert_id=next(self._ids), owner=owner, symbol=symbol, series=series, sides=thresholds,
+            repeat=bool(spec.get("repeat", False)), spec={"type": rule_type, "direction": direction, "value": value}
+        )
+        symbol_indexes = self.indexes.setdefault(symbol, {})
+        index = symbol_indexes.get(series)
+        if index is None:
+            index = symbol_indexes[series] = ThresholdIndex()
+            if current_value is not None and current_value == current_value: # not NaN
+                index.last_value = current_value
+        for side, threshold in thresholds:
+            index.add(rule, side, threshold)
+        self.rules[rule.alert_id] = rule
+        return rule
+
+    def remove(self, alert_id: int, owner=None) -> bool:
+        rule = self.rules.get(alert_id)
+        if rule is None or (owner is not None and rule.owner is not owner):
+            return False
+        self._discard(rule)
+        return True
+
+    def _discard(self, rule: AlertRule):
+        self.rules.pop(rule.alert_id, None)
+        index = self.indexes.get(rule.symbol, {}).get(rule.series)
+        if index is None:
+            return
+        for side, threshold in rule.sides:
+            index.remove(rule, side, threshold)
+        if not len(index):
+            del self.indexes[rule.symbol][rule.series]
+            if not self.indexes[rule.symbol]:
+                del self.indexes[rule.symbol]
+
+    def remove_owner(self, owner) -> int:
+        """Drop every rule of a disconnected client; returns how many were removed."""
+        mine = [rule for rule in self.rules.values() if rule.owner is owner]
+        for rule in mine:
+            self._discard(rule)
+        return len(mine)
+
+    def list(self, owner) -> List[AlertRule]:
+        return [rule for rule in self.rules.values() if rule.owner is owner]
+
+    def series_for(self, symbol: str) -> List[str]:
+        return list(self.indexes.get(symbol, {}))
+
+    def has_rules(self, symbol: str) -> bool:
+        return symbol in self.indexes
+
+    def evaluate(self, symbol: str, values: Dict[str, Optional[float]]) -> List[AlertRule]:
+        """
+        Feed the latest value of each watched series of `symbol` (e.g. {"price": 151.2,
+        "rsi_14": 70.4}); returns the rules that fired. Fired one-shot rules are removed.
+        """
+        indexes = self.indexes.get(symbol)
+        if not indexes:
+            return []
+        fired = []
+        for series, index in list(indexes.items()):
+            if series in values:
+                fired.extend(index.evaluate(values[series]))
+        for rule in fired:
+            if not rule.repeat:
+                # A one-shot two-sided rule is done once either side fires
+                self._discard(rule)
+        return fired
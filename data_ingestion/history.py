@@ -0,0 +1,238 @@
+"""
+Historical bar read path.
+A HistorySource yields OHLCV bars for one symbol in ascending time order over a date
+range, resampled to the requested interval, starting strictly after a keyset cursor.
+Bars are produced lazily in per-session chunks so callers can stream arbitrarily long
+ranges without materializing them.
+"""
+import math
+import os
+import zlib
+from abc import ABC, abstractmethod
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
+from .models import OHLCVBar
+
+# Bar width in minutes; "1d" is one regular session
+INTERVAL_MINUTES = {"1m": 1, "5m": 5, "15m": 15, "1h": 60, "1d": 390}
+
+SESSION_OPEN = time(9, 30)
+SESSION_MINUTES = 390
+SESSION_OPEN_MINUTE = SESSION_OPEN.hour * 60 + SESSION_OPEN.minute
+
+# First session of the synthetic history (a Monday)
+EPOCH = date(2000, 1, 3)
+
+def _bucket_minutes(interval: str) -> np.ndarray:
+    """Start minute (from midnight) of the bucket each session minute falls in, clock-aligned."""
+    width = INTERVAL_MINUTES[interval]
+    minutes = SESSION_OPEN_MINUTE + np.arange(SESSION_MINUTES)
+    if interval == "1d":
+        return np.zeros(SESSION_MINUTES, dtype=np.int64)
+    return minutes // width * width
+
+def bars_per_session(interval: str, minutes: int = SESSION_MINUTES) -> int:
+    """Bars of `interval` spanned by the first `minutes` minutes of a session."""
+    return len(np.unique(_bucket_minutes(interval)[:minutes]))
+
+def session_minutes_elapsed(day: date, moment: datetime) -> int:
+    """Minutes of the session on `day` that have fully passed at `moment` (0..SESSION_MINUTES)."""
+    elapsed = (moment - datetime.combine(day, SESSION_OPEN)) // timedelta(minutes=1)
+    return min(max(elapsed, 0), SESSION_MINUTES)
+
+def trading_days_between(start: date, end: date) -> int:
+    """Number of weekdays in [start, end)."""
+    return int(np.busday_count(start, end))
+
+def previous_trading_day(day: date, sessions: int) -> date:
+    return np.busday_offset(day, -sessions, roll='backward').astype(date)
+
+def bar_chunk_to_bars(chunk: Dict[str, np.ndarray]) -> Iterator[OHLCVBar]:
+    for ts, o, h, l, c, v in zip(chunk['timestamp'].astype('datetime64[us]').tolist(), chunk['open'].tolist(),
+                                 chunk['high'].tolist(), chunk['low'].tolist(), chunk['close'].tolist(),
+                                 chunk['volume'].tolist()):
+        yield OHLCVBar(timestamp=ts, open=o, high=h, low=l, close=c, volume=v)
+
+class HistorySource(ABC):
+    """Base class; subclasses implement iter_chunks()."""
+
+    @abstractmethod
+    def iter_chunks(self, symbol: str, interval: str, start: datetime, end: datetime,
+                    after: Optional[datetime] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Yield column chunks {"timestamp", "open", "high", "low", "close", "volume"} of bars
+        labelled in [start, end] and strictly after `after`, in ascending time order.
+        """
+
+    def iter_bars(self, symbol: str, interval: str, start: datetime, end: datetime,
+                  after: Optional[datetime] = None) -> Iterator[OHLCVBar]:
+        for chunk in self.iter_chunks(symbol, interval, start, end, after):
+            yield from bar_chunk_to_bars(chunk)
+
+    def default_start(self, interval: str, end: datetime, bars: int) -> datetime:
+        """
+        Label of the first of the latest `bars` bars of `interval` up to `end`: the bars of
+        the session on end's day that exist by then (none before the open or on a weekend)
+        and as many bars of the sessions before it as are still needed.
+        """
+        latest = min(end, datetime.now())
+        day = latest.date()
+        labels = np.unique(_bucket_minutes(interval))
+        today = bars_per_session(interval, session_minutes_elapsed(day, latest)) if np.is_busday(day) else 0
+        if bars <= today:
+            first, skip = day, today - bars
+        else:
+            sessions = math.ceil((bars - today) / len(labels))
+            # Rolls back to the last session first if end's day is not a trading day
+            first = previous_trading_day(day, sessions if np.is_busday(day) else sessions - 1)
+            skip = sessions * len(labels) - (bars - today)
+        return datetime.combine(first, time.min) + timedelta(minutes=int(labels[skip]))
+
+    def data_as_of(self, symbol: str, interval: str, start: datetime, end: datetime) -> datetime:
+        """
+        End of the newest session minute that bars in [start, end] can hold at this moment.
+        It moves every minute while a session is open (the forming bar changes with it)
+        and stays at the last close otherwise, so it versions responses derived from the range.
+        """
+        latest = min(end, datetime.now())
+        day = latest.date()
+        minutes = session_minutes_elapsed(day, latest) if np.is_busday(day) else 0
+        if not minutes:
+            # The last session that closed before `latest`
+            day = np.busday_offset(day, -1, roll='forward').astype(date)
+            minutes = SESSION_MINUTES
+        return datetime.combine(day, SESSION_OPEN) + timedelta(minutes=minutes)
+
+class MockHistorySource(HistorySource):
+    """
+    Deterministic synthetic history: the same (symbol, time) always has the same bar, so
+    ranges and cursor pages are consistent across requests. Daily closes are a seeded
+    random walk per symbol; each session's minute path is a Brownian bridge between the
+    previous close and the session close, and coarser intervals are aggregated from it.
+    """
+
+    def __init__(self, daily_volatility: float = 0.02):
+        self.daily_volatility = daily_volatility
+        self._daily: Dict[str, np.ndarray] = {} # symbol -> log closes by session index
+
+    @staticmethod
+    def _seed(symbol: str) -> int:
+        return zlib.crc32(symbol.encode("utf-8"))
+
+    def _log_closes(self, symbol: str, sessions: int) -> np.ndarray:
+        closes = self._daily.get(symbol)
+        if closes is None or len(closes) < sessions:
+            size = max(sessions, 8192)
+            rng = np.random.default_rng(self._seed(symbol))
+            initial = np.log(50 + self._seed(symbol) % 450)
+            steps = rng.normal(0, self.daily_volatility, size)
+            closes = initial + np.cumsum(steps)
+            self._daily[symbol] = closes
+        return closes
+
+    def _session_minutes(self, symbol: str, index: int) -> Tuple[np.ndarray, ...]:
+        """Minute bars (open, high, low, close, volume) of the session `index` days after EPOCH."""
+        log_closes = self._log_closes(symbol, index + 1)
+        log_open = log_closes[index - 1] if index > 0 else log_closes[0] - self.daily_volatility
+        log_close = log_closes[index]
+
+        rng = np.random.default_rng([self._seed(symbol), index])
+        path = np.cumsum(rng.normal(0, 1, SESSION_MINUTES))
+        ramp = np.arange(1, SESSION_MINUTES + 1) / SESSION_MINUTES
+        path -= ramp * path[-1] # bridge: starts and ends on the daily walk
+        scale = self.daily_volatility / math.sqrt(SESSION_MINUTES)
+        closes = np.exp(log_open + (log_close - log_open) * ramp + path * scale)
+        opens = np.concatenate([[math.exp(log_open)], closes[:-1]])
+        wick = np.abs(rng.normal(0, scale / 2, (2, SESSION_MINUTES)))
+        highs = np.maximum(opens, closes) * (1 + wick[0])
+        lows = np.minimum(opens, closes) * (1 - wick[1])
+        volumes = rng.integers(2000, 30000, SESSION_MINUTES)
+        return opens, highs, lows, closes, volumes
+
+    def _session_bars(self, symbol: str, index: int, day: date, interval: str,
+                      minutes: int = SESSION_MINUTES) -> Dict[str, np.ndarray]:
+        """Bars of the session's first `minutes` minutes; a bucket cut short holds only those."""
+        opens, highs, lows, closes, volumes = (column[:minutes] for column in self._session_minutes(symbol, index))
+        buckets = _bucket_minutes(interval)[:minutes]
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], minutes] - 1
+        day_start = np.datetime64(day, 'm')
+        return {
+            'timestamp': day_start + buckets[starts].astype('timedelta64[m]'),
+            'open': np.round(opens[starts], 2),
+            'high': np.round(np.maximum.reduceat(highs, starts), 2),
+            'low': np.round(np.minimum.reduceat(lows, starts), 2),
+            'close': np.round(closes[ends], 2),
+            'volume': np.add.reduceat(volumes, starts),
+        }
+
+    def iter_chunks(self, symbol, interval, start, end, after=None):
+        # Bars hold only the session minutes that have passed: none before the open, and
+        # the bar still forming has the minutes so far
+        now = datetime.now()
+        end = min(end, now)
+        if after is not None and after >= start:
+            start = after + timedelta(microseconds=1)
+        first_day = max(start.date(), EPOCH)
+        if first_day > end.date():
+            return
+        days = np.arange(np.busday_offset(first_day, 0, roll='forward'),
+                         np.datetime64(end.date()) + 1, dtype='datetime64[D]')
+        days = days[np.is_busday(days)]
+        lower, upper = np.datetime64(start, 'us'), np.datetime64(end, 'us')
+        for day in days.astype(date):
+            minutes = session_minutes_elapsed(day, now)
+            if not minutes:
+                continue
+            chunk = self._session_bars(symbol, trading_days_between(EPOCH, day), day, interval, minutes)
+            ts = chunk['timestamp'].astype('datetime64[us]')
+            keep = (ts >= lower) & (ts <= upper)
+            if not keep.all():
+                chunk = {name: column[keep] for name, column in chunk.items()}
+            if len(chunk['timestamp']):
+                yield chunk
+
+class DatabaseHistorySource(HistorySource):
+    """Bars from the TimescaleDB stock_data hypertable (see database.db.iter_stock_bars)."""
+
+    def __init__(self, page_size: int = 10000):
+        self.page_size = page_size
+
+    def iter_chunks(self, symbol, interval, start, end, after=None):
+        from database.db import iter_stock_bars # psycopg2 is only needed for this backend
+        rows = []
+        for row in iter_stock_bars(symbol, interval, start, end, after=after, page_size=self.page_size):
+            rows.append(row)
+            if len(rows) == self.page_size:
+                yield self._to_chunk(rows)
+                rows = []
+        if rows:
+            yield self._to_chunk(rows)
+
+    @staticmethod
+    def _to_chunk(rows) -> Dict[str, np.ndarray]:
+        ts, o, h, l, c, v = zip(*rows)
+        return {
+            # stock_data.time is TIMESTAMPTZ; bars are served as naive UTC
+            'timestamp': np.array([t if t.tzinfo is None else t.astimezone(timezone.utc).replace(tzinfo=None)
+                                   for t in ts], dtype='datetime64[us]'),
+            'open': np.array(o, dtype=np.float64),
+            'high': np.array(h, dtype=np.float64),
+            'low': np.array(l, dtype=np.float64),
+            'close': np.array(c, dtype=np.float64),
+            'volume': np.array(v, dtype=np.int64),
+        }
+
+_source: Optional[HistorySource] = None
+
+def get_history_source() -> HistorySource:
+    """History backend selected by HISTORY_BACKEND: "mock" (default) or "db", behind the tick cache."""
+    global _source
+    if _source is None:
+        from .tick_cache import CachedHistorySource, get_tick_cache
+        backend = os.getenv("HISTORY_BACKEND", "mock").lower()
+        base = DatabaseHistorySource() if backend == "db" else MockHistorySource()
+        # Ranges covered by the in-process tick cache (recent charts) never reach the backend
+        _source = CachedHistorySource(base, get_tick_cache())
+    return _source
@@ -5,6 +5,7 @@ Simulates connecting to an external market data API.
 from datetime import datetime
 from typing import List, Dict
 from .data_generator import DataGenerator
+from .history import get_history_source
 from .models import StockDayData, StockRealtimeData
 
 class MockDataProvider:
@@ -13,12 +14,26 @@ class MockDataProvider:
 
     def _get_generator(self, symbol: str) -> DataGenerator:
         if symbol not in self.generators:
-            # Assign a random starting price between 50 and 500
-            import random
-            initial_price = random.uniform(50, 500)
-            self.generators[symbol] = DataGenerator(initial_price=initial_price)
+            self.generators[symbol] = DataGenerator(initial_price=self._initial_price(symbol))
         return self.generators[symbol]
 
+    @staticmethod
+    def _initial_price(symbol: str) -> float:
+        """
+        The latest close of the history source, so live quotes continue the bars that
+        snapshots and charts are built from; a random price between 50 and 500 without one.
+        """
+        try:
+            source = get_history_source()
+            end = datetime.now()
+            bars = list(source.iter_bars(symbol, "1m", source.default_start("1m", end, 1), end))
+            if bars:
+                return bars[-1].close
+        except Exception as e: # e.g. the database backend being unreachable
+            print(f"No history close for {symbol}, starting from a random price: {e}")
+        import random
+        return random.uniform(50, 500)
+
     def get_historical_data(self, symbol: str, days: int = 30) -> List[StockDayData]:
         """Fetch historical daily data."""
         gen = self._get_generator(symbol)
@@ -0,0 +1,132 @@
+"""
+Shared-memory quote bus.
+One producer process publishes quotes into a fixed-size ring of records in a
+multiprocessing.shared_memory block; any number of reader processes follow it without
+locks, pickling or per-reader queues. Each slot is guarded by a sequence number in the
+style of a seqlock: the producer makes it odd while rewriting the slot and sets it to
+2 * (position + 1) when the record at `position` is complete. A reader copies the slots it
+has not seen yet and keeps a record only if the slot's sequence number was the expected
+even value both before and after the copy; a reader that fell more than a ring behind
+skips ahead and counts the quotes it lost.
+
+Stores are ordered as issued on x86-64 (TSO); the bus relies on that and has no explicit
+memory barriers.
+"""
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+import numpy as np
+from .models import StockRealtimeData
+from .tick_cache import from_micros, to_micros
+
+MAGIC = 0x5155_4f54_4542_5553 # "QUOTEBUS"
+
+_HEADER = np.dtype([("magic", "<u8"), ("capacity", "<u8"), ("write_pos", "<u8")])
+_HEADER_SIZE = 64 # keep the producer's write_pos on its own cache line, away from the slots
+
+SLOT = np.dtype([
+    ("seq", "<u8"),
+    ("symbol", "S32"),
+    ("timestamp", "<i8"), # microseconds since the Unix epoch, naive like the quotes
+    ("generated_ns", "<i8"), # producer's perf_counter_ns() when it began generating the quote
+    ("published_ns", "<i8"), # ...and when it published it; CLOCK_MONOTONIC is system-wide on Linux
+    ("price", "<f8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("volume", "<i8")
+])
+_DATA_FIELDS = [name for name in SLOT.names if name != "seq"]
+
+class QuoteBus:
+    """Create with QuoteBus.create() in the producer and attach with QuoteBus.attach(name)."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self._header = np.ndarray((1,), dtype=_HEADER, buffer=shm.buf)
+        if int(self._header["magic"][0]) != MAGIC:
+            raise ValueError(f"Shared memory block {shm.name} is not a quote bus")
+        self.capacity = int(self._header["capacity"][0])
+        self.slots = np.ndarray((self.capacity,), dtype=SLOT, buffer=shm.buf, offset=_HEADER_SIZE)
+        self._seqs = self.slots["seq"]
+        self._data = self.slots[_DATA_FIELDS] # multi-field view without the sequence number
+
+    @classmethod
+    def create(cls, capacity: int = 65536, name: Optional[str] = None) -> "QuoteBus":
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_SIZE + capacity * SLOT.itemsize)
+        header = np.ndarray((1,), dtype=_HEADER, buffer=shm.buf)
+        header[0] = (MAGIC, capacity, 0)
+        np.ndarray((capacity,), dtype=SLOT, buffer=shm.buf, offset=_HEADER_SIZE)["seq"] = 0
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "QuoteBus":
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False) # Python 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def write_pos(self) -> int:
+        return int(self._header["write_pos"][0])
+
+    def publish(self, quote: StockRealtimeData, published_ns: int, generated_ns: Optional[int] = None):
+        """Single producer only."""
+        pos = self.write_pos
+        i = pos % self.capacity
+        self._seqs[i] = 2 * pos + 1 # odd: slot being rewritten
+        self._data[i] = (quote.symbol.encode(), to_micros(quote.timestamp),
+                         published_ns if generated_ns is None else generated_ns, published_ns,
+                         quote.price, quote.bid, quote.ask, quote.volume)
+        self._seqs[i] = 2 * pos + 2
+        self._header["write_pos"] = pos + 1
+
+    def read(self, pos: int, limit: Optional[int] = None) -> Tuple[np.ndarray, int, int]:
+        """
+        Records published at positions >= pos, as a structured array without torn slots.
+        Returns (records, next position to read from, number of quotes lost to overrun).
+        """
+        end = self.write_pos
+        lost = 0
+        if end - pos > self.capacity:
+            lost = end - self.capacity - pos
+            pos = end - self.capacity
+        if limit is not None:
+            end = min(end, pos + limit)
+        if end <= pos:
+            return self.slots[:0].copy(), pos, lost
+        positions = np.arange(pos, end, dtype=np.uint64)
+        index = (positions % np.uint64(self.capacity)).astype(np.intp)
+        expected = positions * np.uint64(2) + np.uint64(2)
+        before = self._seqs[index]
+        records = self.slots[index] # fancy indexing copies
+        after = self._seqs[index]
+        valid = (before == expected) & (after == expected)
+        if not valid.all():
+            # Slots overwritten while they were copied: the producer lapped this reader
+            lost += int((~valid).sum())
+            records = records[valid]
+        return records, end, lost
+
+    def close(self):
+        # Views into the buffer must go before the mapping can be closed
+        del self._header, self.slots, self._seqs, self._data
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def record_to_quote(record) -> StockRealtimeData:
+    return StockRealtimeData(
+        symbol=record["symbol"].decode(),
+        timestamp=from_micros(record["timestamp"]),
+        price=float(record["price"]),
+        bid=float(record["bid"]),
+        ask=float(record["ask"]),
+        volume=int(record["volume"])
+    )
@@ -0,0 +1,78 @@
+"""
+JSON serialization shared by the REST API and the WebSocket server.
+Uses orjson when it is installed and falls back to the standard library otherwise. Both
+backends accept NumPy arrays/scalars, datetimes and dates directly, so payloads do not
+need to be converted to lists of Python floats and ISO strings first. Both write NaN and
+infinities as null, as orjson does, so bodies do not depend on which one is installed.
+"""
+import json
+import math
+from datetime import date, datetime
+from typing import Any, Dict, List, Sequence
+import numpy as np
+
+try:
+    import orjson
+except ImportError: # optional dependency
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(value: Any):
+    # stdlib fallback for the types orjson handles natively
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _finite(value: Any):
+    # Copy of a payload with NaN/inf floats replaced by None, for the stdlib encoder
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, (np.ndarray, np.generic)):
+        return _finite(_default(value))
+    return value
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            pass # e.g. non-contiguous or object arrays; the stdlib path handles them
+    try:
+        text = json.dumps(value, default=_default, separators=(",", ":"), allow_nan=False)
+    except ValueError: # a non-finite float somewhere; only such payloads pay for the copy
+        text = json.dumps(_finite(value), default=_default, separators=(",", ":"), allow_nan=False)
+    return text.encode("utf-8")
+
+def dumps_text(value: Any) -> str:
+    """JSON as str, for WebSocket text frames."""
+    return dumps(value).decode("utf-8")
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+def round_array(values, decimals: int) -> np.ndarray:
+    """Vectorized rounding of a whole series instead of a round() per point."""
+    return np.round(np.asarray(values, dtype=np.float64), decimals)
+
+def format_timestamps(values, fmt: str = "%Y-%m-%d %H:%M:%S") -> List[str]:
+    """Timestamps rendered as strings in one vectorized pass (default: str(pd.Timestamp) style)."""
+    import pandas as pd
+    return pd.DatetimeIndex(values).strftime(fmt).tolist()
+
+def points(timestamps: Sequence, values, decimals: int) -> List[Dict[str, Any]]:
+    """[{"timestamp": ..., "value": ...}] from parallel sequences, rounding all values at once."""
+    rounded = round_array(values, decimals).tolist()
+    return [{"timestamp": t, "value": v} for t, v in zip(timestamps, rounded)]
@@ -0,0 +1,487 @@
+"""
+Time-series tick cache.
+Recent ticks live in fixed-size per-symbol NumPy ring buffers (hot tier). When a ring is
+full, its oldest block spills to append-only column files on local disk (cold tier),
+which are read back through np.memmap. Both tiers are sorted by timestamp, so range
+reads are binary searches, and bars for recent charts are aggregated straight from the
+cached ticks without going to the database.
+
+The cache is per process. Live quotes are generated in the WebSocket server's process,
+not in the one that serves history (the REST API), so there a BarIngester fills it with
+the backend's one-minute bars instead, each stored as four prints (open, low, high,
+close): in that process it is a cache of bars in tick layout, not of real ticks.
+TickCache.append() takes real quotes in a process that has them.
+"""
+import os
+import re
+import shutil
+import threading
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .history import INTERVAL_MINUTES, HistorySource
+from .models import StockRealtimeData
+
+# Column name -> dtype; timestamps are microseconds since the Unix epoch (naive times)
+TICK_COLUMNS = (
+    ("timestamp", np.int64),
+    ("price", np.float64),
+    ("bid", np.float64),
+    ("ask", np.float64),
+    ("volume", np.int64),
+)
+
+SYMBOL_PATTERN = re.compile(r"^[A-Za-z0-9.\-^=]{1,32}$")
+
+_US_PER_MINUTE = 60_000_000
+_US_PER_DAY = 86_400_000_000
+
+_UNIX_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def to_micros(value: datetime) -> int:
+    return (value - _UNIX_EPOCH) // _MICROSECOND
+
+def from_micros(value: int) -> datetime:
+    return _UNIX_EPOCH + int(value) * _MICROSECOND
+
+def _empty_columns() -> Dict[str, np.ndarray]:
+    return {name: np.empty(0, dtype=dtype) for name, dtype in TICK_COLUMNS}
+
+def _concat(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    parts = [p for p in parts if len(p["timestamp"])]
+    if not parts:
+        return _empty_columns()
+    if len(parts) == 1:
+        return parts[0]
+    return {name: np.concatenate([p[name] for p in parts]) for name, _ in TICK_COLUMNS}
+
+class ColdColumnStore:
+    """
+    Append-only column files per symbol: {directory}/{symbol}/{column}.bin, raw little-endian
+    values. Readers memory-map the files; a partially appended row (crash between column
+    writes) is ignored because the row count is the shortest column.
+
+    With `max_rows`, a symbol that grows past it is rewritten to its newest 3/4 * max_rows
+    rows, so disk use is bounded and the rewrite cost is spread over many appends. Rows at
+    or after the first appended one (left by an earlier run that ingested the same ticks)
+    are dropped by the same rewrite, which keeps the files sorted.
+    """
+
+    def __init__(self, directory: str, max_rows: Optional[int] = None):
+        self.directory = directory
+        self.max_rows = max_rows
+        self._maps: Dict[str, Tuple[int, Dict[str, np.ndarray]]] = {} # symbol -> (rows, memmaps)
+
+    def _path(self, symbol: str, column: str) -> str:
+        return os.path.join(self.directory, symbol, f"{column}.bin")
+
+    def _write(self, directory: str, columns: Dict[str, np.ndarray], mode: str):
+        for name, dtype in TICK_COLUMNS:
+            with open(os.path.join(directory, f"{name}.bin"), mode) as f:
+                f.write(np.ascontiguousarray(columns[name], dtype=np.dtype(dtype).newbyteorder("<")).tobytes())
+
+    def _rewrite(self, symbol: str, columns: Dict[str, np.ndarray]):
+        # Written aside and swapped in by directory renames, so no reader or crash sees
+        # columns of different generations
+        path = os.path.join(self.directory, symbol)
+        fresh, stale = path + ".new", path + ".old"
+        shutil.rmtree(fresh, ignore_errors=True)
+        os.makedirs(fresh)
+        self._write(fresh, columns, "wb")
+        os.rename(path, stale)
+        os.rename(fresh, path)
+        shutil.rmtree(stale, ignore_errors=True)
+        self._maps.pop(symbol, None)
+
+    def append(self, symbol: str, columns: Dict[str, np.ndarray]):
+        count = len(columns["timestamp"])
+        if not count:
+            return
+        os.makedirs(os.path.join(self.directory, symbol), exist_ok=True)
+        stored = self.columns(symbol)
+        ts = stored["timestamp"]
+        keep_to = int(np.searchsorted(ts, columns["timestamp"][0], "left"))
+        keep_from = 0
+        if self.max_rows is not None and keep_to + count > self.max_rows:
+            keep_from = min(keep_to, keep_to + count - self.max_rows * 3 // 4)
+            columns = {name: column[max(0, count - self.max_rows * 3 // 4):] for name, column in columns.items()}
+        if keep_from or keep_to < len(ts):
+            self._rewrite(symbol, {name: np.asarray(stored[name][keep_from:keep_to]) for name, _ in TICK_COLUMNS})
+        self._write(os.path.join(self.directory, symbol), columns, "ab")
+
+    def columns(self, symbol: str) -> Dict[str, np.ndarray]:
+        """Memory-mapped columns of every complete row; remapped only when the files grew."""
+        sizes = []
+        for name, dtype in TICK_COLUMNS:
+            try:
+                sizes.append(os.path.getsize(self._path(symbol, name)) // np.dtype(dtype).itemsize)
+            except OSError:
+                return _empty_columns()
+        rows = min(sizes)
+        cached = self._maps.get(symbol)
+        if cached is not None and cached[0] == rows:
+            return cached[1]
+        if rows == 0:
+            return _empty_columns()
+        maps = {
+            name: np.memmap(self._path(symbol, name), dtype=np.dtype(dtype).newbyteorder("<"), mode="r", shape=(rows,))
+            for name, dtype in TICK_COLUMNS
+        }
+        self._maps[symbol] = (rows, maps)
+        return maps
+
+    def range(self, symbol: str, start_us: int, end_us: int) -> Dict[str, np.ndarray]:
+        cols = self.columns(symbol)
+        ts = cols["timestamp"]
+        lo, hi = np.searchsorted(ts, start_us, "left"), np.searchsorted(ts, end_us, "right")
+        return {name: np.asarray(cols[name][lo:hi]) for name, _ in TICK_COLUMNS}
+
+    def first_timestamp(self, symbol: str) -> Optional[int]:
+        ts = self.columns(symbol)["timestamp"]
+        return int(ts[0]) if len(ts) else None
+
+class TickRing:
+    """
+    Fixed-capacity columnar ring of the most recent ticks of one symbol.
+    When full, the oldest `spill_block` ticks are handed to `spill` (the cold tier) and
+    dropped, so appends stay O(1) amortized and memory is bounded.
+    """
+
+    def __init__(self, capacity: int, spill=None, spill_block: Optional[int] = None):
+        self.capacity = capacity
+        self.spill = spill
+        self.spill_block = spill_block or max(1, capacity // 4)
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in TICK_COLUMNS}
+        self.start = 0 # physical index of the oldest tick
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _segments(self) -> List[Tuple[int, int]]:
+        # The logical contents as at most two physical [lo, hi) slices, oldest first
+        end = self.start + self.size
+        if end <= self.capacity:
+            return [(self.start, end)]
+        return [(self.start, self.capacity), (0, end - self.capacity)]
+
+    def _take(self, count: int) -> Dict[str, np.ndarray]:
+        idx = (self.start + np.arange(count)) % self.capacity
+        return {name: column[idx] for name, column in self.columns.items()}
+
+    def _evict(self, count: int):
+        if self.spill is not None:
+            self.spill(self._take(count))
+        self.start = (self.start + count) % self.capacity
+        self.size -= count
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if not self.size:
+            return None
+        return int(self.columns["timestamp"][(self.start + self.size - 1) % self.capacity])
+
+    @property
+    def first_timestamp(self) -> Optional[int]:
+        return int(self.columns["timestamp"][self.start]) if self.size else None
+
+    def append(self, timestamp: int, price: float, bid: float, ask: float, volume: int):
+        if self.size == self.capacity:
+            self._evict(self.spill_block)
+        last = self.last_timestamp
+        if last is not None and timestamp < last:
+            timestamp = last # keep the ring sorted if the clock steps back
+        i = (self.start + self.size) % self.capacity
+        cols = self.columns
+        cols["timestamp"][i] = timestamp
+        cols["price"][i] = price
+        cols["bid"][i] = bid
+        cols["ask"][i] = ask
+        cols["volume"][i] = volume
+        self.size += 1
+
+    def extend(self, columns: Dict[str, np.ndarray]):
+        """Bulk append of timestamp-sorted ticks newer than the ring's last one."""
+        count = len(columns["timestamp"])
+        offset = 0
+        while offset < count:
+            if self.size == self.capacity:
+                self._evict(self.spill_block)
+            i = (self.start + self.size) % self.capacity
+            n = min(count - offset, self.capacity - self.size, self.capacity - i)
+            for name, column in self.columns.items():
+                column[i:i + n] = columns[name][offset:offset + n]
+            self.size += n
+            offset += n
+
+    def range(self, start_us: int, end_us: int) -> Dict[str, np.ndarray]:
+        parts = []
+        for lo, hi in self._segments():
+            ts = self.columns["timestamp"][lo:hi]
+            a, b = np.searchsorted(ts, start_us, "left"), np.searchsorted(ts, end_us, "right")
+            if a < b:
+                parts.append({name: column[lo + a:lo + b].copy() for name, column in self.columns.items()})
+        return _concat(parts)
+
+    def latest(self, count: int) -> Dict[str, np.ndarray]:
+        count = min(count, self.size)
+        idx = (self.start + self.size - count + np.arange(count)) % self.capacity
+        return {name: column[idx] for name, column in self.columns.items()}
+
+def aggregate_bars(ticks: Dict[str, np.ndarray], interval: str) -> Dict[str, np.ndarray]:
+    """OHLCV bars from timestamp-sorted ticks, clock-aligned like the history sources."""
+    ts = ticks["timestamp"]
+    if not len(ts):
+        return {"timestamp": np.empty(0, dtype="datetime64[us]"), "open": np.empty(0), "high": np.empty(0),
+                "low": np.empty(0), "close": np.empty(0), "volume": np.empty(0, dtype=np.int64)}
+    width = _US_PER_DAY if interval == "1d" else INTERVAL_MINUTES[interval] * _US_PER_MINUTE
+    buckets = ts // width * width
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    price = ticks["price"]
+    return {
+        "timestamp": buckets[starts].astype("datetime64[us]"),
+        "open": price[starts],
+        "high": np.maximum.reduceat(price, starts),
+        "low": np.minimum.reduceat(price, starts),
+        "close": price[ends],
+        "volume": np.add.reduceat(ticks["volume"], starts),
+    }
+
+class TickCache:
+    """Per-symbol hot rings backed by an optional memory-mapped cold tier."""
+
+    def __init__(self, capacity: int = 100_000, directory: Optional[str] = None, cold_max_rows: Optional[int] = None):
+        self.capacity = capacity
+        self.cold = ColdColumnStore(directory, cold_max_rows) if directory else None
+        self.rings: Dict[str, TickRing] = {}
+        self.complete_since: Dict[str, int] = {} # symbol -> time from which the hot tier has every tick
+        self.kept_from: Dict[str, int] = {} # symbol -> time before which evicted ticks are gone
+        self._lock = threading.Lock()
+
+    def _ring(self, symbol: str) -> TickRing:
+        ring = self.rings.get(symbol)
+        if ring is None:
+            if not SYMBOL_PATTERN.match(symbol):
+                raise ValueError(f"Invalid symbol: {symbol}")
+            ring = self.rings[symbol] = TickRing(self.capacity, spill=lambda columns: self._spilled(symbol, columns))
+        return ring
+
+    def _spilled(self, symbol: str, columns: Dict[str, np.ndarray]):
+        # Called with the lock held when a ring evicts its oldest ticks
+        if self.cold:
+            self.cold.append(symbol, columns)
+            # A bounded cold tier drops its oldest rows as well
+            kept_from = self.cold.first_timestamp(symbol)
+        else:
+            kept_from = int(columns["timestamp"][-1]) + 1
+        if kept_from is not None:
+            self.kept_from[symbol] = max(kept_from, self.kept_from.get(symbol, kept_from))
+
+    def append(self, quote: StockRealtimeData):
+        timestamp = to_micros(quote.timestamp)
+        with self._lock:
+            self._ring(quote.symbol).append(timestamp, quote.price, quote.bid, quote.ask, quote.volume)
+            self.complete_since.setdefault(quote.symbol, timestamp)
+
+    def extend(self, symbol: str, columns: Dict[str, np.ndarray]):
+        with self._lock:
+            self._ring(symbol).extend(columns)
+            if len(columns["timestamp"]):
+                self.complete_since.setdefault(symbol, int(columns["timestamp"][0]))
+
+    def mark_complete(self, symbol: str, since: datetime):
+        """
+        Declare that no ticks of `symbol` exist between `since` and the first cached one
+        (e.g. the feed started before the session opened), so ranges from `since` are served here.
+        """
+        with self._lock:
+            current = self.complete_since.get(symbol)
+            since_us = to_micros(since)
+            self.complete_since[symbol] = since_us if current is None else min(current, since_us)
+
+    def first_timestamp(self, symbol: str) -> Optional[datetime]:
+        """
+        Time from which the cache holds every tick of `symbol`: the first tick appended by
+        this process unless mark_complete() moved it back, and later than that once evicted
+        ticks are gone. Cold files left by an earlier run are still read, but only count
+        once an ingester vouches for them this way.
+        """
+        with self._lock:
+            first = self.complete_since.get(symbol)
+            if first is not None:
+                first = max(first, self.kept_from.get(symbol, first))
+        return None if first is None else np.datetime64(first, "us").astype(datetime)
+
+    def last_timestamp(self, symbol: str) -> Optional[datetime]:
+        with self._lock:
+            ring = self.rings.get(symbol)
+            last = ring.last_timestamp if ring is not None else None
+        return None if last is None else np.datetime64(last, "us").astype(datetime)
+
+    def covers(self, symbol: str, start: datetime) -> bool:
+        first = self.first_timestamp(symbol)
+        return first is not None and first <= start
+
+    def ticks(self, symbol: str, start: datetime, end: datetime) -> Dict[str, np.ndarray]:
+        """All cached ticks with start <= timestamp <= end, oldest first."""
+        start_us, end_us = to_micros(start), to_micros(end)
+        with self._lock:
+            ring = self.rings.get(symbol)
+            hot_first = ring.first_timestamp if ring is not None else None
+            parts = []
+            # Cold rows precede the ring, so it is only read when the range starts before it; a
+            # cold row at the ring's first timestamp is one an earlier run left for the same tick
+            if self.cold and (hot_first is None or start_us < hot_first):
+                cold_end = end_us if hot_first is None else min(end_us, hot_first - 1)
+                parts.append(self.cold.range(symbol, start_us, cold_end))
+            if ring is not None:
+                parts.append(ring.range(start_us, end_us))
+        return _concat(parts)
+
+    def latest(self, symbol: str, count: int) -> Dict[str, np.ndarray]:
+        with self._lock:
+            ring = self.rings.get(symbol)
+            return ring.latest(count) if ring is not None else _empty_columns()
+
+    def bars(self, symbol: str, interval: str, start: datetime, end: datetime) -> Dict[str, np.ndarray]:
+        return aggregate_bars(self.ticks(symbol, start, end), interval)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "symbols": len(self.rings),
+                "capacity": self.capacity,
+                "hot_ticks": sum(len(ring) for ring in self.rings.values()),
+                "cold_dir": self.cold.directory if self.cold else None
+            }
+
+class CachedHistorySource(HistorySource):
+    """
+    Serves bars for ranges the tick cache fully covers (e.g. today's chart) from memory and
+    the cold tier; any other range goes to the wrapped source (typically the database).
+    """
+
+    def __init__(self, base: HistorySource, cache: TickCache, chunk_size: int = 10000):
+        self.base = base
+        self.cache = cache
+        self.chunk_size = chunk_size
+
+    def default_start(self, interval, end, bars):
+        return self.base.default_start(interval, end, bars)
+
+    def data_as_of(self, symbol, interval, start, end):
+        # Ranges served from the cache change with every tick
+        if self.cache.covers(symbol, start):
+            last = self.cache.last_timestamp(symbol)
+            if last is not None:
+                return min(last, end)
+        return self.base.data_as_of(symbol, interval, start, end)
+
+    def iter_chunks(self, symbol, interval, start, end, after=None):
+        if not self.cache.covers(symbol, start):
+            yield from self.base.iter_chunks(symbol, interval, start, end, after)
+            return
+        lower = start
+        if after is not None and after >= start:
+            # Cursors are bucket labels, so the next bucket starts one bar width later
+            width = timedelta(days=1) if interval == "1d" else timedelta(minutes=INTERVAL_MINUTES[interval])
+            lower = after + width
+        if lower > end:
+            return
+        bars = self.cache.bars(symbol, interval, lower, end)
+        for offset in range(0, len(bars["timestamp"]), self.chunk_size):
+            yield {name: column[offset:offset + self.chunk_size] for name, column in bars.items()}
+
+def bars_to_ticks(chunk: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Four synthetic prints per one-minute bar (open, low, high, close 15 seconds apart, the
+    volume on the close), so aggregate_bars() gives back exactly these bars at any interval.
+    """
+    count = len(chunk["timestamp"])
+    offsets = np.array([0, 15, 30, 45], dtype=np.int64) * 1_000_000
+    price = np.stack([chunk["open"], chunk["low"], chunk["high"], chunk["close"]], axis=1).ravel().astype(np.float64)
+    volume = np.zeros((count, 4), dtype=np.int64)
+    volume[:, 3] = chunk["volume"]
+    return {
+        "timestamp": (chunk["timestamp"].astype("datetime64[us]").astype(np.int64)[:, None] + offsets).ravel(),
+        "price": price,
+        "bid": price,
+        "ask": price,
+        "volume": volume.ravel(),
+    }
+
+class BarIngester:
+    """
+    Fills `cache` with bars in the process that serves history from it: backfills the current
+    session of `symbols` from `source` (the backend behind CachedHistorySource), declares the
+    cache complete from the start of that day, then polls for the minutes completed since
+    every `poll_seconds`. The backend is read by this thread alone, a minute at a time, while
+    history requests for recent sessions are served from memory.
+    """
+
+    def __init__(self, cache: TickCache, source: HistorySource, symbols, poll_seconds: float = 5.0):
+        self.cache = cache
+        self.source = source
+        self.symbols = list(symbols)
+        self.poll_seconds = poll_seconds
+        self._since: Dict[str, datetime] = {} # symbol -> start of the current day
+        self._last: Dict[str, datetime] = {} # symbol -> label of the last ingested minute
+        self._complete = set()
+        self._stop = threading.Event()
+
+    def ingest(self, symbol: str) -> int:
+        """Append the minutes of `symbol` completed since the last call; returns the number of bars."""
+        now = datetime.now()
+        # Rolls over at midnight; a bar-less symbol is then only looked up from the new day on
+        since = self._since[symbol] = datetime.combine(now.date(), time.min)
+        last = self._last.get(symbol)
+        count = 0
+        for chunk in self.source.iter_chunks(symbol, "1m", since if last is None else last, now, after=last):
+            self.cache.extend(symbol, bars_to_ticks(chunk))
+            self._last[symbol] = chunk["timestamp"][-1].astype("datetime64[us]").astype(datetime)
+            count += len(chunk["timestamp"])
+        if symbol not in self._complete:
+            # The day has no ticks before its session opens, so once its minutes so far are
+            # in, the cache holds all of it
+            self.cache.mark_complete(symbol, since)
+            self._complete.add(symbol)
+        return count
+
+    def poll(self) -> int:
+        return sum(self.ingest(symbol) for symbol in self.symbols)
+
+    def run_forever(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception as e: # e.g. the database being restarted; the next poll catches up
+                print(f"Bar ingestion failed: {e!r}")
+
+    def start(self) -> threading.Thread:
+        """Backfill now, then keep polling in a daemon thread."""
+        self.poll()
+        thread = threading.Thread(target=self.run_forever, daemon=True, name="bar-ingester")
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+_cache: Optional[TickCache] = None
+
+def get_tick_cache() -> TickCache:
+    """
+    Process-wide cache configured by TICK_CACHE_CAPACITY, TICK_CACHE_DIR ("" disables the
+    cold tier) and TICK_CACHE_COLD_MAX_ROWS (cold ticks kept per symbol, "" for no limit).
+    """
+    global _cache
+    if _cache is None:
+        cold_max_rows = os.getenv("TICK_CACHE_COLD_MAX_ROWS", "2000000")
+        _cache = TickCache(
+            capacity=int(os.getenv("TICK_CACHE_CAPACITY", "100000")),
+            directory=os.getenv("TICK_CACHE_DIR", "tick_cache") or None,
+            cold_max_rows=int(cold_max_rows) if cold_max_rows else None
+        )
+    return _cache
@@ -1,74 +1,612 @@
 """
 WebSocket server for real-time stock data streaming.
 Uses asyncio and websockets library.
+
+Each subscribed symbol has a single feed task that polls the provider and fans every
+quote out to its subscribers, and evaluates the server-side alert rules registered on
+that symbol. Client messages:
+  {"action": "subscribe", "symbol": "AAPL"}
+  {"action": "subscribe", "symbol": "AAPL", "snapshot": true, "bars": 60, "indicators": ["rsi_14"]}
+  {"action": "resync", "symbol": "AAPL", "bars": 60}
+  {"action": "unsubscribe", "symbol": "AAPL"}
+  {"action": "add_alert", "symbol": "AAPL", "type": "price", "direction": "above", "value": 150}
+  {"action": "add_alert", "symbol": "AAPL", "type": "percent", "value": 2}
+  {"action": "add_alert", "symbol": "AAPL", "type": "indicator", "indicator": "rsi_14", "direction": "above", "value": 70}
+  {"action": "remove_alert", "alert_id": 3}
+  {"action": "list_alerts"}
+Triggered alerts are pushed as {"type": "alert", ...} messages to the client that owns them.
+Quote frames carry "sent_at", the server wall-clock time (epoch seconds) they were sent at,
+and "seq", a per-symbol sequence number. A subscribe with "snapshot" (and every resync)
+is answered with the last quote, the last N one-minute bars and current indicator values
+as of sequence number snapshot.seq, taken atomically with joining the feed; deltas with
+seq <= snapshot.seq are stale, and a gap in seq means frames were dropped and the client
+should resync.
+Sampled (traced) quote frames also carry "trace_id"; their per-stage spans are served on
+/traces of the metrics port. /ready on the same port answers 503 until the warm-up that
+follows startup (history caches, first quotes) has finished.
 """
 import asyncio
-import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
 import websockets
-from datetime import datetime
-from typing import Set
+from datetime import datetime, timedelta
+from collections import deque
+from typing import Dict, Optional, Set
 from .mock_provider import get_provider
+from .alerts import AlertBook, INDICATOR_PATTERN
+from .serialization import dumps_text, loads
+from .quote_bus import QuoteBus, record_to_quote
+from .history import get_history_source
+from indicators.streaming import create_indicator
+from telemetry.metrics import Counter, Gauge, Histogram, start_http_server
+from telemetry.tracing import Tracer
+from telemetry.startup import Startup
 
 # Connected clients
 connected_clients: Set = set()
 
-async def handle_client(websocket, path):
+# websocket -> ClientSender; every outbound frame goes through the client's queue
+senders: Dict = {}
+
+# Quote frames a client may have queued before the oldest ones are dropped
+SEND_QUEUE_LIMIT = int(os.getenv("WS_SEND_QUEUE_LIMIT", "256"))
+
+# Multi-worker mode (WS_WORKERS > 1): WS_WORKERS processes accept on the same port with
+# SO_REUSEPORT, and a single producer publishes quotes for WS_SYMBOLS into a shared-memory
+# QuoteBus that every worker fans out to its own clients
+WORKERS = int(os.getenv("WS_WORKERS", "1"))
+BUS_SYMBOLS = [s.strip().upper() for s in os.getenv("WS_SYMBOLS", "AAPL,GOOGL,MSFT,AMZN,TSLA,NVDA,META").split(",") if s.strip()]
+BUS_CAPACITY = int(os.getenv("WS_BUS_CAPACITY", "65536"))
+
+# True in worker processes: feeds are driven by the quote bus instead of polling the provider
+_bus_fed = False
+# Latest bus record per symbol in worker processes, also for symbols whose feed is idle
+bus_quotes: Dict[str, object] = {}
+
+# Alert rules of every connected client, indexed by symbol and threshold
+alert_book = AlertBook()
+
+# Bars of history used to warm up indicators for indicator alerts
+INDICATOR_HISTORY_DAYS = 250
+
+# One-minute bars kept per feed for subscribe snapshots, and the default snapshot length
+SNAPSHOT_BARS_MAX = 390
+SNAPSHOT_BARS_DEFAULT = 60
+
+# Prometheus metrics are served on their own port; set WS_METRICS_PORT="" to disable
+METRICS_PORT = os.getenv("WS_METRICS_PORT", "9101")
+
+connected_clients_gauge = Gauge("stock_ws_connected_clients", "Connected WebSocket clients")
+connected_clients_gauge.set_function(lambda: len(connected_clients))
+frames_sent = Counter("stock_ws_frames_sent", "WebSocket frames sent")
+bytes_sent = Counter("stock_ws_bytes_sent", "WebSocket payload bytes sent")
+alerts_fired = Counter("stock_ws_alerts_fired", "Alert messages pushed to clients")
+snapshots_served = Counter("stock_ws_snapshots", "Subscribe/resync snapshots served")
+publish_seconds = Histogram("stock_ws_publish_seconds", "Time to fan one quote out to subscribers and alert owners")
+frames_dropped = Counter("stock_ws_frames_dropped", "Quote frames dropped from full client send queues")
+queued_frames = Gauge("stock_ws_send_queue_frames", "Frames waiting in client send queues")
+queued_frames.set_function(lambda: sum(len(sender.queue) for sender in list(senders.values())))
+
+# A sampled fraction of ticks (WS_TRACE_SAMPLE_RATE) is traced through every pipeline stage;
+# the last WS_TRACE_SPANS traces are served as JSON on /traces of the metrics port
+# ("bus" is the transit from the producer to a worker, in multi-worker mode only)
+TICK_STAGES = ["generation", "bus", "bar_aggregation", "indicator_update", "serialization", "enqueue", "socket_write"]
+tracer = Tracer("stock_ws_tick", TICK_STAGES, sample_rate=float(os.getenv("WS_TRACE_SAMPLE_RATE", "0.01")),
+                max_spans=int(os.getenv("WS_TRACE_SPANS", "1000")))
+
+class ClientSender:
+    """
+    Outbound queue of one client, drained by its own writer task, so a slow socket only
+    delays its own frames and never the feed fanning a quote out. When more than `limit`
+    quote frames are waiting the oldest is dropped; control and alert frames are kept.
+    """
+
+    def __init__(self, websocket, limit: int = SEND_QUEUE_LIMIT):
+        self.websocket = websocket
+        self.limit = limit
+        self.queue = deque() # (message, droppable, trace)
+        self.droppable = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, message: str, droppable: bool = False, trace=None):
+        if self.closed:
+            # The writer is gone; the frame is never sent, but its trace still completes
+            if trace is not None:
+                trace.delivered()
+            return
+        if droppable:
+            if self.droppable >= self.limit:
+                self._drop_oldest()
+            self.droppable += 1
+        self.queue.append((message, droppable, trace))
+        self._ready.set()
+
+    def _drop_oldest(self):
+        for i, (_, droppable, trace) in enumerate(self.queue):
+            if droppable:
+                del self.queue[i]
+                self.droppable -= 1
+                frames_dropped.inc()
+                if trace is not None:
+                    trace.delivered() # counted as delivered so the trace still completes
+                return
+
+    async def _run(self):
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                while self.queue:
+                    message, droppable, trace = self.queue.popleft()
+                    if droppable:
+                        self.droppable -= 1
+                    try:
+                        await self.websocket.send(message)
+                    except websockets.exceptions.ConnectionClosed:
+                        return
+                    finally:
+                        # Written, or given up on with the connection (a slow client's trace
+                        # ends when it disconnects rather than never)
+                        if trace is not None:
+                            trace.delivered()
+                    # JSON frames are ASCII unless a string field is not, so the text length is the byte count
+                    frames_sent.inc()
+                    bytes_sent.inc(len(message))
+        finally:
+            # Frames still queued when the writer exits or is cancelled are never sent
+            self.closed = True
+            while self.queue:
+                _, _, trace = self.queue.popleft()
+                if trace is not None:
+                    trace.delivered()
+            self.droppable = 0
+
+    def close(self):
+        self._task.cancel()
+
+def send_json(websocket, data: dict):
+    """Queue a control or alert message for the client."""
+    sender = senders.get(websocket)
+    if sender is not None:
+        sender.put(dumps_text(data))
+
+def load_history_bars(symbol: str) -> list:
+    """The last SNAPSHOT_BARS_MAX one-minute bars of the history source, in the feed's bar layout."""
+    source = get_history_source()
+    end = datetime.now()
+    # Two sessions' worth, so the window still reaches back a full session before the open
+    start = source.default_start("1m", end, 2 * SNAPSHOT_BARS_MAX)
+    bars = list(source.iter_bars(symbol, "1m", start, end))[-SNAPSHOT_BARS_MAX:]
+    return [[bar.timestamp, bar.open, bar.high, bar.low, bar.close, bar.volume] for bar in bars]
+
+def load_daily_closes(symbol: str, sessions: int) -> list:
+    """Closes of the last `sessions` completed daily bars of the history source, oldest first."""
+    source = get_history_source()
+    # Just before midnight, so today's forming bar is left out
+    end = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(microseconds=1)
+    start = source.default_start("1d", end, sessions)
+    return [bar.close for bar in source.iter_bars(symbol, "1d", start, end)]
+
+class SymbolFeed:
+    """Single quote producer for one symbol, shared by all subscribers and alert rules."""
+
+    def __init__(self, symbol: str, interval: float = 1.0):
+        self.symbol = symbol
+        self.interval = interval
+        self.subscribers: Set = set()
+        self.last_quote = None
+        self.indicators: Dict = {} # series key (e.g. "rsi_14") -> streaming indicator
+        self._closes = None # completed daily closes, oldest first
+        self._bar_date = None
+        self._task: Optional[asyncio.Task] = None
+        self.seq = 0 # sequence number of the last published quote
+        self.bars = deque(maxlen=SNAPSHOT_BARS_MAX) # [minute, open, high, low, close, volume], oldest first
+        self._history: Optional[asyncio.Future] = None # one history load per feed, shared by all snapshots
+        self._history_merged = False
+
+    def idle(self) -> bool:
+        return not self.subscribers and not alert_book.has_rules(self.symbol)
+
+    def ensure_running(self):
+        if _bus_fed:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    def current_quote(self):
+        """The latest quote of the symbol, even before the feed published one (None if unknown)."""
+        if _bus_fed:
+            # The producer owns the price stream; an idle feed's last_quote may be stale
+            record = bus_quotes.get(self.symbol)
+            return record_to_quote(record) if record is not None else self.last_quote
+        if self.last_quote is None:
+            self.last_quote = get_provider().get_realtime_quote(self.symbol)
+        return self.last_quote
+
+    def current_price(self) -> float:
+        quote = self.current_quote()
+        if quote is None:
+            raise ValueError(f"No quote for {self.symbol} yet")
+        return quote.price
+
+    def current_value(self, spec: dict) -> Optional[float]:
+        """Latest value of the series an alert spec watches (price or indicator), if known."""
+        quote = self.current_quote()
+        price = quote.price if quote is not None else None
+        if spec.get("type") != "indicator":
+            return price
+        indicator = self.indicators.get(str(spec.get("indicator", "")).lower())
+        if indicator is None:
+            return None
+        return indicator.peek(price) if price is not None else indicator.value
+
+    def ensure_indicator(self, series: str):
+        """Warm up the streaming indicator behind an indicator alert on first use."""
+        if series in self.indicators:
+            return
+        name, window = INDICATOR_PATTERN.match(series).groups()
+        if int(window) >= INDICATOR_HISTORY_DAYS:
+            raise ValueError(f"Indicator window must be below {INDICATOR_HISTORY_DAYS}")
+        if self._closes is None:
+            # The provider's quotes continue the history source, so its daily closes lead into them
+            self._closes = load_daily_closes(self.symbol, INDICATOR_HISTORY_DAYS)
+            self._bar_date = datetime.now().date()
+        self.indicators[series] = create_indicator(name, int(window), self._closes)
+
+    def _roll_bar(self, quote):
+        # The live price is today's forming bar; on a new day the previous close is committed
+        if self._bar_date is None or quote.timestamp.date() == self._bar_date:
+            return
+        if self.last_quote is not None:
+            close = self.last_quote.price
+            self._closes = self._closes[-(INDICATOR_HISTORY_DAYS - 1):] + [close]
+            for indicator in self.indicators.values():
+                indicator.update(close)
+        self._bar_date = quote.timestamp.date()
+
+    def _update_bars(self, quote):
+        minute = quote.timestamp.replace(second=0, microsecond=0)
+        if self.bars and self.bars[-1][0] == minute:
+            bar = self.bars[-1]
+            bar[2] = max(bar[2], quote.price)
+            bar[3] = min(bar[3], quote.price)
+            bar[4] = quote.price
+            bar[5] += quote.volume
+        else:
+            self.bars.append([minute, quote.price, quote.price, quote.price, quote.price, quote.volume])
+
+    async def _warm_bars(self):
+        # Reconnect storms cost one history read per symbol, not one per client
+        if self._history is None:
+            self._history = asyncio.get_running_loop().run_in_executor(None, load_history_bars, self.symbol)
+        try:
+            history = await self._history
+        except Exception:
+            self._history = None # retry on the next snapshot
+            raise
+        if not self._history_merged:
+            self._history_merged = True
+            first_live = self.bars[0][0] if self.bars else None
+            older = [bar for bar in history if first_live is None or bar[0] < first_live]
+            room = SNAPSHOT_BARS_MAX - len(self.bars)
+            if room > 0:
+                self.bars.extendleft(reversed(older[-room:]))
+
+    async def snapshot(self, bars: int = SNAPSHOT_BARS_DEFAULT, indicators=()) -> dict:
+        """
+        Last quote, last `bars` one-minute bars and current indicator values as of self.seq.
+        Everything after the history load runs without yielding to the event loop, so a
+        caller that joins the feed right after gets exactly the quotes after self.seq.
+        """
+        if not 0 <= bars <= SNAPSHOT_BARS_MAX:
+            raise ValueError(f"bars must be between 0 and {SNAPSHOT_BARS_MAX}")
+        for series in indicators:
+            if not INDICATOR_PATTERN.match(series):
+                raise ValueError("Indicator must look like rsi_14, sma_20 or ema_12")
+        if bars:
+            await self._warm_bars()
+        for series in indicators:
+            self.ensure_indicator(series)
+        snapshots_served.inc()
+        quote = self.current_quote()
+        price = quote.price if quote is not None else None
+        return {
+            "seq": self.seq,
+            "quote": quote.to_dict() if quote is not None else None,
+            "bars": [
+                {"timestamp": minute.isoformat(), "open": o, "high": h, "low": l, "close": c, "volume": v}
+                for minute, o, h, l, c, v in list(self.bars)[len(self.bars) - bars:]
+            ],
+            "indicators": {
+                series: (indicator.peek(price) if price is not None else indicator.value)
+                for series, indicator in self.indicators.items()
+            }
+        }
+
+    def evaluate_alerts(self, quote) -> list:
+        if not alert_book.has_rules(self.symbol):
+            return []
+        values = {"price": quote.price}
+        for series in alert_book.series_for(self.symbol):
+            if series in self.indicators:
+                values[series] = self.indicators[series].peek(quote.price)
+        return [(rule, values[rule.series]) for rule in alert_book.evaluate(self.symbol, values)]
+
+    async def publish(self, quote, trace=None):
+        start = time.perf_counter()
+        self.seq += 1
+        self._update_bars(quote)
+        self._roll_bar(quote)
+        if trace is not None:
+            trace.mark("bar_aggregation")
+        fired = self.evaluate_alerts(quote)
+        if trace is not None:
+            trace.mark("indicator_update")
+        if self.subscribers:
+            payload = quote.to_dict()
+            payload["sent_at"] = time.time() # wall clock, for end-to-end latency measurements
+            payload["seq"] = self.seq
+            if trace is not None:
+                payload["trace_id"] = trace.trace_id
+            message = dumps_text(payload)
+            if trace is not None:
+                trace.mark("serialization")
+            targets = [senders[client] for client in self.subscribers if client in senders]
+            for sender in targets:
+                sender.put(message, droppable=True, trace=trace)
+            if trace is not None:
+                # Writer tasks only run once this coroutine yields, so no delivery is missed
+                trace.mark("enqueue")
+                trace.expect(len(targets), "socket_write")
+        elif trace is not None:
+            trace.expect(0, "socket_write")
+        for rule, value in fired:
+            alerts_fired.inc()
+            send_json(rule.owner, {
+                "type": "alert",
+                "alert_id": rule.alert_id,
+                "symbol": self.symbol,
+                "series": rule.series,
+                "value": round(value, 4),
+                "price": quote.price,
+                "timestamp": quote.timestamp.isoformat(),
+                "rule": rule.to_dict()
+            })
+        self.last_quote = quote
+        publish_seconds.observe(time.perf_counter() - start)
+
+    async def run(self):
+        provider = get_provider()
+        while not self.idle():
+            trace = tracer.start("tick", symbol=self.symbol)
+            quote = provider.get_realtime_quote(self.symbol)
+            if trace is not None:
+                trace.mark("generation")
+            await self.publish(quote, trace)
+            await asyncio.sleep(self.interval)
+        self.indicators.clear()
+        self._closes = None
+
+# symbol -> SymbolFeed
+feeds: Dict[str, SymbolFeed] = {}
+
+def get_feed(symbol: str) -> SymbolFeed:
+    if symbol not in feeds:
+        feeds[symbol] = SymbolFeed(symbol)
+    return feeds[symbol]
+
+def add_alert(websocket, data: dict) -> dict:
+    symbol = data.get("symbol")
+    if not symbol:
+        raise ValueError("Alert requires a symbol")
+    feed = get_feed(symbol)
+    if data.get("type") == "indicator":
+        series = str(data.get("indicator", "")).lower()
+        if not INDICATOR_PATTERN.match(series):
+            raise ValueError("Indicator must look like rsi_14, sma_20 or ema_12")
+        feed.ensure_indicator(series)
+    current_price = feed.current_price() if data.get("type") == "percent" else None
+    rule = alert_book.add(websocket, data, current_price=current_price, current_value=feed.current_value(data))
+    feed.ensure_running()
+    return rule.to_dict()
+
+async def handle_client(websocket, path=None):
     """Handle incoming WebSocket client connections."""
     print(f"Client connected: {websocket.remote_address}")
     connected_clients.add(websocket)
+    senders[websocket] = ClientSender(websocket)
     try:
         async for message in websocket:
             # Parse message
-            data = json.loads(message)
+            data = loads(message)
             action = data.get("action")
-            
-            if action == "subscribe":
+
+            if action in ("subscribe", "resync"):
                 symbol = data.get("symbol")
                 if symbol:
-                    await websocket.send(json.dumps({
-                        "status": "subscribed",
-                        "symbol": symbol
-                    }))
-                    # Start streaming for this symbol (simplified)
-                    asyncio.create_task(stream_symbol(websocket, symbol))
-                    
+                    feed = get_feed(symbol)
+                    response = {"status": "subscribed" if action == "subscribe" else "resynced", "symbol": symbol}
+                    if action == "resync" or data.get("snapshot"):
+                        try:
+                            response["snapshot"] = await feed.snapshot(
+                                bars=int(data.get("bars", SNAPSHOT_BARS_DEFAULT)),
+                                indicators=[str(series).lower() for series in data.get("indicators", ())]
+                            )
+                        except Exception as e: # bad parameters, or the history source failing
+                            send_json(websocket, {"status": "error", "action": action, "message": str(e)})
+                            continue
+                    # No await from the snapshot to here: the client joins at exactly snapshot.seq
+                    send_json(websocket, response)
+                    # Join the shared feed for this symbol
+                    feed.subscribers.add(websocket)
+                    feed.ensure_running()
+
             elif action == "unsubscribe":
-                # Logic to stop streaming would go here
-                await websocket.send(json.dumps({"status": "unsubscribed"}))
+                symbol = data.get("symbol")
+                # Without a symbol, leave every feed
+                for feed in ([feeds[symbol]] if symbol in feeds else []) if symbol else feeds.values():
+                    feed.subscribers.discard(websocket)
+                send_json(websocket, {"status": "unsubscribed", "symbol": symbol})
+
+            elif action == "add_alert":
+                try:
+                    rule = add_alert(websocket, data)
+                    send_json(websocket, {"status": "alert_added", "alert": rule})
+                except ValueError as e:
+                    send_json(websocket, {"status": "error", "action": action, "message": str(e)})
+
+            elif action == "remove_alert":
+                removed = alert_book.remove(data.get("alert_id"), owner=websocket)
+                send_json(websocket, {
+                    "status": "alert_removed" if removed else "error",
+                    "alert_id": data.get("alert_id")
+                })
+
+            elif action == "list_alerts":
+                send_json(websocket, {
+                    "status": "alerts",
+                    "alerts": [rule.to_dict() for rule in alert_book.list(websocket)]
+                })
 
     except websockets.exceptions.ConnectionClosed:
         print(f"Client disconnected: {websocket.remote_address}")
     finally:
         connected_clients.remove(websocket)
-
-async def stream_symbol(websocket, symbol: str):
-    """Stream real-time data for a symbol to a specific client."""
-    provider = get_provider()
-    try:
-        while True:
-            quote = provider.get_realtime_quote(symbol)
-            await websocket.send(json.dumps(quote.to_dict()))
-            await asyncio.sleep(1) # 1 second interval
-    except websockets.exceptions.ConnectionClosed:
-        pass
+        senders.pop(websocket).close()
+        for feed in feeds.values():
+            feed.subscribers.discard(websocket)
+        alert_book.remove_owner(websocket)
 
 async def broadcast_to_all(data: dict):
     """Broadcast data to all connected clients."""
     if connected_clients:
-        message = json.dumps(data)
-        await asyncio.gather(
-            *[client.send(message) for client in connected_clients],
-            return_exceptions=True
-        )
+        message = dumps_text(data)
+        for client in connected_clients:
+            senders[client].put(message, droppable=True)
+
+def _traces_route(query: dict):
+    limit = int(query["limit"]) if "limit" in query else None
+    return "application/json", dumps_text({"spans": tracer.spans(limit)}).encode("utf-8")
+
+startup = Startup("stock_ws")
+
+def _ready_route(query: dict):
+    # 503 until warm-up has finished; the body is the startup profile either way
+    return 200 if startup.ready else 503, "application/json", dumps_text(startup.report()).encode("utf-8")
+
+METRICS_ROUTES = {"/traces": _traces_route, "/ready": _ready_route}
+
+def _warm_up_steps(symbols):
+    loop = asyncio.get_running_loop()
+    return [
+        # Fills the history source's caches for the first snapshots; discarded, so the
+        # feeds still load bars up to the moment they are first subscribed
+        ("history", lambda: asyncio.gather(*(loop.run_in_executor(None, load_history_bars, symbol)
+                                             for symbol in symbols))),
+        ("quotes", lambda: [dumps_text(get_provider().get_realtime_quote(symbol).to_dict()) for symbol in symbols])
+    ]
 
 async def start_server(host: str = "localhost", port: int = 8765):
     """Start the WebSocket server."""
+    if METRICS_PORT:
+        await start_http_server(host, int(METRICS_PORT), routes=METRICS_ROUTES)
+        print(f"Metrics served on http://{host}:{METRICS_PORT}/metrics")
     async with websockets.serve(handle_client, host, port):
         print(f"WebSocket server started on ws://{host}:{port}")
+        await startup.warm_up_async(_warm_up_steps(BUS_SYMBOLS))
         await asyncio.Future() # Run forever
 
+bus_lost = Counter("stock_ws_bus_lost", "Quotes a worker lost because the producer lapped it on the quote bus")
+bus_lag = Gauge("stock_ws_bus_lag", "Quotes published but not yet read by this worker")
+
+async def pump_bus(bus: QuoteBus, poll_interval: float = 0.002):
+    """Worker side of the quote bus: hand every new quote to the local feed of its symbol."""
+    pos = bus.write_pos # start at the live edge
+    bus_lag.set_function(lambda: bus.write_pos - pos)
+    while True:
+        records, pos, lost = bus.read(pos)
+        if lost:
+            bus_lost.inc(lost)
+        for record in records:
+            symbol = record["symbol"].decode()
+            bus_quotes[symbol] = record
+            feed = feeds.get(symbol)
+            if feed is None or feed.idle():
+                continue
+            # The trace starts when the producer began generating the quote; generation ends
+            # at its publish time, then the bus transit lasts until now
+            trace = tracer.start("tick", start_ns=int(record["generated_ns"]), symbol=feed.symbol)
+            if trace is not None:
+                trace.mark("generation", at_ns=int(record["published_ns"]))
+                trace.mark("bus")
+            await feed.publish(record_to_quote(record), trace)
+        await asyncio.sleep(poll_interval)
+
+async def _serve_worker(bus_name: str, host: str, port: int, index: int):
+    bus = QuoteBus.attach(bus_name)
+    if METRICS_PORT:
+        # One metrics port per worker: METRICS_PORT + index
+        await start_http_server(host, int(METRICS_PORT) + index, routes=METRICS_ROUTES)
+    async with websockets.serve(handle_client, host, port, reuse_port=True):
+        print(f"WebSocket worker {index} (pid {os.getpid()}) serving ws://{host}:{port}")
+        pump = asyncio.create_task(pump_bus(bus))
+        await startup.warm_up_async(_warm_up_steps(BUS_SYMBOLS))
+        await pump
+
+def _worker_main(bus_name: str, host: str, port: int, index: int):
+    global _bus_fed
+    _bus_fed = True
+    try:
+        asyncio.run(_serve_worker(bus_name, host, port, index))
+    except KeyboardInterrupt:
+        pass
+
+def run_workers(host: str = "localhost", port: int = 8765, workers: int = WORKERS,
+                symbols=BUS_SYMBOLS, interval: float = 1.0):
+    """
+    Multi-core serving: start `workers` processes sharing the port through SO_REUSEPORT (the
+    kernel spreads new connections over them; Linux only) and publish quotes for `symbols`
+    into the quote bus from this process every `interval` seconds. Quotes for symbols
+    outside `symbols` are not produced in this mode.
+    """
+    bus = QuoteBus.create(BUS_CAPACITY)
+    processes = [
+        multiprocessing.Process(target=_worker_main, args=(bus.name, host, port, i), name=f"ws-worker-{i}", daemon=True)
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    # SIGTERM (e.g. docker stop) must still unlink the shared memory block
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    provider = get_provider()
+    try:
+        while all(process.is_alive() for process in processes):
+            started = time.monotonic()
+            for symbol in symbols:
+                generated_ns = time.perf_counter_ns()
+                quote = provider.get_realtime_quote(symbol)
+                bus.publish(quote, time.perf_counter_ns(), generated_ns)
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        print("A worker exited; shutting down.")
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        bus.close()
+
+startup.mark_imported()
+
 if __name__ == "__main__":
     try:
-        asyncio.run(start_server())
+        if WORKERS > 1:
+            run_workers()
+        else:
+            asyncio.run(start_server())
     except KeyboardInterrupt:
         print("Server stopped.")
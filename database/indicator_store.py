@@ -0,0 +1,232 @@
+"""
+Storage layouts for materialized indicator values.
+INDICATOR_STORAGE selects one:
+
+narrow (default)  The indicators table of init_db: one row per (time, symbol,
+                  indicator_name) carrying the name and JSONB params.
+wide              A hypertable keyed on (symbol_id, time) with one DOUBLE PRECISION column
+                  per series. Symbols are interned to integer ids in `symbols`, and each
+                  series' params live once in the `indicator_series` registry instead of on
+                  every row. Chunks older than INDICATOR_COMPRESS_AFTER are compressed with
+                  TimescaleDB native compression, segmented by symbol_id and ordered by
+                  time, so a symbol's range is a few compressed column segments. Reading a
+                  whole indicator set is one index range scan that returns every series.
+
+Both implement prepare() (schema and series registration, run by the materializer),
+write() (bulk upsert of one page of bars) and read().
+"""
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+from database.db import get_connection
+
+STORAGE = os.getenv("INDICATOR_STORAGE", "narrow").lower()
+COMPRESS_AFTER = os.getenv("INDICATOR_COMPRESS_AFTER", "7 days")
+
+# Series names become column names in the wide layout
+_SERIES_NAME = re.compile(r"^[a-z][a-z0-9_]{0,62}$")
+
+Series = Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+def _naive_utc(times) -> np.ndarray:
+    # TIMESTAMPTZ comes back tz-aware; series are served as naive UTC like the bars
+    return np.array([t if t.tzinfo is None else t.astimezone(timezone.utc).replace(tzinfo=None)
+                     for t in times], dtype="datetime64[us]")
+
+def _empty(names: Sequence[str]) -> Series:
+    return {name: (np.empty(0, dtype="datetime64[us]"), np.empty(0)) for name in names}
+
+def _time_range(query: str, params: list, start: Optional[datetime], end: Optional[datetime]) -> str:
+    if start:
+        query += " AND time >= %s"
+        params.append(start)
+    if end:
+        query += " AND time <= %s"
+        params.append(end)
+    return query
+
+class NarrowIndicatorStore:
+    """One row per (time, symbol, indicator_name) in the indicators table."""
+
+    def __init__(self):
+        self._params: Dict[str, str] = {}
+
+    def prepare(self, cur, series: Dict[str, Dict]):
+        # The table and its (symbol, indicator_name, time) index come from init_db
+        self._params = {name: json.dumps(params) for name, params in series.items()}
+
+    def write(self, cur, symbol: str, times: List[datetime], values: Dict[str, np.ndarray], page_size: int):
+        rows = []
+        for name, column in values.items():
+            params = self._params[name]
+            # Warm-up values are NaN and are not stored
+            for i in np.flatnonzero(np.isfinite(column)).tolist():
+                rows.append((times[i], symbol, name, float(column[i]), params))
+        if rows:
+            execute_values(cur, """
+                INSERT INTO indicators (time, symbol, indicator_name, value, params) VALUES %s
+                ON CONFLICT (symbol, indicator_name, time) DO UPDATE SET value = EXCLUDED.value
+            """, rows, template="(%s, %s, %s, %s, %s::jsonb)", page_size=page_size)
+
+    def read(self, symbol: str, names: Sequence[str], start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> Series:
+        params = [symbol, list(names)]
+        query = _time_range("SELECT indicator_name, time, value FROM indicators "
+                            "WHERE symbol = %s AND indicator_name = ANY(%s)", params, start, end)
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query + " ORDER BY indicator_name, time", params)
+                rows = cur.fetchall()
+        result = _empty(names)
+        if not rows:
+            return result
+        series, times, values = zip(*rows)
+        series = np.array(series)
+        times = _naive_utc(times)
+        values = np.array(values, dtype=np.float64)
+        # Rows are grouped by series name, so each series is one contiguous slice
+        starts = np.flatnonzero(np.r_[True, series[1:] != series[:-1]])
+        for first, last in zip(starts, np.r_[starts[1:], len(series)]):
+            result[str(series[first])] = (times[first:last], values[first:last])
+        return result
+
+class WideIndicatorStore:
+    """One row per (symbol_id, time) in the indicator_values hypertable, a column per series."""
+
+    def __init__(self, compress_after: str = COMPRESS_AFTER):
+        self.compress_after = compress_after
+        self._symbol_ids: Dict[str, int] = {}
+        self._columns: Optional[set] = None
+
+    def prepare(self, cur, series: Dict[str, Dict]):
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS symbols (
+                symbol_id SERIAL PRIMARY KEY,
+                symbol TEXT NOT NULL UNIQUE
+            );
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS indicator_series (
+                series_id SMALLSERIAL PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE,
+                params JSONB NOT NULL
+            );
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS indicator_values (
+                symbol_id INTEGER NOT NULL,
+                time TIMESTAMPTZ NOT NULL
+            );
+        """)
+        cur.execute("SELECT create_hypertable('indicator_values', 'time', if_not_exists => TRUE);")
+        cur.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_indicator_values_symbol
+            ON indicator_values (symbol_id, time DESC);
+        """)
+        for name, params in series.items():
+            if not _SERIES_NAME.match(name):
+                raise ValueError(f"Invalid series name: {name}")
+            cur.execute("""
+                INSERT INTO indicator_series (name, params) VALUES (%s, %s::jsonb)
+                ON CONFLICT (name) DO UPDATE SET params = EXCLUDED.params
+            """, (name, json.dumps(params)))
+            # Nullable without a default, so it is allowed on compressed hypertables too
+            cur.execute(sql.SQL("ALTER TABLE indicator_values ADD COLUMN IF NOT EXISTS {} DOUBLE PRECISION")
+                        .format(sql.Identifier(name)))
+        cur.execute("""
+            SELECT compression_enabled FROM timescaledb_information.hypertables
+            WHERE hypertable_name = 'indicator_values'
+        """)
+        if not cur.fetchone()[0]:
+            cur.execute("""
+                ALTER TABLE indicator_values SET (
+                    timescaledb.compress,
+                    timescaledb.compress_segmentby = 'symbol_id',
+                    timescaledb.compress_orderby = 'time DESC'
+                );
+            """)
+        cur.execute("SELECT add_compression_policy('indicator_values', %s::interval, if_not_exists => TRUE);",
+                    (self.compress_after,))
+        self._columns = None
+
+    def _symbol_id(self, cur, symbol: str, create: bool = False) -> Optional[int]:
+        symbol_id = self._symbol_ids.get(symbol)
+        if symbol_id is None:
+            if create:
+                cur.execute("INSERT INTO symbols (symbol) VALUES (%s) ON CONFLICT (symbol) DO NOTHING", (symbol,))
+            cur.execute("SELECT symbol_id FROM symbols WHERE symbol = %s", (symbol,))
+            row = cur.fetchone()
+            if row is None:
+                return None
+            symbol_id = self._symbol_ids[symbol] = row[0]
+        return symbol_id
+
+    def _known_columns(self, cur, names: Sequence[str]) -> List[str]:
+        # Registered series; reloaded when asked for one it has not seen, which the
+        # materializer may have added since
+        if self._columns is None or not self._columns.issuperset(names):
+            cur.execute("SELECT name FROM indicator_series")
+            self._columns = {row[0] for row in cur.fetchall()}
+        return [name for name in names if name in self._columns]
+
+    def write(self, cur, symbol: str, times: List[datetime], values: Dict[str, np.ndarray], page_size: int):
+        names = list(values)
+        matrix = np.vstack([values[name] for name in names]).T
+        finite = np.isfinite(matrix)
+        keep = finite.any(axis=1) # bars still warming up for every series are not stored
+        if not keep.any():
+            return
+        cells = matrix.astype(object)
+        cells[~finite] = None
+        symbol_id = self._symbol_id(cur, symbol, create=True)
+        rows = [(symbol_id, times[i], *cells[i]) for i in np.flatnonzero(keep).tolist()]
+        columns = sql.SQL(", ").join(map(sql.Identifier, names))
+        updates = sql.SQL(", ").join(sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(name)) for name in names)
+        execute_values(cur, sql.SQL("""
+            INSERT INTO indicator_values (symbol_id, time, {}) VALUES %s
+            ON CONFLICT (symbol_id, time) DO UPDATE SET {}
+        """).format(columns, updates), rows, page_size=page_size)
+
+    def read(self, symbol: str, names: Sequence[str], start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> Series:
+        result = _empty(names)
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                columns = self._known_columns(cur, names)
+                symbol_id = self._symbol_id(cur, symbol)
+                if not columns or symbol_id is None:
+                    return result
+                params = [symbol_id]
+                query = _time_range("SELECT time, {} FROM indicator_values WHERE symbol_id = %s", params, start, end)
+                cur.execute(sql.SQL(query + " ORDER BY time").format(
+                    sql.SQL(", ").join(map(sql.Identifier, columns))), params)
+                rows = cur.fetchall()
+        if not rows:
+            return result
+        times = _naive_utc([row[0] for row in rows])
+        matrix = np.array([row[1:] for row in rows], dtype=np.float64) # NULL -> NaN
+        for j, name in enumerate(columns):
+            present = np.isfinite(matrix[:, j])
+            result[name] = (times[present], matrix[present, j])
+        return result
+
+INDICATOR_STORES = {
+    "narrow": NarrowIndicatorStore,
+    "wide": WideIndicatorStore,
+}
+
+_store = None
+
+def get_indicator_store():
+    """Indicator storage selected by INDICATOR_STORAGE: "narrow" (default) or "wide"."""
+    global _store
+    if _store is None:
+        if STORAGE not in INDICATOR_STORES:
+            raise ValueError(f"Unknown INDICATOR_STORAGE: {STORAGE}")
+        _store = INDICATOR_STORES[STORAGE]()
+    return _store
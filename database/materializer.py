@@ -0,0 +1,243 @@
+"""
+Background indicator materialization.
+Keeps the materialized indicator values (see database.indicator_store) current with
+stock_data: for each symbol, the configured indicator set is computed over the `interval`
+bars newer than the symbol's watermark and upserted in bulk. Rolling indicators (SMA,
+Bollinger Bands, RSI) only need the last few closes and EMA-based ones (EMA, MACD) only
+their previous value, so that state is stored with the watermark and a pass never rereads
+older bars. Bars are read in pages of `batch_size`; each page is computed vectorized and
+written in one transaction together with the new watermark, so catching up after downtime
+costs a few large batches rather than a round trip per bar, and an interrupted pass
+resumes where it stopped.
+
+The newest bar's bucket may still be filling. Its values are written, but the watermark
+stays before it, so the next pass recomputes and overwrites them.
+
+    python -m database.materializer     # catch up, then follow new bars until interrupted
+
+Settings: INDICATOR_INTERVAL (default 1d), INDICATOR_WINDOWS (SMA/EMA/Bollinger windows,
+default 20), INDICATOR_BATCH_SIZE (bars per page, default 10000) and
+INDICATOR_POLL_SECONDS (full catch-up when no notification arrived, default 60); the
+storage layout is chosen by INDICATOR_STORAGE.
+"""
+import json
+import os
+import select
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from database.db import BARS_CHANNEL, BUCKET_WIDTHS, INDICATORS_CHANNEL, announce_write, get_connection, get_symbols, iter_stock_bars
+from database.indicator_store import get_indicator_store
+from indicators.calculator import calculate_bollinger_bands, calculate_ema, calculate_rsi
+
+INTERVAL = os.getenv("INDICATOR_INTERVAL", "1d")
+WINDOWS = tuple(int(w) for w in os.getenv("INDICATOR_WINDOWS", "20").split(",") if w.strip())
+BATCH_SIZE = int(os.getenv("INDICATOR_BATCH_SIZE", "10000"))
+POLL_SECONDS = float(os.getenv("INDICATOR_POLL_SECONDS", "60"))
+
+RSI_WINDOW = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BB_STD = 2.0
+
+# Start of time for symbols without a watermark
+_BEGINNING = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def indicator_set(windows: Sequence[int] = WINDOWS) -> Dict[str, Dict]:
+    """Series name -> params of the materialized set (the params column of each row)."""
+    series = {}
+    for window in windows:
+        series[f"sma_{window}"] = {"window": window}
+        series[f"ema_{window}"] = {"window": window}
+        # The middle band is sma_{window}
+        series[f"bb_upper_{window}"] = {"window": window, "num_std": BB_STD}
+        series[f"bb_lower_{window}"] = {"window": window, "num_std": BB_STD}
+    series[f"rsi_{RSI_WINDOW}"] = {"window": RSI_WINDOW}
+    macd = {"fast": MACD_FAST, "slow": MACD_SLOW, "signal": MACD_SIGNAL}
+    for part in ("line", "signal", "histogram"):
+        series[f"macd_{part}"] = macd
+    return series
+
+def _continue_ema(values: np.ndarray, previous: Optional[float], window: int) -> np.ndarray:
+    """calculate_ema(values) continuing from the EMA of the bars before them, if any."""
+    if previous is None:
+        return calculate_ema(pd.Series(values), window).to_numpy()
+    # adjust=False EMAs are a recurrence, so seeding the series with the previous value
+    # reproduces the full-history EMA exactly
+    return calculate_ema(pd.Series(np.r_[previous, values]), window).to_numpy()[1:]
+
+def compute_batch(closes: np.ndarray, state: Dict, windows: Sequence[int] = WINDOWS,
+                  closed: Optional[int] = None) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    Values of every series for `closes`, the bars following those summarized by `state`,
+    and the state after the first `closed` of them (default: all). Equal to running the
+    calculator functions over the whole history and keeping the last len(closes) values.
+    """
+    closed = len(closes) if closed is None else closed
+    lookback = np.asarray(state.get("closes", []), dtype=np.float64)
+    full = pd.Series(np.r_[lookback, closes])
+    tail = len(lookback)
+    emas = state.get("ema", {})
+    new_emas = dict(emas)
+    values = {}
+
+    def ema(key: str, series: np.ndarray, window: int) -> np.ndarray:
+        result = _continue_ema(series, emas.get(key), window)
+        if closed:
+            new_emas[key] = float(result[closed - 1])
+        return result
+
+    for window in windows:
+        sma, upper, lower = calculate_bollinger_bands(full, window, BB_STD)
+        values[f"sma_{window}"] = sma.to_numpy()[tail:]
+        values[f"bb_upper_{window}"] = upper.to_numpy()[tail:]
+        values[f"bb_lower_{window}"] = lower.to_numpy()[tail:]
+        values[f"ema_{window}"] = ema(f"ema_{window}", closes, window)
+    values[f"rsi_{RSI_WINDOW}"] = calculate_rsi(full, RSI_WINDOW).to_numpy()[tail:]
+    line = ema("macd_fast", closes, MACD_FAST) - ema("macd_slow", closes, MACD_SLOW)
+    signal = ema("macd_signal", line, MACD_SIGNAL)
+    values["macd_line"] = line
+    values["macd_signal"] = signal
+    values["macd_histogram"] = line - signal
+
+    # Rolling windows need max(window) - 1 earlier closes and RSI one more than its window
+    keep = max(max(windows, default=1), RSI_WINDOW + 1)
+    new_state = {
+        "closes": full.to_numpy()[:tail + closed][-keep:].tolist(),
+        "ema": new_emas
+    }
+    return values, new_state
+
+def _pages(rows: Iterable[tuple], size: int) -> Iterable[List[tuple]]:
+    page = []
+    for row in rows:
+        page.append(row)
+        if len(page) == size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+class IndicatorMaterializer:
+    """
+    Materializes indicator_set(windows) over `interval` bars of stock_data into `store`
+    (default: get_indicator_store()).
+    """
+
+    def __init__(self, interval: str = INTERVAL, windows: Sequence[int] = WINDOWS,
+                 batch_size: int = BATCH_SIZE, store=None):
+        if interval not in BUCKET_WIDTHS:
+            raise ValueError(f"Unknown interval: {interval}")
+        self.interval = interval
+        self.windows = tuple(windows)
+        self.batch_size = batch_size
+        self.series = indicator_set(self.windows)
+        self.store = get_indicator_store() if store is None else store
+        # Stored with the state; a different configuration rebuilds the symbol from scratch
+        self.config = json.dumps({"interval": interval, "windows": list(self.windows),
+                                  "storage": type(self.store).__name__})
+        self._prepared = False
+        self._stop = threading.Event()
+
+    def _prepare(self, conn):
+        if not self._prepared:
+            with conn.cursor() as cur:
+                self.store.prepare(cur, self.series)
+            conn.commit()
+            self._prepared = True
+
+    def _load_watermark(self, cur, symbol: str) -> Tuple[Optional[datetime], Dict]:
+        cur.execute("SELECT last_time, state FROM indicator_watermarks WHERE symbol = %s", (symbol,))
+        row = cur.fetchone()
+        if row is None or row[1].get("config") != self.config:
+            return None, {}
+        return row
+
+    def materialize(self, symbol: str) -> int:
+        """Bring one symbol up to date; returns the number of bars processed."""
+        width = BUCKET_WIDTHS[self.interval]
+        now = datetime.now(timezone.utc)
+        processed = 0
+        with get_connection() as conn:
+            self._prepare(conn)
+            with conn.cursor() as cur:
+                watermark, state = self._load_watermark(cur, symbol)
+                conn.commit()
+                bars = iter_stock_bars(symbol, self.interval, watermark or _BEGINNING, now,
+                                       after=watermark, page_size=self.batch_size)
+                for page in _pages(bars, self.batch_size):
+                    times = [row[0] for row in page]
+                    closes = np.array([row[4] for row in page], dtype=np.float64)
+                    # Only the newest bucket can still be open
+                    closed = len(page) - (times[-1] + width > now)
+                    values, state = compute_batch(closes, state, self.windows, closed)
+                    self.store.write(cur, symbol, times, values, self.batch_size)
+                    if closed:
+                        watermark = times[closed - 1]
+                        cur.execute("""
+                            INSERT INTO indicator_watermarks (symbol, last_time, state)
+                            VALUES (%s, %s, %s::jsonb)
+                            ON CONFLICT (symbol) DO UPDATE
+                            SET last_time = EXCLUDED.last_time, state = EXCLUDED.state, updated_at = now()
+                        """, (symbol, watermark, json.dumps({**state, "config": self.config})))
+                    # Lets the APIs revalidate responses built from these values (delivered on commit)
+                    announce_write(cur, INDICATORS_CHANNEL, symbol)
+                    conn.commit()
+                    processed += len(page)
+        return processed
+
+    def catch_up(self, symbols: Optional[Iterable[str]] = None) -> int:
+        """Materialize every symbol (default: all symbols in stock_data)."""
+        total = 0
+        for symbol in (get_symbols() if symbols is None else symbols):
+            start = time.perf_counter()
+            processed = self.materialize(symbol)
+            if processed:
+                print(f"Materialized {processed} {self.interval} bars of {symbol} "
+                      f"in {time.perf_counter() - start:.2f}s")
+            total += processed
+        return total
+
+    def run_forever(self, poll_seconds: float = POLL_SECONDS, debounce: float = 0.5):
+        """
+        Catch up, then LISTEN for new bars and materialize the symbols they belong to.
+        Notifications arriving within `debounce` seconds are handled as one batch; if
+        none arrive for `poll_seconds`, all symbols are caught up (covers bulk loads that
+        do not notify, and moves the watermark past buckets that closed meanwhile).
+        """
+        self.catch_up()
+        with get_connection() as conn:
+            conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {BARS_CHANNEL};")
+            while not self._stop.is_set():
+                if select.select([conn], [], [], poll_seconds) == ([], [], []):
+                    self.catch_up()
+                    continue
+                time.sleep(debounce)
+                conn.poll()
+                symbols = {notify.payload for notify in conn.notifies}
+                conn.notifies.clear()
+                self.catch_up(sorted(symbols))
+
+    def start(self, **kwargs) -> threading.Thread:
+        """run_forever() in a daemon thread."""
+        thread = threading.Thread(target=self.run_forever, kwargs=kwargs, daemon=True,
+                                  name="indicator-materializer")
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop after the current poll (at most poll_seconds)."""
+        self._stop.set()
+
+if __name__ == "__main__":
+    materializer = IndicatorMaterializer()
+    print(f"Materializing {', '.join(materializer.series)} over {INTERVAL} bars")
+    try:
+        materializer.run_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,344 @@
+"""
+Bulk Parquet export/import of OHLCV history and indicator series.
+Datasets are hive-partitioned by symbol and date (day, month or year):
+    {root}/stock_data/symbol=AAPL/date=2024-01/part-0.parquet
+    {root}/indicators/symbol=AAPL/date=2024-01/part-0.parquet
+Exports stream from the database in batches through a server-side cursor, and reads
+push symbol/date filters down to partition pruning and time filters down to Parquet
+row-group statistics, loading only the requested columns.
+Requires pyarrow (pip install pyarrow); psycopg2 is only needed to talk to the database.
+
+CLI:
+    python -m database.parquet_io export --table stock_data --out /data/lake --symbols AAPL,MSFT
+    python -m database.parquet_io export-history --out /data/lake --interval 1m --start 2024-01-01
+    python -m database.parquet_io import --table stock_data --src /data/lake
+"""
+import argparse
+import io
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+import pandas as pd
+
+TABLES = ("stock_data", "indicators")
+
+# strftime format of the date partition value for each granularity
+PARTITION_FORMATS = {"day": "%Y-%m-%d", "month": "%Y-%m", "year": "%Y"}
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+    except ImportError:
+        raise ImportError("Parquet export/import requires pyarrow: pip install pyarrow")
+    return pa, pc, ds
+
+def _schema(table: str):
+    pa, _, _ = _pyarrow()
+    time_field = pa.field("time", pa.timestamp("us", tz="UTC"), nullable=False)
+    if table == "stock_data":
+        fields = [time_field, pa.field("symbol", pa.string()), pa.field("open", pa.float64()),
+                  pa.field("high", pa.float64()), pa.field("low", pa.float64()),
+                  pa.field("close", pa.float64()), pa.field("volume", pa.int64())]
+    elif table == "indicators":
+        fields = [time_field, pa.field("symbol", pa.string()), pa.field("indicator_name", pa.string()),
+                  pa.field("value", pa.float64()), pa.field("params", pa.string())]
+    else:
+        raise ValueError(f"Unknown table: {table}; expected one of {TABLES}")
+    return pa.schema(fields + [pa.field("date", pa.string())])
+
+def _partitioning():
+    pa, _, ds = _pyarrow()
+    return ds.partitioning(pa.schema([("symbol", pa.string()), ("date", pa.string())]), flavor="hive")
+
+def partition_range(start: Optional[datetime], end: Optional[datetime],
+                    partition: str) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    [start, end] widened to whole `partition` periods: from the first instant of start's
+    partition to the last microsecond of end's. Open ends stay open.
+    """
+    if start is not None:
+        start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        if partition in ("month", "year"):
+            start = start.replace(day=1)
+        if partition == "year":
+            start = start.replace(month=1)
+    if end is not None:
+        if partition == "day":
+            following = end.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        elif partition == "month":
+            following = (end.replace(day=28) + timedelta(days=4)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        else:
+            following = end.replace(year=end.year + 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        end = following - timedelta(microseconds=1)
+    return start, end
+
+def _with_date(batch, partition: str):
+    """Add the `date` partition column derived from `time`."""
+    pa, pc, _ = _pyarrow()
+    dates = pc.strftime(batch.column("time"), format=PARTITION_FORMATS[partition])
+    return pa.RecordBatch.from_arrays(list(batch.columns) + [dates], names=batch.schema.names + ["date"])
+
+def write_batches(batches: Iterable, root: str, table: str, partition: str = "month",
+                  max_rows_per_group: int = 1_000_000):
+    """
+    Write record batches (columns as in _schema, without `date`) to {root}/{table}.
+    Every partition that receives data is replaced as a whole, so the batches must hold
+    all rows of the partitions they touch; callers widen their range with partition_range().
+    """
+    pa, _, ds = _pyarrow()
+    if partition not in PARTITION_FORMATS:
+        raise ValueError(f"Partition must be one of {list(PARTITION_FORMATS)}")
+    schema = _schema(table)
+    ds.write_dataset(
+        (_with_date(batch, partition) for batch in batches),
+        os.path.join(root, table),
+        schema=schema,
+        format="parquet",
+        partitioning=_partitioning(),
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=max_rows_per_group,
+        min_rows_per_group=min(max_rows_per_group, 64 * 1024),
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd")
+    )
+
+def _rows_to_batch(rows: List[tuple], table: str):
+    pa, _, _ = _pyarrow()
+    schema = _schema(table).remove(len(_schema(table)) - 1)
+    columns = list(zip(*rows))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+    )
+
+def _query(table: str, symbols: Optional[Sequence[str]], start: Optional[datetime], end: Optional[datetime]):
+    columns = ("time, symbol, open, high, low, close, volume" if table == "stock_data"
+               else "time, symbol, indicator_name, value, params::text")
+    query = f"SELECT {columns} FROM {table} WHERE TRUE"
+    params = []
+    if symbols:
+        query += " AND symbol = ANY(%s)"
+        params.append(list(symbols))
+    if start:
+        query += " AND time >= %s"
+        params.append(start)
+    if end:
+        query += " AND time <= %s"
+        params.append(end)
+    # Symbol-major order keeps each partition's rows together for the writer
+    return query + " ORDER BY symbol, time", params
+
+def iter_table_batches(table: str, symbols: Optional[Sequence[str]] = None, start: Optional[datetime] = None,
+                       end: Optional[datetime] = None, batch_size: int = 100_000) -> Iterator:
+    """Stream a table as Arrow record batches through a named (server-side) cursor."""
+    from database.db import get_connection
+    _schema(table)
+    query, params = _query(table, symbols, start, end)
+    with get_connection() as conn:
+        with conn.cursor(name=f"{table}_parquet_export") as cur:
+            cur.itersize = batch_size
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield _rows_to_batch(rows, table)
+
+def export_table(root: str, table: str = "stock_data", symbols: Optional[Sequence[str]] = None,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 partition: str = "month", batch_size: int = 100_000):
+    """
+    Export a database table (or a symbol/time slice of it) to a partitioned Parquet dataset.
+    The range is widened to whole partitions, so re-exporting any range is idempotent.
+    """
+    start, end = partition_range(start and _utc(start), end and _utc(end), partition)
+    write_batches(iter_table_batches(table, symbols, start, end, batch_size), root, table, partition)
+
+def export_history(root: str, symbols: Sequence[str], interval: str, start: datetime, end: datetime,
+                   source=None, partition: str = "month"):
+    """
+    Export bars from a HistorySource (default: the configured one) as the stock_data dataset,
+    widening [start, end] to whole partitions like export_table().
+    """
+    pa, _, _ = _pyarrow()
+    start, end = partition_range(start, end, partition)
+    if source is None:
+        from data_ingestion.history import get_history_source
+        source = get_history_source()
+    schema = _schema("stock_data").remove(len(_schema("stock_data")) - 1)
+
+    def batches():
+        for symbol in symbols:
+            for chunk in source.iter_chunks(symbol, interval, start, end):
+                n = len(chunk["timestamp"])
+                yield pa.RecordBatch.from_arrays([
+                    # Naive history timestamps are UTC
+                    pa.array(chunk["timestamp"].astype("datetime64[us]"), type=pa.timestamp("us")).cast(schema.field("time").type),
+                    pa.array([symbol] * n, type=pa.string()),
+                    pa.array(chunk["open"], type=pa.float64()),
+                    pa.array(chunk["high"], type=pa.float64()),
+                    pa.array(chunk["low"], type=pa.float64()),
+                    pa.array(chunk["close"], type=pa.float64()),
+                    pa.array(chunk["volume"], type=pa.int64()),
+                ], schema=schema)
+
+    write_batches(batches(), root, "stock_data", partition)
+
+def _dataset(root: str, table: str):
+    _, _, ds = _pyarrow()
+    path = os.path.join(root, table)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No {table} dataset under {root}")
+    return ds.dataset(path, format="parquet", partitioning=_partitioning())
+
+def _date_width(dataset) -> int:
+    # Length of the date partition values (10 = day, 7 = month, 4 = year)
+    for path in dataset.files:
+        for part in path.replace(os.sep, "/").split("/"):
+            if part.startswith("date="):
+                return len(part) - len("date=")
+    return 10
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _filter(dataset, symbols, start, end, extra=None):
+    """Partition filters (symbol, date) plus a row-level time filter for row-group pruning."""
+    _, _, ds = _pyarrow()
+    expr = None
+
+    def both(a, b):
+        return b if a is None else a & b
+
+    if symbols:
+        expr = both(expr, ds.field("symbol").isin(list(symbols)))
+    width = _date_width(dataset)
+    if start is not None:
+        start = _utc(start)
+        expr = both(expr, (ds.field("date") >= start.strftime("%Y-%m-%d")[:width]) & (ds.field("time") >= start))
+    if end is not None:
+        end = _utc(end)
+        expr = both(expr, (ds.field("date") <= end.strftime("%Y-%m-%d")[:width]) & (ds.field("time") <= end))
+    if extra is not None:
+        expr = both(expr, extra)
+    return expr
+
+def read_table(root: str, table: str = "stock_data", symbols: Optional[Sequence[str]] = None,
+               start: Optional[datetime] = None, end: Optional[datetime] = None,
+               columns: Optional[Sequence[str]] = None, filter=None) -> pd.DataFrame:
+    """
+    Load a slice of an exported dataset into a DataFrame sorted by (symbol, time).
+    Only `columns` are read (time and symbol are always included); `filter` is an
+    optional extra pyarrow.dataset expression.
+    """
+    dataset = _dataset(root, table)
+    wanted = None
+    if columns is not None:
+        wanted = ["time", "symbol"] + [c for c in columns if c not in ("time", "symbol")]
+    frame = dataset.to_table(columns=wanted, filter=_filter(dataset, symbols, start, end, filter)).to_pandas()
+    if "date" in frame.columns and (columns is None or "date" not in columns):
+        frame = frame.drop(columns="date")
+    frame["symbol"] = frame["symbol"].astype(str)
+    return frame.sort_values(["symbol", "time"], kind="stable").reset_index(drop=True)
+
+def read_ohlcv(root: str, symbol: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               columns: Sequence[str] = ("open", "high", "low", "close", "volume")) -> pd.DataFrame:
+    """One symbol's bars indexed by time, ready for calculate_all_indicators (needs 'close')."""
+    frame = read_table(root, "stock_data", [symbol], start, end, columns)
+    return frame.drop(columns="symbol").set_index("time")
+
+def read_panel(root: str, symbols: Optional[Sequence[str]] = None, start: Optional[datetime] = None,
+               end: Optional[datetime] = None, field: str = "close") -> pd.DataFrame:
+    """A (time x symbol) panel of one field, the input shape of indicators.backtest."""
+    frame = read_table(root, "stock_data", symbols, start, end, [field])
+    return frame.pivot(index="time", columns="symbol", values=field)
+
+def read_indicator_series(root: str, symbols: Optional[Sequence[str]] = None,
+                          names: Optional[Sequence[str]] = None, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> pd.DataFrame:
+    """Exported indicator values as a (time x (symbol, indicator_name)) frame."""
+    _, _, ds = _pyarrow()
+    extra = ds.field("indicator_name").isin(list(names)) if names else None
+    frame = read_table(root, "indicators", symbols, start, end, ["indicator_name", "value"], filter=extra)
+    return frame.pivot_table(index="time", columns=["symbol", "indicator_name"], values="value")
+
+def import_table(root: str, table: str = "stock_data", symbols: Optional[Sequence[str]] = None,
+                 start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 batch_size: int = 100_000) -> int:
+    """Bulk-load a dataset slice into the database with COPY, one batch at a time; returns rows loaded."""
+    from database.db import BARS_CHANNEL, INDICATORS_CHANNEL, announce_write, get_connection
+    pa, _, _ = _pyarrow()
+    import pyarrow.csv as pacsv
+    dataset = _dataset(root, table)
+    schema = _schema(table)
+    columns = [f.name for f in schema if f.name != "date"]
+    scanner = dataset.scanner(columns=columns, filter=_filter(dataset, symbols, start, end), batch_size=batch_size)
+    loaded = 0
+    written = set()
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            for batch in scanner.to_batches():
+                if not batch.num_rows:
+                    continue
+                written.update(batch.column("symbol").unique().to_pylist())
+                buffer = io.BytesIO()
+                pacsv.write_csv(pa.Table.from_batches([batch]), buffer,
+                                pacsv.WriteOptions(include_header=False))
+                buffer.seek(0)
+                cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+                loaded += batch.num_rows
+            # Same announcement as a regular insert, so cached API responses revalidate
+            channel = BARS_CHANNEL if table == "stock_data" else INDICATORS_CHANNEL
+            for symbol in sorted(written):
+                announce_write(cur, channel, symbol)
+        conn.commit()
+    return loaded
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m database.parquet_io", description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def common(p):
+        p.add_argument("--symbols", help="Comma-separated symbols (default: all)")
+        p.add_argument("--start", type=datetime.fromisoformat)
+        p.add_argument("--end", type=datetime.fromisoformat)
+
+    export = sub.add_parser("export", help="Database table -> Parquet dataset")
+    export.add_argument("--table", choices=TABLES, default="stock_data")
+    export.add_argument("--out", required=True)
+    export.add_argument("--partition", choices=list(PARTITION_FORMATS), default="month")
+    export.add_argument("--batch-size", type=int, default=100_000)
+    common(export)
+
+    history = sub.add_parser("export-history", help="Configured history source -> stock_data dataset")
+    history.add_argument("--out", required=True)
+    history.add_argument("--interval", default="1d", choices=["1m", "5m", "15m", "1h", "1d"])
+    history.add_argument("--partition", choices=list(PARTITION_FORMATS), default="month")
+    common(history)
+
+    load = sub.add_parser("import", help="Parquet dataset -> database table (COPY)")
+    load.add_argument("--table", choices=TABLES, default="stock_data")
+    load.add_argument("--src", required=True)
+    load.add_argument("--batch-size", type=int, default=100_000)
+    common(load)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = _parse_args(argv)
+    symbols = [s.strip() for s in args.symbols.split(",")] if args.symbols else None
+    if args.command == "export":
+        export_table(args.out, args.table, symbols, args.start, args.end, args.partition, args.batch_size)
+        print(f"Exported {args.table} to {args.out}")
+    elif args.command == "export-history":
+        if not symbols or args.start is None:
+            raise SystemExit("export-history needs --symbols and --start")
+        export_history(args.out, symbols, args.interval, args.start, args.end or datetime.now(),
+                       partition=args.partition)
+        print(f"Exported {args.interval} history of {len(symbols)} symbols to {args.out}")
+    else:
+        rows = import_table(args.src, args.table, symbols, args.start, args.end, args.batch_size)
+        print(f"Imported {rows} rows into {args.table}")
+
+if __name__ == "__main__":
+    main()
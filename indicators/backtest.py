@@ -0,0 +1,172 @@
+"""
+Vectorized backtesting for simple indicator rule strategies.
+Turns indicator arrays from the calculator into position arrays and derives returns,
+equity curves, trades and performance metrics with NumPy over a whole
+time x symbols panel at once, without an event-driven ExecutionEngine run.
+"""
+from dataclasses import dataclass
+from itertools import product
+from typing import Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .calculator import calculate_sma, calculate_rsi
+
+def _as_panel(prices) -> Tuple[np.ndarray, pd.Index, pd.Index]:
+    """Normalize a Series / DataFrame / 1-D or 2-D array to a (time, symbols) float panel."""
+    if isinstance(prices, pd.DataFrame):
+        return prices.to_numpy(dtype=np.float64), prices.index, prices.columns
+    if isinstance(prices, pd.Series):
+        return prices.to_numpy(dtype=np.float64)[:, None], prices.index, pd.Index([prices.name or 'close'])
+    values = np.asarray(prices, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    return values, pd.RangeIndex(values.shape[0]), pd.RangeIndex(values.shape[1])
+
+def _forward_fill(values: np.ndarray, fill: float = 0.0) -> np.ndarray:
+    """Forward-fill NaNs along the time axis of a 2-D array; leading NaNs become `fill`."""
+    rows = np.where(np.isnan(values), 0, np.arange(values.shape[0])[:, None])
+    rows = np.maximum.accumulate(rows, axis=0)
+    filled = values[rows, np.arange(values.shape[1])]
+    return np.where(np.isnan(filled), fill, filled)
+
+def sma_crossover_positions(close, fast: int = 10, slow: int = 50, allow_short: bool = False,
+                            sma_cache: Optional[dict] = None) -> np.ndarray:
+    """Long while SMA(fast) > SMA(slow); flat (or short) while below. Warm-up bars are flat."""
+    panel, index, columns = _as_panel(close)
+    frame = pd.DataFrame(panel)
+    cache = {} if sma_cache is None else sma_cache
+    for window in (fast, slow):
+        if window not in cache:
+            cache[window] = calculate_sma(frame, window).to_numpy()
+    diff = cache[fast] - cache[slow]
+    positions = np.where(diff > 0, 1.0, -1.0 if allow_short else 0.0)
+    return np.where(np.isnan(diff), 0.0, positions)
+
+def rsi_positions(close, window: int = 14, oversold: float = 30, overbought: float = 70) -> np.ndarray:
+    """Enter long when RSI drops below `oversold`, exit when it rises above `overbought`."""
+    panel, _, _ = _as_panel(close)
+    rsi = calculate_rsi(pd.DataFrame(panel), window).to_numpy()
+    events = np.where(rsi < oversold, 1.0, np.where(rsi > overbought, 0.0, np.nan))
+    return _forward_fill(events)
+
+@dataclass
+class BacktestResult:
+    """Outputs of a vectorized backtest; arrays are (time, symbols)."""
+    index: pd.Index
+    symbols: pd.Index
+    positions: np.ndarray
+    returns: np.ndarray
+    equity: np.ndarray
+    trades: Optional[pd.DataFrame]
+    metrics: pd.DataFrame
+
+    def equity_df(self) -> pd.DataFrame:
+        return pd.DataFrame(self.equity, index=self.index, columns=self.symbols)
+
+def _performance_metrics(strategy_returns: np.ndarray, equity: np.ndarray, positions: np.ndarray,
+                         initial_cash: float, periods_per_year: int, risk_free_rate: float) -> dict:
+    """Per-symbol metrics with the same keys/units as PerformanceMetrics.calculate_metrics."""
+    n_periods, n_symbols = strategy_returns.shape
+    # Sharpe ratio as in calculate_sharpe_ratio, over periods after the first bar
+    rets = strategy_returns[1:]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = rets.std(axis=0, ddof=1)
+        sharpe = (rets.mean(axis=0) * periods_per_year - risk_free_rate) / (std * np.sqrt(periods_per_year))
+    sharpe = np.where(std > 0, sharpe, np.nan)
+
+    peak = np.maximum(np.maximum.accumulate(equity, axis=0), initial_cash)
+    max_drawdown = ((equity - peak) / peak).min(axis=0) * 100
+
+    total_return = (equity[-1] / initial_cash - 1) * 100
+    with np.errstate(invalid='ignore'):
+        annualized_return = ((1 + total_return / 100) ** (periods_per_year / max(n_periods - 1, 1)) - 1) * 100
+
+    # Win rate over round trips: each run of an unchanged non-zero position is one trade.
+    # Segment ids are made unique per symbol so one bincount covers the whole panel.
+    changed = np.vstack([np.ones((1, n_symbols), dtype=bool), positions[1:] != positions[:-1]])
+    segment = np.cumsum(changed, axis=0) + np.arange(n_symbols) * (n_periods + 1)
+    holding = np.vstack([np.zeros((1, n_symbols), dtype=bool), positions[:-1] != 0])
+    # Returns earned at t belong to the position held since t-1
+    prev_segment = np.vstack([segment[:1], segment[:-1]])
+    # Compounded as a product: log1p would turn a return of -100% or worse (e.g. a short
+    # through a doubling) into -inf/NaN
+    growth = np.ones(segment.max() + 1)
+    np.multiply.at(growth, prev_segment[holding], 1 + strategy_returns[holding])
+    trade_pnl = growth - 1
+    trade_ids = segment[changed & (positions != 0)]
+    trade_symbol = trade_ids // (n_periods + 1)
+    num_trades = np.bincount(trade_symbol, minlength=n_symbols)
+    wins = np.bincount(trade_symbol, weights=trade_pnl[trade_ids] > 0, minlength=n_symbols)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        win_rate = np.where(num_trades > 0, wins / num_trades * 100, np.nan)
+
+    return {
+        'sharpe_ratio': sharpe,
+        'win_rate': win_rate,
+        'max_drawdown': max_drawdown,
+        'total_return': total_return,
+        'annualized_return': annualized_return,
+        'num_trades': num_trades,
+    }
+
+def run_backtest(close, positions, commission: float = 0.0, slippage: float = 0.0,
+                 initial_cash: float = 100000.0, periods_per_year: int = 252,
+                 risk_free_rate: float = 0.0, record_trades: bool = True) -> BacktestResult:
+    """
+    Backtest target positions (fraction of equity per symbol, decided at each bar's close).
+    A position set at bar t earns the close-to-close return of bar t+1; changing it costs
+    (commission + slippage) times the traded fraction of equity. Every symbol is run as
+    an independent single-asset strategy starting from initial_cash.
+    """
+    prices, index, columns = _as_panel(close)
+    positions = np.asarray(positions, dtype=np.float64).reshape(prices.shape)
+
+    asset_returns = np.zeros_like(prices)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        asset_returns[1:] = prices[1:] / prices[:-1] - 1
+    asset_returns = np.nan_to_num(asset_returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+    held = np.vstack([np.zeros((1, prices.shape[1])), positions[:-1]])
+    turnover = np.abs(positions - held)
+    strategy_returns = held * asset_returns - (commission + slippage) * turnover
+    equity = initial_cash * np.cumprod(1 + strategy_returns, axis=0)
+
+    metrics = pd.DataFrame(
+        _performance_metrics(strategy_returns, equity, positions, initial_cash, periods_per_year, risk_free_rate),
+        index=columns
+    )
+
+    trades = None
+    if record_trades:
+        t, s = np.nonzero(turnover)
+        trades = pd.DataFrame({
+            'timestamp': np.asarray(index)[t],
+            'symbol': np.asarray(columns)[s],
+            'from_position': held[t, s],
+            'to_position': positions[t, s],
+            'price': prices[t, s],
+            'cost': (commission + slippage) * turnover[t, s] * np.where(t > 0, equity[t - 1, s], initial_cash),
+        })
+    return BacktestResult(index=index, symbols=columns, positions=positions, returns=strategy_returns,
+                          equity=equity, trades=trades, metrics=metrics)
+
+def sweep_sma_crossover(close, fast_windows: Iterable[int], slow_windows: Iterable[int],
+                        allow_short: bool = False, **backtest_kwargs) -> pd.DataFrame:
+    """
+    Backtest every (fast, slow) SMA crossover combination with fast < slow over the panel.
+    Each distinct window's SMA is computed once and reused across combinations.
+    Returns one metrics row per (fast, slow, symbol).
+    """
+    backtest_kwargs.setdefault('record_trades', False)
+    cache = {}
+    frames = []
+    for fast, slow in product(sorted(set(fast_windows)), sorted(set(slow_windows))):
+        if fast >= slow:
+            continue
+        positions = sma_crossover_positions(close, fast, slow, allow_short=allow_short, sma_cache=cache)
+        metrics = run_backtest(close, positions, **backtest_kwargs).metrics
+        metrics = metrics.rename_axis('symbol').reset_index()
+        metrics.insert(0, 'slow', slow)
+        metrics.insert(0, 'fast', fast)
+        frames.append(metrics)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
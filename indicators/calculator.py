@@ -1,10 +1,14 @@
 """
 Technical indicators calculation module.
-Implements SMA, EMA, RSI, MACD using Pandas.
+Implements SMA, EMA, RSI, MACD, Bollinger Bands and the OHLCV indicators (Donchian
+Channels, Stochastic, Williams %R, ATR, VWAP, OBV, breakouts) using Pandas.
 """
+from __future__ import annotations
 from typing import List, Dict, Tuple
-import pandas as pd
 import numpy as np
+from telemetry.startup import lazy_import
+
+pd = lazy_import("pandas") # imported on first use, not when the API module loads
 
 def calculate_sma(prices: pd.Series, window: int) -> pd.Series:
     """Calculate Simple Moving Average."""
@@ -45,6 +49,78 @@ def calculate_bollinger_bands(prices: pd.Series, window: int = 20, num_std: floa
     
     return sma, upper_band, lower_band
 
+# The OHLCV indicators below take a Series per column, or (time x symbols) DataFrames for a
+# whole panel at once. Rolling highs/lows use pandas' rolling max/min, which keep a
+# monotonic deque per column: O(n) in the number of bars whatever the window.
+
+def calculate_rolling_high_low(high: pd.Series, low: pd.Series, window: int) -> Tuple[pd.Series, pd.Series]:
+    """Highest high and lowest low of the last `window` bars, including the current one."""
+    return high.rolling(window=window).max(), low.rolling(window=window).min()
+
+def calculate_donchian_channels(high: pd.Series, low: pd.Series, window: int = 20) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """Calculate Donchian Channels (upper, middle, lower)."""
+    upper, lower = calculate_rolling_high_low(high, low, window)
+    return upper, (upper + lower) / 2, lower
+
+def calculate_stochastic(high: pd.Series, low: pd.Series, close: pd.Series,
+                         k_window: int = 14, d_window: int = 3) -> Tuple[pd.Series, pd.Series]:
+    """Calculate the Stochastic Oscillator (%K, %D). %K is NaN while the range is zero."""
+    highest, lowest = calculate_rolling_high_low(high, low, k_window)
+    k = 100 * (close - lowest) / (highest - lowest).replace(0, np.nan)
+    d = calculate_sma(k, d_window)
+    return k, d
+
+def calculate_williams_r(high: pd.Series, low: pd.Series, close: pd.Series, window: int = 14) -> pd.Series:
+    """Calculate Williams %R (-100..0). NaN while the range is zero."""
+    highest, lowest = calculate_rolling_high_low(high, low, window)
+    return -100 * (highest - close) / (highest - lowest).replace(0, np.nan)
+
+def calculate_true_range(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    """True range; the first bar has no previous close and uses high - low."""
+    previous = close.shift(1)
+    # fmax skips the NaN previous close of the first bar
+    return np.fmax(high - low, np.fmax((high - previous).abs(), (low - previous).abs()))
+
+def calculate_atr(high: pd.Series, low: pd.Series, close: pd.Series, window: int = 14) -> pd.Series:
+    """
+    Calculate Average True Range with Wilder's smoothing: the first value is the mean of
+    the first `window` true ranges, then atr = atr + (tr - atr) / window.
+    """
+    true_range = calculate_true_range(high, low, close)
+    seeded = true_range.copy()
+    seeded.iloc[:window - 1] = np.nan
+    if len(seeded) >= window:
+        seeded.iloc[window - 1] = true_range.iloc[:window].mean()
+    return seeded.ewm(alpha=1 / window, adjust=False).mean()
+
+def calculate_vwap(high: pd.Series, low: pd.Series, close: pd.Series, volume: pd.Series,
+                   daily: bool = True) -> pd.Series:
+    """
+    Calculate Volume Weighted Average Price of the typical price (h + l + c) / 3 from
+    cumulative sums. With `daily` and a DatetimeIndex the sums restart every day.
+    """
+    typical = (high + low + close) / 3
+    weighted = typical * volume
+    if daily and isinstance(close.index, pd.DatetimeIndex):
+        days = close.index.normalize()
+        return weighted.groupby(days).cumsum() / volume.groupby(days).cumsum()
+    return weighted.cumsum() / volume.cumsum()
+
+def calculate_obv(close: pd.Series, volume: pd.Series) -> pd.Series:
+    """Calculate On-Balance Volume, starting at 0 on the first bar."""
+    direction = np.sign(close.diff()).fillna(0)
+    return (direction * volume).cumsum()
+
+def calculate_breakouts(high: pd.Series, low: pd.Series, close: pd.Series, window: int = 20) -> pd.Series:
+    """
+    1 where the close breaks above the highest high of the previous `window` bars, -1
+    where it breaks below their lowest low, else 0; NaN until `window` bars precede it.
+    """
+    highest, lowest = calculate_rolling_high_low(high, low, window)
+    highest, lowest = highest.shift(1), lowest.shift(1)
+    signal = (close > highest).astype(float) - (close < lowest).astype(float)
+    return signal.where(highest.notna())
+
 def calculate_all_indicators(df: pd.DataFrame, symbol: str) -> Dict:
     """
     Calculate all technical indicators for a given dataframe.
@@ -0,0 +1,221 @@
+"""
+Universe-wide signal scanner.
+Keeps incremental SMA/RSI state for every tracked symbol in NumPy arrays so that each
+bar close is a handful of O(symbols) vector operations, detects SMA and RSI crossover
+events on the bar they happen, and answers ranked, filtered scans from that state.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+
+class SignalScanner:
+    """
+    Incremental SMA(fast)/SMA(slow) crossover and RSI(rsi_window) state for a symbol universe.
+    RSI follows calculate_rsi (simple rolling means of gains and losses). All symbols
+    advance together on each bar close; a symbol without a new close carries its last one.
+    """
+
+    def __init__(self, symbols: Sequence[str], fast: int = 10, slow: int = 50, rsi_window: int = 14,
+                 oversold: float = 30, overbought: float = 70):
+        if fast >= slow:
+            raise ValueError("fast window must be shorter than slow window")
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.fast, self.slow, self.rsi_window = fast, slow, rsi_window
+        self.oversold, self.overbought = oversold, overbought
+        n = len(self.symbols)
+
+        # Ring buffers: last `slow` closes and last `rsi_window` gains/losses per symbol
+        self._closes = np.zeros((n, slow))
+        self._gains = np.zeros((n, rsi_window))
+        self._losses = np.zeros((n, rsi_window))
+        self._fast_sum = np.zeros(n)
+        self._slow_sum = np.zeros(n)
+        self._gain_sum = np.zeros(n)
+        self._loss_sum = np.zeros(n)
+        self._last_close = np.full(n, np.nan)
+        self.bars = 0 # Number of bar closes applied
+        self.last_timestamp = None
+
+        self.sma_fast = np.full(n, np.nan)
+        self.sma_slow = np.full(n, np.nan)
+        self.rsi = np.full(n, np.nan)
+
+        # Most recent crossover events: bar number and direction (+1 bullish, -1 bearish)
+        self.sma_event_bar = np.full(n, -1, dtype=np.int64)
+        self.sma_event_dir = np.zeros(n, dtype=np.int8)
+        self.rsi_event_bar = np.full(n, -1, dtype=np.int64)
+        self.rsi_event_dir = np.zeros(n, dtype=np.int8)
+        self.event_timestamps: Dict[int, object] = {}
+
+    def seed(self, closes: np.ndarray, timestamps: Optional[Sequence] = None):
+        """Warm up from a (symbols, time) history panel, one vectorized update per bar."""
+        closes = np.asarray(closes, dtype=np.float64)
+        for t in range(closes.shape[1]):
+            self.update(closes[:, t], None if timestamps is None else timestamps[t])
+
+    def update_from_dict(self, closes: Dict[str, float], timestamp=None) -> List[dict]:
+        values = np.full(len(self.symbols), np.nan)
+        for symbol, close in closes.items():
+            i = self.index.get(symbol)
+            if i is not None:
+                values[i] = close
+        return self.update(values, timestamp)
+
+    def update(self, closes: np.ndarray, timestamp=None) -> List[dict]:
+        """Apply one bar close for the whole universe; returns the crossover events it triggered."""
+        closes = np.asarray(closes, dtype=np.float64)
+        missing = np.isnan(closes)
+        if missing.any():
+            closes = np.where(missing, self._last_close, closes)
+            if np.isnan(closes).any():
+                raise ValueError("every symbol needs a close on its first bar")
+        first = np.isnan(self._last_close)
+
+        t = self.bars
+        slot = t % self.slow
+        self._slow_sum += closes - self._closes[:, slot]
+        fast_slot = (t - self.fast) % self.slow
+        leaving_fast = self._closes[:, fast_slot] if t >= self.fast else 0.0
+        self._fast_sum += closes - leaving_fast
+        self._closes[:, slot] = closes
+
+        delta = np.where(first, 0.0, closes - self._last_close)
+        rslot = (t - 1) % self.rsi_window
+        if t >= 1:
+            gain, loss = np.maximum(delta, 0.0), np.maximum(-delta, 0.0)
+            self._gain_sum += gain - self._gains[:, rslot]
+            self._loss_sum += loss - self._losses[:, rslot]
+            self._gains[:, rslot], self._losses[:, rslot] = gain, loss
+        self._last_close = closes
+        self.bars = t + 1
+        self.last_timestamp = timestamp
+        if self.bars % (self.slow * 64) == 0:
+            self._resum()
+
+        prev_spread = self.sma_fast - self.sma_slow
+        prev_rsi = self.rsi
+        self.sma_fast = self._fast_sum / self.fast if self.bars >= self.fast else np.full_like(closes, np.nan)
+        self.sma_slow = self._slow_sum / self.slow if self.bars >= self.slow else np.full_like(closes, np.nan)
+        if self.bars > self.rsi_window:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                rs = self._gain_sum / self._loss_sum
+                self.rsi = 100 - 100 / (1 + rs)
+        return self._detect_events(prev_spread, prev_rsi, timestamp)
+
+    def _resum(self):
+        # Recompute the running sums from the buffers to shed floating-point drift
+        t = self.bars
+        self._slow_sum = self._closes.sum(axis=1)
+        fast_slots = [(t - 1 - k) % self.slow for k in range(self.fast)]
+        self._fast_sum = self._closes[:, fast_slots].sum(axis=1)
+        self._gain_sum = self._gains.sum(axis=1)
+        self._loss_sum = self._losses.sum(axis=1)
+
+    def _detect_events(self, prev_spread, prev_rsi, timestamp) -> List[dict]:
+        bar = self.bars - 1
+        spread = self.sma_fast - self.sma_slow
+        golden = (prev_spread <= 0) & (spread > 0)
+        death = (prev_spread >= 0) & (spread < 0)
+        into_oversold = (prev_rsi >= self.oversold) & (self.rsi < self.oversold)
+        into_overbought = (prev_rsi <= self.overbought) & (self.rsi > self.overbought)
+
+        sma_cross = golden | death
+        self.sma_event_bar[sma_cross] = bar
+        self.sma_event_dir[sma_cross] = np.where(golden, 1, -1)[sma_cross]
+        rsi_cross = into_oversold | into_overbought
+        self.rsi_event_bar[rsi_cross] = bar
+        self.rsi_event_dir[rsi_cross] = np.where(into_oversold, 1, -1)[rsi_cross]
+
+        if not (sma_cross.any() or rsi_cross.any()):
+            return []
+        self.event_timestamps[bar] = timestamp
+        # Only timestamps of bars that may still be reported are needed
+        for old in [b for b in self.event_timestamps if b < bar - 1024]:
+            del self.event_timestamps[old]
+        events = []
+        for i in np.flatnonzero(sma_cross):
+            events.append(self._signal(i, 'sma_crossover', int(self.sma_event_dir[i]), True))
+        for i in np.flatnonzero(rsi_cross):
+            events.append(self._signal(i, 'rsi', int(self.rsi_event_dir[i]), True))
+        return events
+
+    def _strength(self, indicator: str, i=slice(None)):
+        if indicator == 'sma_crossover':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.abs(self.sma_fast[i] - self.sma_slow[i]) / self.sma_slow[i] * 100
+        return np.maximum(self.oversold - self.rsi[i], self.rsi[i] - self.overbought)
+
+    def _signal(self, i: int, indicator: str, direction: int, event: bool) -> dict:
+        if indicator == 'sma_crossover':
+            message = "Golden Cross detected" if direction > 0 else "Death Cross detected"
+            event_bar = self.sma_event_bar[i]
+        else:
+            label = "oversold" if direction > 0 else "overbought"
+            message = f"RSI {label} ({round(float(self.rsi[i]), 2)})"
+            event_bar = self.rsi_event_bar[i]
+        return {
+            "symbol": self.symbols[i],
+            "type": "bullish" if direction > 0 else "bearish",
+            "indicator": indicator,
+            "message": message,
+            "strength": round(float(self._strength(indicator, i)), 4),
+            "event": event,
+            "event_timestamp": self.event_timestamps.get(int(event_bar)) if event else None,
+            "indicators": {
+                "sma_fast": round(float(self.sma_fast[i]), 2),
+                "sma_slow": round(float(self.sma_slow[i]), 2),
+                "rsi": round(float(self.rsi[i]), 2)
+            }
+        }
+
+    def scan(self, signal_type: Optional[str] = None, indicators: Optional[Iterable[str]] = None,
+             events_only: bool = False, lookback: int = 1, min_strength: float = 0.0,
+             symbols: Optional[Iterable[str]] = None, limit: int = 50) -> List[dict]:
+        """
+        Current signals across the universe, ranked by crossover events within the last
+        `lookback` bars first and then by strength (SMA spread in %, or RSI distance beyond
+        its threshold). Filtering and ranking are vectorized; dicts are only built for
+        the returned rows.
+        """
+        wanted = set(indicators) if indicators else {'sma_crossover', 'rsi'}
+        mask_symbols = np.ones(len(self.symbols), dtype=bool)
+        if symbols is not None:
+            mask_symbols[:] = False
+            mask_symbols[[self.index[s] for s in symbols if s in self.index]] = True
+        recent = self.bars - lookback
+
+        candidates = [] # (indicator, symbol indices, directions, is_event, strengths)
+        if 'sma_crossover' in wanted:
+            direction = np.sign(self.sma_fast - self.sma_slow)
+            event = (self.sma_event_bar >= recent) & (self.sma_event_dir == direction)
+            candidates.append(('sma_crossover', direction, event, self._strength('sma_crossover')))
+        if 'rsi' in wanted:
+            direction = np.where(self.rsi < self.oversold, 1, np.where(self.rsi > self.overbought, -1, 0))
+            event = (self.rsi_event_bar >= recent) & (self.rsi_event_dir == direction)
+            candidates.append(('rsi', direction, event, self._strength('rsi')))
+
+        rows = []
+        for indicator, direction, event, strength in candidates:
+            keep = mask_symbols & (direction != 0) & ~np.isnan(strength) & (strength >= min_strength)
+            if signal_type == 'bullish':
+                keep &= direction > 0
+            elif signal_type == 'bearish':
+                keep &= direction < 0
+            if events_only:
+                keep &= event
+            idx = np.flatnonzero(keep)
+            rows.append((indicator, idx, direction[idx], event[idx], strength[idx]))
+
+        if not rows:
+            return []
+        all_strength = np.concatenate([r[4] for r in rows])
+        all_event = np.concatenate([r[3] for r in rows])
+        order = np.lexsort((-all_strength, ~all_event))[:limit]
+        offsets = np.cumsum([0] + [len(r[1]) for r in rows])
+        results = []
+        for k in order:
+            group = np.searchsorted(offsets, k, side='right') - 1
+            indicator, idx, direction, event, _ = rows[group]
+            j = k - offsets[group]
+            results.append(self._signal(int(idx[j]), indicator, int(direction[j]), bool(event[j])))
+        return results
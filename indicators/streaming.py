@@ -0,0 +1,356 @@
+"""
+Streaming (one value at a time) versions of the calculator indicators.
+Each indicator is O(1) per update (amortized for the rolling max/min, which keep a
+monotonic deque) and matches the last value of its pandas counterpart in calculator.py.
+peek(price) returns the value the indicator would have if the bar currently forming
+closed at `price`, without committing it, so live ticks can be evaluated against
+indicator thresholds between bar closes. The OHLCV indicators take the bar's fields
+instead of a single price, one instance per symbol.
+"""
+from collections import deque
+from typing import Iterable, Optional, Tuple
+import math
+
+class StreamingSMA:
+    """Simple Moving Average, equivalent to calculate_sma(prices, window).iloc[-1]."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque(maxlen=window)
+        self._sum = 0.0
+
+    def update(self, price: float) -> Optional[float]:
+        if len(self._values) == self.window:
+            self._sum -= self._values[0]
+        self._values.append(price)
+        self._sum += price
+        return self.value
+
+    def peek(self, price: float) -> Optional[float]:
+        if len(self._values) < self.window - 1:
+            return None
+        total = self._sum + price
+        if len(self._values) == self.window:
+            total -= self._values[0]
+        return total / self.window
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._sum / self.window if len(self._values) == self.window else None
+
+class StreamingEMA:
+    """Exponential Moving Average, equivalent to calculate_ema(prices, window).iloc[-1]."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.value = None
+
+    def update(self, price: float) -> float:
+        self.value = self.peek(price)
+        return self.value
+
+    def peek(self, price: float) -> float:
+        if self.value is None:
+            return price
+        return self.value + self.alpha * (price - self.value)
+
+class StreamingRSI:
+    """Relative Strength Index, equivalent to calculate_rsi(prices, window).iloc[-1]."""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self._gains = deque(maxlen=window)
+        self._losses = deque(maxlen=window)
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._last = None
+
+    @staticmethod
+    def _rsi(gain_sum: float, loss_sum: float) -> float:
+        if loss_sum == 0:
+            return 100.0 if gain_sum > 0 else math.nan
+        return 100 - 100 / (1 + gain_sum / loss_sum)
+
+    def update(self, price: float) -> Optional[float]:
+        if self._last is not None:
+            delta = price - self._last
+            if len(self._gains) == self.window:
+                self._gain_sum -= self._gains[0]
+                self._loss_sum -= self._losses[0]
+            self._gains.append(max(delta, 0.0))
+            self._losses.append(max(-delta, 0.0))
+            self._gain_sum += self._gains[-1]
+            self._loss_sum += self._losses[-1]
+        self._last = price
+        return self.value
+
+    def peek(self, price: float) -> Optional[float]:
+        if self._last is None or len(self._gains) < self.window - 1:
+            return None
+        delta = price - self._last
+        gain_sum = self._gain_sum + max(delta, 0.0)
+        loss_sum = self._loss_sum + max(-delta, 0.0)
+        if len(self._gains) == self.window:
+            gain_sum -= self._gains[0]
+            loss_sum -= self._losses[0]
+        return self._rsi(max(gain_sum, 0.0), max(loss_sum, 0.0))
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self._gains) < self.window:
+            return None
+        return self._rsi(max(self._gain_sum, 0.0), max(self._loss_sum, 0.0))
+
+class _StreamingExtremum:
+    """
+    Rolling max/min over a monotonic deque of (bar index, value): a value that is
+    dominated by a newer one can never be the extremum again, so it is dropped on arrival
+    and the front of the deque is always the extremum of the window.
+    """
+    _pick = staticmethod(max)
+
+    def __init__(self, window: int):
+        self.window = window
+        self._deque = deque()
+        self._count = 0
+
+    def update(self, value: float) -> Optional[float]:
+        while self._deque and self._pick(self._deque[-1][1], value) == value:
+            self._deque.pop()
+        self._deque.append((self._count, value))
+        self._count += 1
+        while self._deque[0][0] <= self._count - 1 - self.window:
+            self._deque.popleft()
+        return self.value
+
+    def peek(self, value: float) -> Optional[float]:
+        if self._count < self.window - 1:
+            return None
+        oldest = self._count - self.window + 1 # first index still in the window after an update
+        for index, kept in self._deque: # the front may be the one value that drops out
+            if index >= oldest:
+                return self._pick(kept, value)
+        return value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._deque[0][1] if self._count >= self.window else None
+
+class StreamingMax(_StreamingExtremum):
+    """Rolling maximum, equivalent to values.rolling(window).max().iloc[-1]."""
+    _pick = staticmethod(max)
+
+class StreamingMin(_StreamingExtremum):
+    """Rolling minimum, equivalent to values.rolling(window).min().iloc[-1]."""
+    _pick = staticmethod(min)
+
+def _ratio(numerator: float, denominator: float) -> float:
+    # The pandas versions turn a zero range into NaN
+    return numerator / denominator if denominator != 0 else math.nan
+
+class StreamingDonchian:
+    """Donchian Channels (upper, middle, lower), equivalent to calculate_donchian_channels()."""
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self._high = StreamingMax(window)
+        self._low = StreamingMin(window)
+
+    @staticmethod
+    def _channels(upper, lower) -> Optional[Tuple[float, float, float]]:
+        return None if upper is None else (upper, (upper + lower) / 2, lower)
+
+    def update(self, high: float, low: float) -> Optional[Tuple[float, float, float]]:
+        return self._channels(self._high.update(high), self._low.update(low))
+
+    def peek(self, high: float, low: float) -> Optional[Tuple[float, float, float]]:
+        return self._channels(self._high.peek(high), self._low.peek(low))
+
+    @property
+    def value(self) -> Optional[Tuple[float, float, float]]:
+        return self._channels(self._high.value, self._low.value)
+
+class StreamingStochastic:
+    """Stochastic Oscillator (%K, %D), equivalent to calculate_stochastic(); None while warming up."""
+
+    def __init__(self, k_window: int = 14, d_window: int = 3):
+        self.k_window = k_window
+        self.d_window = d_window
+        self._high = StreamingMax(k_window)
+        self._low = StreamingMin(k_window)
+        # Summed on demand (d_window is small) so a NaN %K leaves the window again
+        self._ks = deque(maxlen=d_window)
+
+    @staticmethod
+    def _k(highest, lowest, close) -> Optional[float]:
+        return None if highest is None else 100 * _ratio(close - lowest, highest - lowest)
+
+    def _d(self, ks) -> Optional[float]:
+        return sum(ks) / self.d_window if len(ks) == self.d_window else None
+
+    def update(self, high: float, low: float, close: float) -> Tuple[Optional[float], Optional[float]]:
+        k = self._k(self._high.update(high), self._low.update(low), close)
+        if k is not None:
+            self._ks.append(k)
+        return self.value
+
+    def peek(self, high: float, low: float, close: float) -> Tuple[Optional[float], Optional[float]]:
+        k = self._k(self._high.peek(high), self._low.peek(low), close)
+        if k is None:
+            return None, None
+        ks = list(self._ks)
+        if len(ks) == self.d_window:
+            ks = ks[1:]
+        return k, self._d(ks + [k])
+
+    @property
+    def value(self) -> Tuple[Optional[float], Optional[float]]:
+        if self._high.value is None:
+            return None, None
+        return self._ks[-1], self._d(self._ks)
+
+class StreamingWilliamsR:
+    """Williams %R, equivalent to calculate_williams_r(high, low, close, window).iloc[-1]."""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self._high = StreamingMax(window)
+        self._low = StreamingMin(window)
+        self.value = None
+
+    @staticmethod
+    def _williams_r(highest, lowest, close) -> Optional[float]:
+        return None if highest is None else -100 * _ratio(highest - close, highest - lowest)
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        self.value = self._williams_r(self._high.update(high), self._low.update(low), close)
+        return self.value
+
+    def peek(self, high: float, low: float, close: float) -> Optional[float]:
+        return self._williams_r(self._high.peek(high), self._low.peek(low), close)
+
+class StreamingATR:
+    """Average True Range (Wilder), equivalent to calculate_atr(high, low, close, window).iloc[-1]."""
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.value = None
+        self._previous_close = None
+        self._seed_sum = 0.0 # sum of the first `window` true ranges
+        self._count = 0
+
+    def _true_range(self, high: float, low: float) -> float:
+        if self._previous_close is None:
+            return high - low
+        return max(high - low, abs(high - self._previous_close), abs(low - self._previous_close))
+
+    def _next(self, true_range: float) -> Optional[float]:
+        if self.value is not None:
+            return self.value + (true_range - self.value) / self.window
+        if self._count + 1 == self.window:
+            return (self._seed_sum + true_range) / self.window
+        return None
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        true_range = self._true_range(high, low)
+        value = self._next(true_range)
+        if self.value is None:
+            self._seed_sum += true_range
+        self.value = value
+        self._count += 1
+        self._previous_close = close
+        return self.value
+
+    def peek(self, high: float, low: float, close: float) -> Optional[float]:
+        return self._next(self._true_range(high, low))
+
+class StreamingVWAP:
+    """
+    Volume Weighted Average Price from running sums, equivalent to calculate_vwap(). With
+    `daily`, the sums restart when the date of the bar's timestamp changes.
+    """
+
+    def __init__(self, daily: bool = True):
+        self.daily = daily
+        self._weighted = 0.0
+        self._volume = 0.0
+        self._date = None
+        self.value = None
+
+    def _sums(self, high, low, close, volume, timestamp) -> Tuple[float, float]:
+        weighted, total = self._weighted, self._volume
+        if self.daily and timestamp is not None and timestamp.date() != self._date:
+            weighted, total = 0.0, 0.0
+        return weighted + (high + low + close) / 3 * volume, total + volume
+
+    def update(self, high: float, low: float, close: float, volume: float, timestamp=None) -> float:
+        self._weighted, self._volume = self._sums(high, low, close, volume, timestamp)
+        if timestamp is not None:
+            self._date = timestamp.date()
+        self.value = _ratio(self._weighted, self._volume)
+        return self.value
+
+    def peek(self, high: float, low: float, close: float, volume: float, timestamp=None) -> float:
+        return _ratio(*self._sums(high, low, close, volume, timestamp))
+
+class StreamingOBV:
+    """On-Balance Volume, equivalent to calculate_obv(close, volume).iloc[-1]."""
+
+    def __init__(self):
+        self.value = None
+        self._previous_close = None
+
+    def peek(self, close: float, volume: float) -> float:
+        if self.value is None:
+            return 0.0
+        if close > self._previous_close:
+            return self.value + volume
+        if close < self._previous_close:
+            return self.value - volume
+        return self.value
+
+    def update(self, close: float, volume: float) -> float:
+        self.value = self.peek(close, volume)
+        self._previous_close = close
+        return self.value
+
+class StreamingBreakout:
+    """
+    1 / -1 / 0 for a close above the previous `window` bars' highest high / below their
+    lowest low / inside, equivalent to calculate_breakouts(); None while warming up.
+    """
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self._high = StreamingMax(window)
+        self._low = StreamingMin(window)
+        self.value = None
+
+    def peek(self, high: float, low: float, close: float) -> Optional[int]:
+        # Compared with the window before this bar
+        highest, lowest = self._high.value, self._low.value
+        if highest is None:
+            return None
+        return 1 if close > highest else -1 if close < lowest else 0
+
+    def update(self, high: float, low: float, close: float) -> Optional[int]:
+        self.value = self.peek(high, low, close)
+        self._high.update(high)
+        self._low.update(low)
+        return self.value
+
+STREAMING_INDICATORS = {
+    'sma': StreamingSMA,
+    'ema': StreamingEMA,
+    'rsi': StreamingRSI,
+}
+
+def create_indicator(name: str, window: int, history: Iterable[float] = ()):
+    """Build a streaming indicator by name ('sma', 'ema', 'rsi') and warm it up on `history`."""
+    if name not in STREAMING_INDICATORS:
+        raise ValueError(f"Unknown streaming indicator: {name}")
+    indicator = STREAMING_INDICATORS[name](window)
+    for price in history:
+        indicator.update(price)
+    return indicator
@@ -0,0 +1,380 @@
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict, defaultdict
+
+from portfolio import PortfolioManager
+from execution import ExecutionEngine
+from pnl import PnLCalculator
+from orders import OrderType, OrderSide
+from journal import Journal, dumps, loads, write_snapshot, load_latest_snapshot
+
+DEFAULT_ACCOUNT_ID = "default"
+
+# Account ids double as file names for evicted accounts, so keep them to a safe alphabet.
+ACCOUNT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}$")
+
+def validate_account_id(account_id):
+    if not isinstance(account_id, str) or not ACCOUNT_ID_PATTERN.match(account_id):
+        raise ValueError(f"Invalid account id: {account_id!r}")
+    return account_id
+
+def shard_index(account_id, num_shards):
+    # crc32 is stable across processes and restarts, unlike hash() on str
+    return zlib.crc32(account_id.encode("utf-8")) % num_shards
+
+
+class Account:
+    """One independent paper-trading account: portfolio, execution engine and P&L."""
+
+    def __init__(self, account_id, initial_cash=100000.0):
+        self.account_id = account_id
+        self.initial_cash = initial_cash
+        self.portfolio_manager = PortfolioManager(initial_cash=initial_cash)
+        self.execution_engine = ExecutionEngine(self.portfolio_manager)
+        self.pnl_calculator = PnLCalculator(self.portfolio_manager)
+        self.last_active = time.monotonic()
+        self.last_seq = 0 # Journal sequence number of the last command applied to this account
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def get_state(self):
+        return {
+            'account_id': self.account_id,
+            'initial_cash': self.initial_cash,
+            'last_seq': self.last_seq,
+            'portfolio': self.portfolio_manager.get_state(),
+            'execution': self.execution_engine.get_state()
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        account = cls(state['account_id'], state.get('initial_cash', 100000.0))
+        account.portfolio_manager.load_state(state['portfolio'])
+        account.execution_engine.load_state(state['execution'])
+        account.last_seq = state.get('last_seq', 0)
+        return account
+
+
+class AccountShard:
+    """
+    Holds the resident accounts for one slice of the account id space.
+    Accounts are created lazily on first access. Idle accounts without open orders are
+    evicted to disk (least recently used first) and transparently reloaded when needed.
+
+    With journaling enabled every state-changing command is appended to the shard's
+    journal, and every snapshot_every commands the resident accounts are written to a
+    snapshot so the journal can be truncated. Each account records the sequence number of
+    the last command it applied, which lets recovery replay the journal tail on top of the
+    snapshot and evicted-account files without applying anything twice.
+    """
+
+    def __init__(self, shard_id, state_dir, max_resident=5000, idle_timeout=900.0, initial_cash=100000.0,
+                 journaling=True, fsync=True, snapshot_every=50000):
+        self.shard_id = shard_id
+        self.state_dir = os.path.join(state_dir, f"shard-{shard_id}")
+        self.max_resident = max_resident
+        self.idle_timeout = idle_timeout
+        self.initial_cash = initial_cash
+        self.accounts = OrderedDict() # {account_id: Account}, least recently used first
+        self.symbol_index = defaultdict(set) # {symbol: {account_id}} of accounts with open orders
+        self._indexed_symbols = {} # {account_id: set of symbols currently in symbol_index}
+        self.evictions = 0
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.journal = Journal(self.state_dir, fsync=fsync) if journaling else None
+        self.snapshot_every = snapshot_every
+        self.snapshot_seq = 0
+        self.commands_since_snapshot = 0
+
+    def _path(self, account_id):
+        return os.path.join(self.state_dir, f"{account_id}.json")
+
+    def get_account(self, account_id, create=True):
+        account = self.accounts.get(account_id)
+        if account is None:
+            account = self._load(account_id)
+            if account is None:
+                if not create:
+                    return None
+                account = Account(account_id, initial_cash=self.initial_cash)
+            self.accounts[account_id] = account
+            self.reindex(account)
+        else:
+            self.accounts.move_to_end(account_id)
+        account.touch()
+        self.evict_idle(keep=account_id)
+        return account
+
+    def _load(self, account_id):
+        path = self._path(account_id)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return Account.from_state(loads(f.read()))
+
+    def _write(self, account):
+        path = self._path(account.account_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(dumps(account.get_state()))
+        os.replace(tmp_path, path)
+
+    def reindex(self, account):
+        """Refresh symbol_index after an account's open orders changed."""
+        account_id = account.account_id
+        old_symbols = self._indexed_symbols.get(account_id, set())
+        new_symbols = account.execution_engine.get_open_symbols()
+        for symbol in old_symbols - new_symbols:
+            self.symbol_index[symbol].discard(account_id)
+            if not self.symbol_index[symbol]:
+                del self.symbol_index[symbol]
+        for symbol in new_symbols - old_symbols:
+            self.symbol_index[symbol].add(account_id)
+        if new_symbols:
+            self._indexed_symbols[account_id] = new_symbols
+        else:
+            self._indexed_symbols.pop(account_id, None)
+
+    def evict_idle(self, now=None, max_scan=64, keep=None):
+        """
+        Evict least recently used accounts while the shard is over capacity or they have
+        been idle longer than idle_timeout. Accounts with open orders stay resident so they
+        keep receiving market data, as does `keep` (the account being handed out).
+        Scans at most max_scan accounts per call.
+        """
+        now = time.monotonic() if now is None else now
+        for _ in range(min(max_scan, len(self.accounts))):
+            account_id, account = next(iter(self.accounts.items()))
+            if account_id == keep:
+                break
+            over_capacity = len(self.accounts) > self.max_resident
+            idle = now - account.last_active > self.idle_timeout
+            if not (over_capacity or idle):
+                break
+            if account_id in self._indexed_symbols:
+                # Pinned by open orders; rotate it behind the eviction candidates
+                self.accounts.move_to_end(account_id)
+                continue
+            self.evict(account_id)
+
+    def evict(self, account_id):
+        account = self.accounts.pop(account_id, None)
+        if account is not None:
+            # The file must not get ahead of the durable journal
+            self.commit_journal()
+            self._write(account)
+            self.evictions += 1
+
+    def flush(self):
+        """Persist every resident account (e.g. on shutdown)."""
+        if self.journal is not None:
+            self.snapshot()
+            self.journal.close()
+        else:
+            for account in self.accounts.values():
+                self._write(account)
+
+    def _record(self, kind, accounts, payload):
+        if self.journal is None:
+            return
+        seq = self.journal.append(kind, payload)
+        for account in accounts:
+            account.last_seq = seq
+        self.commands_since_snapshot += 1
+
+    def commit_journal(self):
+        """Makes all recorded commands durable; called once per sequencer batch."""
+        if self.journal is not None:
+            self.journal.commit()
+
+    def maybe_snapshot(self):
+        if self.journal is not None and self.commands_since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self):
+        self.journal.commit()
+        seq = self.journal.last_seq
+        write_snapshot(self.state_dir, seq, [account.get_state() for account in self.accounts.values()])
+        self.journal.rotate(seq)
+        self.snapshot_seq = seq
+        self.commands_since_snapshot = 0
+
+    def recover(self):
+        """Loads the latest snapshot and replays the journal tail after it."""
+        seq, states = load_latest_snapshot(self.state_dir)
+        for state in states:
+            account = Account.from_state(state)
+            self.accounts[account.account_id] = account
+            self.reindex(account)
+        self.snapshot_seq = seq
+        replayed = 0
+        for record_seq, kind, payload in self.journal.replay(after_seq=seq):
+            self._replay(record_seq, kind, payload)
+            replayed += 1
+        self.commands_since_snapshot = replayed
+        return replayed
+
+    def _replay(self, seq, kind, payload):
+        if kind == "tick":
+            for account_id in list(self.symbol_index.get(payload['symbol'], ())):
+                account = self.accounts[account_id]
+                if account.last_seq < seq:
+                    account.execution_engine.process_market_data(
+                        payload['timestamp'], payload['symbol'], payload['current_price'],
+                        payload['bid_price'], payload['ask_price']
+                    )
+                    account.last_seq = seq
+                    self.reindex(account)
+            return
+        account = self.get_account(payload['account_id'], create=(kind == "place"))
+        if account is None or account.last_seq >= seq:
+            return
+        if kind == "place":
+            account.execution_engine.place_order(
+                symbol=payload['symbol'], order_type=OrderType(payload['order_type']),
+                side=OrderSide(payload['side']), quantity=payload['quantity'], price=payload['price'],
+                stop_price=payload['stop_price'], timestamp=payload['timestamp'], order_id=payload['order_id']
+            )
+        elif kind == "cancel":
+            account.execution_engine.cancel_order(payload['order_id'])
+        account.last_seq = seq
+        self.reindex(account)
+
+    def place_order(self, account_id, **order):
+        account = self.get_account(account_id)
+        order_id = account.execution_engine.place_order(**order)
+        self.reindex(account)
+        self._record("place", [account], {
+            'account_id': account_id,
+            'order_id': order_id,
+            'symbol': order['symbol'],
+            'order_type': order['order_type'].value,
+            'side': order['side'].value,
+            'quantity': order['quantity'],
+            'price': order.get('price'),
+            'stop_price': order.get('stop_price'),
+            'timestamp': order.get('timestamp')
+        })
+        return order_id
+
+    def cancel_order(self, account_id, order_id):
+        account = self.get_account(account_id, create=False)
+        if account is None:
+            return False
+        success = account.execution_engine.cancel_order(order_id)
+        self.reindex(account)
+        if success:
+            self._record("cancel", [account], {'account_id': account_id, 'order_id': order_id})
+        return success
+
+    def process_market_data(self, timestamp, symbol, current_price, bid_price=None, ask_price=None):
+        # Only accounts with open orders on this symbol need to see the tick
+        results = {}
+        touched = []
+        for account_id in list(self.symbol_index.get(symbol, ())):
+            account = self.accounts[account_id]
+            filled = account.execution_engine.process_market_data(
+                timestamp=timestamp, symbol=symbol, current_price=current_price,
+                bid_price=bid_price, ask_price=ask_price
+            )
+            self.reindex(account)
+            touched.append(account)
+            if filled:
+                results[account_id] = filled
+        if touched:
+            self._record("tick", touched, {
+                'timestamp': timestamp, 'symbol': symbol, 'current_price': current_price,
+                'bid_price': bid_price, 'ask_price': ask_price
+            })
+        return results
+
+    def stats(self):
+        return {
+            'shard_id': self.shard_id,
+            'resident_accounts': len(self.accounts),
+            'accounts_with_open_orders': len(self._indexed_symbols),
+            # Accounts with open orders are never evicted, so the resident ones hold them all
+            'open_orders': sum(len(self.accounts[account_id].execution_engine.open_orders)
+                               for account_id in self._indexed_symbols),
+            'evictions': self.evictions,
+            'journal_seq': self.journal.last_seq if self.journal is not None else None,
+            'snapshot_seq': self.snapshot_seq
+        }
+
+
+class AccountRegistry:
+    """
+    Routes account ids to shards. Within a process accounts are spread over num_shards
+    AccountShards; across processes, process_count/process_index select which slice of
+    the account id space this process serves (a front proxy routes by the same hash).
+    """
+
+    def __init__(self, state_dir, num_shards=8, max_resident=5000, idle_timeout=900.0,
+                 initial_cash=100000.0, process_index=0, process_count=1,
+                 journaling=True, fsync=True, snapshot_every=50000):
+        if not 0 <= process_index < process_count:
+            raise ValueError("process_index must be in [0, process_count)")
+        self.num_shards = num_shards
+        self.process_index = process_index
+        self.process_count = process_count
+        per_shard = max(1, max_resident // num_shards)
+        self.shards = [
+            AccountShard(i, state_dir, max_resident=per_shard, idle_timeout=idle_timeout, initial_cash=initial_cash,
+                         journaling=journaling, fsync=fsync, snapshot_every=snapshot_every)
+            for i in range(num_shards)
+        ]
+        if journaling:
+            for shard in self.shards:
+                shard.recover()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            state_dir=os.getenv("PAPER_TRADING_STATE_DIR", "paper_trading_state"),
+            num_shards=int(os.getenv("PAPER_TRADING_SHARDS", "8")),
+            max_resident=int(os.getenv("PAPER_TRADING_MAX_RESIDENT", "20000")),
+            idle_timeout=float(os.getenv("PAPER_TRADING_IDLE_SECONDS", "900")),
+            initial_cash=float(os.getenv("PAPER_TRADING_INITIAL_CASH", "100000")),
+            process_index=int(os.getenv("PAPER_TRADING_PROCESS_INDEX", "0")),
+            process_count=int(os.getenv("PAPER_TRADING_PROCESS_COUNT", "1")),
+            journaling=os.getenv("PAPER_TRADING_JOURNAL", "1") == "1",
+            fsync=os.getenv("PAPER_TRADING_FSYNC", "1") == "1",
+            snapshot_every=int(os.getenv("PAPER_TRADING_SNAPSHOT_EVERY", "50000"))
+        )
+
+    def owns(self, account_id):
+        return shard_index(account_id, self.process_count) == self.process_index
+
+    def shard_for(self, account_id):
+        validate_account_id(account_id)
+        # Mix in the process count so in-process shards stay balanced after process routing
+        key = f"{account_id}/{self.process_count}"
+        return self.shards[shard_index(key, self.num_shards)]
+
+    def get_account(self, account_id, create=True):
+        return self.shard_for(account_id).get_account(account_id, create=create)
+
+    def place_order(self, account_id, **order):
+        return self.shard_for(account_id).place_order(account_id, **order)
+
+    def cancel_order(self, account_id, order_id):
+        return self.shard_for(account_id).cancel_order(account_id, order_id)
+
+    def process_market_data(self, timestamp, symbol, current_price, bid_price=None, ask_price=None):
+        results = {}
+        for shard in self.shards:
+            results.update(shard.process_market_data(timestamp, symbol, current_price, bid_price, ask_price))
+        return results
+
+    def flush(self):
+        for shard in self.shards:
+            shard.flush()
+
+    def stats(self):
+        return {
+            'process_index': self.process_index,
+            'process_count': self.process_count,
+            'shards': [shard.stats() for shard in self.shards]
+        }
@@ -1,54 +1,109 @@
+import time
 import uvicorn # Using FastAPI for API
-from fastapi import FastAPI, HTTPException, Request
-from portfolio import PortfolioManager
-from execution import ExecutionEngine
-from pnl import PnLCalculator
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from orders import OrderType, OrderSide
+from accounts import AccountRegistry, DEFAULT_ACCOUNT_ID, validate_account_id
+from sequencer import SequencedRegistry, ShardUnavailable
+from contextlib import asynccontextmanager
 from typing import Dict, Any
+from telemetry.metrics import CONTENT_TYPE, REGISTRY, Counter, Gauge, Histogram, MetricsMiddleware # repository root on PYTHONPATH
 
 # This API is a minimal example and would typically be part of a larger application
 # or integrated with a signal generation service.
 
-# Assume these are initialized globally or passed in a real application context
-# For this skeleton, we'll create them here.
-# In a real app, these would be managed and passed appropriately.
-# Example:
-# portfolio_manager = PortfolioManager(initial_cash=100000.0)
-# execution_engine = ExecutionEngine(portfolio_manager)
-# pnl_calculator = PnLCalculator(portfolio_manager)
-
-# For demonstration purposes, we'll define placeholder objects
-# In a real scenario, the FastAPI app would likely be initialized elsewhere
-# and these services would be dependency-injected or globally accessible.
-
-app = FastAPI()
-
-# Placeholder for services - this would be a real instance in a running app
-class MockServices:
-    def __init__(self):
-        self.portfolio_manager = PortfolioManager(initial_cash=100000.0)
-        self.execution_engine = ExecutionEngine(self.portfolio_manager)
-        self.pnl_calculator = PnLCalculator(self.portfolio_manager)
-
-# Global or managed instance of services
-# In a real application, use dependency injection.
-# This is a simplified approach for a skeleton.
-services = MockServices()
+# Accounts live in a sharded registry instead of one global portfolio/engine pair.
+# Every route exists twice: under /accounts/{account_id}/... and at its original path,
+# which keeps serving the DEFAULT_ACCOUNT_ID account for existing signal generators.
+# Accounts are created lazily on first use and idle ones are evicted to disk
+# (see accounts.py for the PAPER_TRADING_* environment settings).
+#
+# Handlers never touch account state directly: each shard has a single-writer sequencer
+# thread that applies place/cancel/tick/read commands in queue order, and the async
+# handlers await the result. This keeps orders and cash free of races without locks.
+registry = AccountRegistry.from_env()
+services = SequencedRegistry(registry)
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # Drain the sequencers and persist resident accounts on shutdown
+    services.stop()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, prefix="paper_trading")
+
+@app.exception_handler(ShardUnavailable)
+async def shard_unavailable(request: Request, exc: ShardUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+tick_seconds = Histogram("paper_trading_tick_seconds", "Time from receiving a tick to all shards having applied it")
+orders_filled = Counter("paper_trading_orders_filled", "Orders filled or rejected by market data ticks")
+open_orders = Gauge("paper_trading_open_orders", "Open orders per shard", ("shard",))
+resident_accounts = Gauge("paper_trading_resident_accounts", "Accounts loaded in memory per shard", ("shard",))
+sequencer_queue = Gauge("paper_trading_sequencer_queue_depth", "Commands waiting for a shard sequencer", ("shard",))
+sequencer_batches = Counter("paper_trading_sequencer_batches", "Batches applied per shard sequencer", ("shard",))
+for _sequencer in services.sequencers:
+    _shard = _sequencer.shard.shard_id
+    sequencer_queue.labels(_shard).set_function(_sequencer._queue.qsize)
+    sequencer_batches.labels(_shard).set_function(lambda s=_sequencer: s.batches)
+
+def check_account_id(account_id):
+    """Validates the account id and checks this process serves it."""
+    try:
+        validate_account_id(account_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not registry.owns(account_id):
+        raise HTTPException(status_code=421, detail=f"Account {account_id} is served by another process.")
+
+async def read_account(account_id, fn, create=True):
+    """Runs fn(account) on the account's shard sequencer; 404 if it does not exist and create=False."""
+    check_account_id(account_id)
+    def guarded(account):
+        return None if account is None else (fn(account),)
+    result = await services.read(account_id, guarded, create=create)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Account {account_id} not found.")
+    return result[0]
 
 @app.get("/")
 def read_root():
     return {"message": "Paper Trading Engine API"}
 
+@app.get("/ready")
+def ready():
+    """503 once a shard sequencer stopped after failing to persist a batch."""
+    failed = services.failed()
+    body = {"ready": not failed, "failed_shards": {str(shard): str(error) for shard, error in failed.items()}}
+    return JSONResponse(body, status_code=503 if failed else 200)
+
+@app.get("/accounts")
+async def get_accounts_stats():
+    """Returns shard occupancy and sequencer batching for this process."""
+    return await services.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics of this process; per-shard order counts are read through the sequencers."""
+    for shard_stats in (await services.stats())['shards']:
+        open_orders.labels(shard_stats['shard_id']).set(shard_stats['open_orders'])
+        resident_accounts.labels(shard_stats['shard_id']).set(shard_stats['resident_accounts'])
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 @app.get("/portfolio")
-def get_portfolio_details():
+@app.get("/accounts/{account_id}/portfolio")
+async def get_portfolio_details(account_id: str = DEFAULT_ACCOUNT_ID):
     """Returns current cash and positions."""
-    return {
-        "cash": services.portfolio_manager.cash,
-        "positions": services.portfolio_manager.get_positions_df().to_dict(orient='records')
-    }
+    return await read_account(account_id, lambda account: {
+        "account_id": account_id,
+        "cash": account.portfolio_manager.cash,
+        "positions": account.portfolio_manager.get_positions_df().to_dict(orient='records')
+    })
 
 @app.get("/portfolio/value")
-def get_portfolio_value(current_prices_json: str = '{}'):
+@app.get("/accounts/{account_id}/portfolio/value")
+async def get_portfolio_value(current_prices_json: str = '{}', account_id: str = DEFAULT_ACCOUNT_ID):
     """Returns the total portfolio value, optionally using provided current prices."""
     try:
         current_prices = eval(current_prices_json) # Simple eval for demo; use json.loads in production
@@ -57,16 +112,18 @@ def get_portfolio_value(current_prices_json: str = '{}'):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid current_prices parameter: {e}")
         
-    value = services.portfolio_manager.get_portfolio_value(current_prices)
+    value = await read_account(account_id, lambda account: account.portfolio_manager.get_portfolio_value(current_prices))
     return {"portfolio_value": value}
 
 @app.get("/orders/open")
-def get_open_orders():
+@app.get("/accounts/{account_id}/orders/open")
+async def get_open_orders(account_id: str = DEFAULT_ACCOUNT_ID):
     """Returns all currently open orders."""
-    return services.execution_engine.get_open_orders_df().to_dict(orient='records')
+    return await read_account(account_id, lambda account: account.execution_engine.get_open_orders_df().to_dict(orient='records'))
 
 @app.post("/orders")
-def place_order(order_data: Dict[str, Any]):
+@app.post("/accounts/{account_id}/orders")
+async def place_order(order_data: Dict[str, Any], account_id: str = DEFAULT_ACCOUNT_ID):
     """
     Places a new order.
     Expected JSON format:
@@ -103,7 +160,9 @@ def place_order(order_data: Dict[str, Any]):
         # For this example, we will use a placeholder or the current time if not provided.
         # If timestamp is crucial for execution logic, it MUST be provided.
 
-        order_id = services.execution_engine.place_order(
+        check_account_id(account_id)
+        order_id = await services.place_order(
+            account_id,
             symbol=symbol,
             order_type=order_type,
             side=side,
@@ -114,6 +173,8 @@ def place_order(order_data: Dict[str, Any]):
         )
         return {"message": "Order placed successfully", "order_id": order_id}
 
+    except (HTTPException, ShardUnavailable):
+        raise
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Invalid order parameter: {e}")
     except ValueError as e:
@@ -122,15 +183,17 @@ def place_order(order_data: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=f"An internal error occurred: {e}")
 
 @app.delete("/orders/{order_id}")
-def cancel_order(order_id: str):
+@app.delete("/accounts/{account_id}/orders/{order_id}")
+async def cancel_order(order_id: str, account_id: str = DEFAULT_ACCOUNT_ID):
     """Cancels an existing open order."""
-    success = services.execution_engine.cancel_order(order_id)
+    check_account_id(account_id)
+    success = await services.cancel_order(account_id, order_id)
     if not success:
         raise HTTPException(status_code=404, detail=f"Order {order_id} not found or could not be cancelled.")
     return {"message": f"Order {order_id} cancelled successfully."}
 
 @app.post("/market_data")
-def receive_market_data(data: Dict[str, Any]):
+async def receive_market_data(data: Dict[str, Any]):
     """Endpoint to receive market data ticks and trigger order processing."""
     # Expects data like:
     # {
@@ -147,19 +210,27 @@ def receive_market_data(data: Dict[str, Any]):
         bid_price = float(data.get('bid_price', current_price)) # Default to current_price if not provided
         ask_price = float(data.get('ask_price', current_price)) # Default to current_price if not provided
 
-        filled_orders = services.execution_engine.process_market_data(
+        # Fan the tick out to every account in this process with open orders on the symbol
+        received = time.perf_counter()
+        filled_by_account = await services.process_market_data(
             timestamp=timestamp,
             symbol=symbol,
             current_price=current_price,
             bid_price=bid_price,
             ask_price=ask_price
         )
+        tick_seconds.observe(time.perf_counter() - received)
         
         # You can add logic here to update portfolio value history
         # based on the final portfolio value after processing this tick.
 
-        return {"message": f"Market data processed for {symbol}. {len(filled_orders)} orders filled/rejected."}
+        filled_count = sum(len(filled) for filled in filled_by_account.values())
+        if filled_count:
+            orders_filled.inc(filled_count)
+        return {"message": f"Market data processed for {symbol}. {filled_count} orders filled/rejected across {len(filled_by_account)} accounts."}
 
+    except ShardUnavailable:
+        raise
     except KeyError as e:
         raise HTTPException(status_code=400, detail=f"Missing required market data field: {e}")
     except ValueError as e:
@@ -170,7 +241,8 @@ def receive_market_data(data: Dict[str, Any]):
 # To run this API:
 # 1. Save this code as api.py
 # 2. Install FastAPI and Uvicorn: pip install fastapi uvicorn
-# 3. Run from terminal: uvicorn api:app --reload
+# 3. Run from the repository root, which must be on PYTHONPATH for the shared telemetry package:
+#    PYTHONPATH=. uvicorn --app-dir paper-trading api:app --reload
 # Note: The --reload flag is for development. Remove for production.
 
 # To connect a signal generator:
@@ -1,8 +1,43 @@
 from portfolio import PortfolioManager
 from orders import Order, OrderType, OrderSide, OrderStatus
-import pandas as pd
+import heapq
+import numpy as np
 import uuid
 
+# Intrabar path assumptions for bar-mode matching: the order in which a bar is assumed to
+# have visited its extremes between open and close.
+#   open_high_low_close / open_low_high_close: fixed order for every bar
+#   bar_direction: up bars (close >= open) go O-L-H-C, down bars go O-H-L-C
+#   nearest_extreme: the extreme closer to the open is visited first
+INTRABAR_PATHS = ('bar_direction', 'nearest_extreme', 'open_high_low_close', 'open_low_high_close')
+
+def _intrabar_path(opens, highs, lows, closes, intrabar_path):
+    """(n, 4) array of the price points each bar is assumed to pass through, in order."""
+    if intrabar_path == 'open_high_low_close':
+        high_first = np.ones(len(opens), dtype=bool)
+    elif intrabar_path == 'open_low_high_close':
+        high_first = np.zeros(len(opens), dtype=bool)
+    elif intrabar_path == 'bar_direction':
+        high_first = closes < opens
+    elif intrabar_path == 'nearest_extreme':
+        high_first = (highs - opens) <= (opens - lows)
+    else:
+        raise ValueError(f"Unknown intrabar_path '{intrabar_path}', expected one of {INTRABAR_PATHS}")
+    first = np.where(high_first, highs, lows)
+    second = np.where(high_first, lows, highs)
+    return np.stack([opens, first, second, closes], axis=1)
+
+def _first_touch(path, level):
+    """Position along each bar's path (0 = open, 3 = close) where level is first reached; inf if never."""
+    position = np.full(len(path), np.inf)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for k in (2, 1, 0): # Walk segments backwards so the earliest touch wins
+            a, b = path[:, k], path[:, k + 1]
+            hit = (np.minimum(a, b) <= level) & (level <= np.maximum(a, b))
+            fraction = np.where(b != a, (level - a) / (b - a), 0.0)
+            position = np.where(hit, k + fraction, position)
+    return position
+
 class ExecutionEngine:
     def __init__(self, portfolio_manager: PortfolioManager):
         self.portfolio_manager = portfolio_manager
@@ -13,8 +48,11 @@ class ExecutionEngine:
         self.order_counter += 1
         return f"ORD-{self.order_counter}-{uuid.uuid4().hex[:6]}"
 
-    def place_order(self, symbol, order_type, side, quantity, price=None, stop_price=None, timestamp=None):
-        order_id = self._generate_order_id()
+    def place_order(self, symbol, order_type, side, quantity, price=None, stop_price=None, timestamp=None, order_id=None):
+        if order_id is None:
+            order_id = self._generate_order_id()
+        else:
+            self.order_counter += 1 # Keep numbering in step when replaying a journaled order
         order = Order(order_id, symbol, order_type, side, quantity, price, stop_price, timestamp)
         self.open_orders[order_id] = order
         print(f"Order placed: {order}")
@@ -32,73 +70,70 @@ class ExecutionEngine:
                 continue
 
             filled_now = False
+            quantity = order.remaining_quantity()
 
             # Market Order Logic
-            if order.order_type == OrderType.MARKET and order.status == OrderStatus.PENDING:
+            if order.order_type == OrderType.MARKET and order.is_working():
                 if order.side == OrderSide.BUY:
                     # Market buy order executes at the ask price
                     execution_price = ask_price if ask_price is not None else current_price
-                    if self.portfolio_manager.buy(timestamp, order.symbol, order.quantity, execution_price):
-                        order.filled_quantity = order.quantity
-                        order.filled_price = execution_price
+                    if self.portfolio_manager.buy(timestamp, order.symbol, quantity, execution_price):
+                        order.record_fill(quantity, execution_price)
                         order.status = OrderStatus.FILLED
                         filled_orders_in_tick.append(order)
                         filled_now = True
                         print(f"Market Buy Order Filled: {order_id} at {execution_price}")
                     else:
-                        order.status = OrderStatus.REJECTED # Insufficient funds
+                        self._reject(order) # Insufficient funds
                         filled_orders_in_tick.append(order)
                         filled_now = True # Rejected is also a terminal state for this tick
 
                 elif order.side == OrderSide.SELL:
                     # Market sell order executes at the bid price
                     execution_price = bid_price if bid_price is not None else current_price
-                    if self.portfolio_manager.sell(timestamp, order.symbol, order.quantity, execution_price):
-                        order.filled_quantity = order.quantity
-                        order.filled_price = execution_price
+                    if self.portfolio_manager.sell(timestamp, order.symbol, quantity, execution_price):
+                        order.record_fill(quantity, execution_price)
                         order.status = OrderStatus.FILLED
                         filled_orders_in_tick.append(order)
                         filled_now = True
                         print(f"Market Sell Order Filled: {order_id} at {execution_price}")
                     else:
-                        order.status = OrderStatus.REJECTED # Insufficient shares
+                        self._reject(order) # Insufficient shares
                         filled_orders_in_tick.append(order)
                         filled_now = True
 
             # Limit Order Logic
-            elif order.order_type == OrderType.LIMIT and order.status == OrderStatus.PENDING:
+            elif order.order_type == OrderType.LIMIT and order.is_working():
                 if order.side == OrderSide.BUY and order.price >= bid_price: # If limit price is met or better (lower)
                     execution_price = min(order.price, ask_price if ask_price is not None else current_price) # Execute at limit or better
-                    if self.portfolio_manager.buy(timestamp, order.symbol, order.quantity, execution_price):
-                        order.filled_quantity = order.quantity
-                        order.filled_price = execution_price
+                    if self.portfolio_manager.buy(timestamp, order.symbol, quantity, execution_price):
+                        order.record_fill(quantity, execution_price)
                         order.status = OrderStatus.FILLED
                         filled_orders_in_tick.append(order)
                         filled_now = True
                         print(f"Limit Buy Order Filled: {order_id} at {execution_price}")
                     else:
                         # This case should ideally not happen if portfolio check is done before
-                        order.status = OrderStatus.REJECTED 
+                        self._reject(order)
                         filled_orders_in_tick.append(order)
                         filled_now = True
 
                 elif order.side == OrderSide.SELL and order.price <= ask_price: # If limit price is met or better (higher)
                     execution_price = max(order.price, bid_price if bid_price is not None else current_price) # Execute at limit or better
-                    if self.portfolio_manager.sell(timestamp, order.symbol, order.quantity, execution_price):
-                        order.filled_quantity = order.quantity
-                        order.filled_price = execution_price
+                    if self.portfolio_manager.sell(timestamp, order.symbol, quantity, execution_price):
+                        order.record_fill(quantity, execution_price)
                         order.status = OrderStatus.FILLED
                         filled_orders_in_tick.append(order)
                         filled_now = True
                         print(f"Limit Sell Order Filled: {order_id} at {execution_price}")
                     else:
                         # This case should ideally not happen if portfolio check is done before
-                        order.status = OrderStatus.REJECTED
+                        self._reject(order)
                         filled_orders_in_tick.append(order)
                         filled_now = True
 
             # Stop-Loss Order Logic
-            elif order.order_type == OrderType.STOP_LOSS and order.status == OrderStatus.PENDING:
+            elif order.order_type == OrderType.STOP_LOSS and order.is_working():
                 if order.side == OrderSide.BUY and current_price <= order.stop_price:
                      # If price drops to or below stop_price, convert to market buy
                     print(f"Stop-Loss triggered for BUY order {order_id} at {current_price}. Converting to MARKET buy.")
@@ -137,16 +172,151 @@ class ExecutionEngine:
 
 
             # Remove orders that were fully filled or rejected in this tick
-            if order.status in [OrderStatus.FILLED, OrderStatus.REJECTED]:
+            if filled_now:
                 if order_id in self.open_orders: # Ensure it hasn't been removed by a previous logic
                     del self.open_orders[order_id]
 
         return filled_orders_in_tick
 
+    def _next_bar_trigger(self, order, path, highs, lows, start):
+        """
+        First bar at or after `start` on which the order executes, as
+        (bar index, path position, fill price), or None.
+        A level that the bar gaps through at the open fills at the open; otherwise the
+        order fills at its limit/stop price where the intrabar path first reaches it.
+        Bars are scanned in vectorized chunks that double in size, so the cost depends
+        on how far away the trigger is rather than on the length of the history.
+        """
+        n = len(path)
+        if start >= n:
+            return None
+        if order.order_type == OrderType.MARKET:
+            return start, 0.0, path[start, 0]
+        if order.order_type == OrderType.LIMIT:
+            level = order.price
+            buy_side = order.side == OrderSide.BUY # Buy limits fill at or below the price
+        else:
+            level = order.stop_price
+            buy_side = order.side == OrderSide.SELL # Sell stops trigger at or below the stop
+
+        chunk = 256
+        while start < n:
+            stop = min(n, start + chunk)
+            reached = lows[start:stop] <= level if buy_side else highs[start:stop] >= level
+            hit = int(np.argmax(reached))
+            if reached[hit]:
+                bar = start + hit
+                bar_open = path[bar, 0]
+                if (bar_open <= level) if buy_side else (bar_open >= level):
+                    return bar, 0.0, bar_open
+                return bar, float(_first_touch(path[bar:bar + 1], level)[0]), level
+            start = stop
+            chunk *= 2
+        return None
+
+    def _reject(self, order):
+        # Terminal: fills already made stand (filled_quantity > 0), only the remainder is rejected
+        order.status = OrderStatus.REJECTED
+
+    def process_bars(self, symbol, timestamps, opens, highs, lows, closes, volumes=None,
+                     intrabar_path='bar_direction', max_volume_participation=None):
+        """
+        Bar-mode counterpart of process_market_data: matches this symbol's open orders
+        against a whole array of OHLCV bars in one call.
+
+        Fill decisions come from each bar's open/high/low/close (see _next_bar_trigger), and
+        orders that trigger on the same bar execute in the order the assumed intrabar
+        path reaches their prices. With max_volume_participation (e.g. 0.1) the total
+        quantity filled on a bar is capped at that fraction of the bar's volume; the
+        remainder stays open and continues on later bars. A triggered stop becomes a
+        market order for any unfilled remainder, as in tick mode.
+
+        Returns every order that filled, partly filled or was rejected in this call, once
+        each. PARTIALLY_FILLED orders stay in open_orders and keep working on later calls; a
+        REJECTED order with filled_quantity > 0 had the remainder after its fills rejected.
+
+        Trigger bars are found with vectorized scans over the arrays, so the Python work
+        grows with the number of fills rather than the number of bars.
+        """
+        opens = np.asarray(opens, dtype=np.float64)
+        highs = np.asarray(highs, dtype=np.float64)
+        lows = np.asarray(lows, dtype=np.float64)
+        path = _intrabar_path(opens, highs, lows, np.asarray(closes, dtype=np.float64), intrabar_path)
+        capacity = None
+        if max_volume_participation is not None:
+            if volumes is None:
+                raise ValueError("max_volume_participation requires bar volumes")
+            capacity = np.asarray(volumes, dtype=np.float64) * max_volume_participation
+
+        events = [] # heap of (bar index, path position, placement rank, order_id, price)
+        rank = {}
+
+        def schedule(order, start_bar):
+            trigger = self._next_bar_trigger(order, path, highs, lows, start_bar)
+            if trigger is not None:
+                bar, position, price = trigger
+                heapq.heappush(events, (bar, position, rank[order.order_id], order.order_id, float(price)))
+
+        for order_id, order in self.open_orders.items():
+            if order.symbol == symbol and order.is_working():
+                rank[order_id] = len(rank)
+                schedule(order, 0)
+
+        reported = {} # order_id -> order that filled (partly) or was rejected in this call
+        while events:
+            bar, _, _, order_id, execution_price = heapq.heappop(events)
+            order = self.open_orders.get(order_id)
+            if order is None or not order.is_working():
+                continue
+
+            quantity = order.remaining_quantity()
+            if capacity is not None:
+                quantity = min(quantity, capacity[bar])
+                if quantity <= 0:
+                    schedule(order, bar + 1)
+                    continue
+
+            timestamp = timestamps[bar]
+            if order.side == OrderSide.BUY:
+                executed = self.portfolio_manager.buy(timestamp, order.symbol, quantity, execution_price)
+            else:
+                executed = self.portfolio_manager.sell(timestamp, order.symbol, quantity, execution_price)
+
+            reported[order_id] = order
+            if not executed:
+                self._reject(order) # Insufficient funds or shares; earlier fills stand
+                del self.open_orders[order_id]
+                continue
+
+            if capacity is not None:
+                capacity[bar] -= quantity
+            order.record_fill(quantity, execution_price)
+
+            if order.filled_quantity >= order.quantity - 1e-9:
+                order.status = OrderStatus.FILLED
+                del self.open_orders[order_id]
+                print(f"Bar {order.order_type.value} {order.side.value} Order Filled: {order_id} at avg {order.filled_price}")
+            else:
+                order.status = OrderStatus.PARTIALLY_FILLED
+                if order.order_type == OrderType.STOP_LOSS:
+                    order.order_type = OrderType.MARKET
+                schedule(order, bar + 1)
+
+        return list(reported.values())
+
+    def process_bar_data(self, symbol, bars, **kwargs):
+        """process_bars for a list of OHLCVBar / StockDayData objects."""
+        timestamps = [getattr(bar, 'timestamp', None) or bar.date for bar in bars]
+        return self.process_bars(
+            symbol, timestamps,
+            [bar.open for bar in bars], [bar.high for bar in bars], [bar.low for bar in bars],
+            [bar.close for bar in bars], [bar.volume for bar in bars], **kwargs
+        )
+
     def cancel_order(self, order_id):
         if order_id in self.open_orders:
             order = self.open_orders[order_id]
-            if order.status == OrderStatus.PENDING:
+            if order.is_working():
                 order.status = OrderStatus.CANCELLED
                 del self.open_orders[order_id]
                 print(f"Order {order_id} cancelled.")
@@ -158,6 +328,22 @@ class ExecutionEngine:
             print(f"Order {order_id} not found.")
             return False
 
+    def get_open_symbols(self):
+        return {order.symbol for order in self.open_orders.values()}
+
+    def get_state(self):
+        return {
+            'order_counter': self.order_counter,
+            'open_orders': [order.to_dict() for order in self.open_orders.values()]
+        }
+
+    def load_state(self, state):
+        self.order_counter = state.get('order_counter', 0)
+        self.open_orders = {}
+        for order_data in state.get('open_orders', []):
+            order = Order.from_dict(order_data)
+            self.open_orders[order.order_id] = order
+
     def get_open_orders_df(self):
         data = []
         for order_id, order in self.open_orders.items():
@@ -173,5 +359,6 @@ class ExecutionEngine:
                 'Filled Quantity': order.filled_quantity,
                 'Timestamp': order.timestamp
             })
+        import pandas as pd # only this report needs pandas; the service path does not load it
         return pd.DataFrame(data)
 
@@ -0,0 +1,176 @@
+import glob
+import json
+import os
+import struct
+import zlib
+from datetime import datetime
+
+# Record frame: payload length, crc32(payload), sequence number, command kind
+_HEADER = struct.Struct("<IIQB")
+
+KIND_CODES = {"place": 1, "cancel": 2, "tick": 3}
+KIND_NAMES = {code: kind for kind, code in KIND_CODES.items()}
+
+SEGMENT_PATTERN = "journal-*.log"
+SNAPSHOT_PATTERN = "snapshot-*.jsonl"
+
+
+def _encode(value):
+    # Tagged so that loads() turns datetimes back into datetimes and leaves strings alone
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    return str(value)
+
+
+def _decode(obj):
+    if len(obj) == 1 and "$datetime" in obj:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+def dumps(value):
+    """Compact JSON of persisted commands and account state; datetimes survive loads()."""
+    return json.dumps(value, separators=(",", ":"), default=_encode)
+
+
+def loads(text):
+    return json.loads(text, object_hook=_decode)
+
+
+def _fsync_dir(path):
+    # Make renames/creations durable; not supported on every platform
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """
+    Append-only binary command journal for one shard.
+    append() only encodes the record into an in-memory buffer; commit() writes the whole
+    buffer and fsyncs once (group commit), so the per-command cost is the encoding alone.
+    The journal is split into segments named after their first sequence number so that
+    segments covered by a snapshot can be deleted.
+    """
+
+    def __init__(self, directory, fsync=True):
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._buffer = bytearray()
+        self._buffer_first_seq = 0
+        self._file = None
+        self.last_seq = 0
+
+    def _segments(self):
+        # [(first_seq, path)] in sequence order
+        paths = glob.glob(os.path.join(self.directory, SEGMENT_PATTERN))
+        return sorted((int(os.path.basename(p)[8:-4]), p) for p in paths)
+
+    def _open_segment(self, first_seq):
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"journal-{first_seq:020d}.log")
+        self._file = open(path, "ab")
+        _fsync_dir(self.directory)
+
+    def append(self, kind, payload):
+        """Buffers a record and returns its sequence number. Not durable until commit()."""
+        self.last_seq += 1
+        if not self._buffer:
+            self._buffer_first_seq = self.last_seq
+        data = dumps(payload).encode("utf-8")
+        self._buffer += _HEADER.pack(len(data), zlib.crc32(data), self.last_seq, KIND_CODES[kind])
+        self._buffer += data
+        return self.last_seq
+
+    def commit(self):
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._open_segment(self._buffer_first_seq)
+        self._file.write(self._buffer)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._buffer.clear()
+
+    def replay(self, after_seq=0):
+        """
+        Yields (seq, kind, payload) for every committed record with seq > after_seq.
+        A torn or corrupt record at the tail of the last segment (crash mid-write) ends
+        the replay and is truncated away so new records append after the last good one.
+        """
+        segments = self._segments()
+        for index, (first_seq, path) in enumerate(segments):
+            next_first = segments[index + 1][0] if index + 1 < len(segments) else None
+            if next_first is not None and next_first <= after_seq + 1:
+                continue # every record in this segment is covered by the snapshot
+            with open(path, "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                length, crc, seq, code = _HEADER.unpack_from(data, offset)
+                start = offset + _HEADER.size
+                payload = data[start:start + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                offset = start + length
+                self.last_seq = max(self.last_seq, seq)
+                if seq > after_seq:
+                    yield seq, KIND_NAMES[code], loads(payload)
+            if offset < len(data):
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+        self.last_seq = max(self.last_seq, after_seq)
+
+    def rotate(self, covered_seq):
+        """Starts a new segment and deletes the ones fully covered by a snapshot at covered_seq."""
+        self.commit()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        for first_seq, path in self._segments():
+            if first_seq <= covered_seq:
+                os.remove(path)
+
+    def close(self):
+        self.commit()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def write_snapshot(directory, seq, states):
+    """Atomically writes one JSON line per account state; returns the snapshot path."""
+    path = os.path.join(directory, f"snapshot-{seq:020d}.jsonl")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(json.dumps({"seq": seq}) + "\n")
+        for state in states:
+            f.write(dumps(state) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(directory)
+    for old in glob.glob(os.path.join(directory, SNAPSHOT_PATTERN)):
+        if old != path:
+            os.remove(old)
+    return path
+
+
+def load_latest_snapshot(directory):
+    """Returns (seq, [account states]) of the newest snapshot, or (0, []) if there is none."""
+    paths = sorted(glob.glob(os.path.join(directory, SNAPSHOT_PATTERN)))
+    if not paths:
+        return 0, []
+    with open(paths[-1]) as f:
+        seq = json.loads(f.readline())["seq"]
+        return seq, [loads(line) for line in f if line.strip()]
@@ -13,7 +13,8 @@ class OrderStatus(Enum):
     PENDING = "PENDING"
     FILLED = "FILLED"
     CANCELLED = "CANCELLED"
-    REJECTED = "REJECTED"
+    REJECTED = "REJECTED" # Terminal; with filled_quantity > 0 only the unfilled rest was rejected
+    PARTIALLY_FILLED = "PARTIALLY_FILLED" # Part filled and still working
 
 class Order:
     def __init__(self, order_id, symbol, order_type, side, quantity, price=None, stop_price=None, timestamp=None):
@@ -38,3 +39,39 @@ class Order:
     def is_filled(self):
         return self.filled_quantity == self.quantity
 
+    def is_working(self):
+        return self.status in (OrderStatus.PENDING, OrderStatus.PARTIALLY_FILLED)
+
+    def remaining_quantity(self):
+        return self.quantity - self.filled_quantity
+
+    def record_fill(self, quantity, price):
+        """Add a fill of `quantity` at `price`; filled_price is the average over all fills."""
+        total = self.filled_quantity + quantity
+        self.filled_price = (self.filled_price * self.filled_quantity + price * quantity) / total
+        self.filled_quantity = total
+
+    def to_dict(self):
+        return {
+            'order_id': self.order_id,
+            'symbol': self.symbol,
+            'order_type': self.order_type.value,
+            'side': self.side.value,
+            'quantity': self.quantity,
+            'price': self.price,
+            'stop_price': self.stop_price,
+            'timestamp': self.timestamp,
+            'status': self.status.value,
+            'filled_quantity': self.filled_quantity,
+            'filled_price': self.filled_price
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        order = cls(data['order_id'], data['symbol'], OrderType(data['order_type']), OrderSide(data['side']),
+                    data['quantity'], data.get('price'), data.get('stop_price'), data.get('timestamp'))
+        order.status = OrderStatus(data.get('status', OrderStatus.PENDING.value))
+        order.filled_quantity = data.get('filled_quantity', 0.0)
+        order.filled_price = data.get('filled_price', 0.0)
+        return order
+
@@ -138,3 +138,164 @@ class PerformanceMetrics:
 
         return results
 
+
+# --- Rolling / expanding analytics ---
+# All of the helpers below run in O(n) over NumPy arrays: every rolling statistic is
+# derived from differences of cumulative sums instead of recomputing each window, so
+# they stay usable on multi-year, minute-level equity curves (millions of points).
+# Pass window=None for expanding (since-inception) statistics. A window may also be a
+# time span (e.g. pd.Timedelta('30D')) when timestamps are given; the window for each
+# point then covers the observations in (t - window, t].
+
+def _as_float_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+def _window_starts(n, window, timestamps=None):
+    # Index of the first observation that belongs to the window ending at each point.
+    idx = np.arange(n)
+    if window is None:
+        return np.zeros(n, dtype=np.int64)
+    if timestamps is not None and not isinstance(window, (int, np.integer)):
+        ts = np.asarray(pd.to_datetime(timestamps), dtype='datetime64[ns]')
+        span = np.timedelta64(pd.Timedelta(window).value, 'ns')
+        return np.searchsorted(ts, ts - span, side='right')
+    if not isinstance(window, (int, np.integer)) or window < 1:
+        raise ValueError("window must be a positive number of periods, a time span with timestamps, or None")
+    return np.maximum(idx - window + 1, 0)
+
+def _window_sums(values, starts):
+    # Sum of values[starts[i]:i+1] for every i, via one cumulative sum.
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    return csum[np.arange(1, len(values) + 1)] - csum[starts]
+
+def _finite_counts(values, starts):
+    # Number of usable (finite) observations in each window; NaNs are treated as missing.
+    return _window_sums(np.isfinite(values).astype(np.float64), starts)
+
+def _window_valid(counts, window, min_periods):
+    if min_periods is None:
+        min_periods = window if isinstance(window, (int, np.integer)) else 2
+    return counts >= max(min_periods, 2)
+
+def _rolling_mean_std(values, starts):
+    # Demean first so the cumulative sums of squares stay well conditioned on long series.
+    finite = np.isfinite(values)
+    offset = values[finite].mean() if finite.any() else 0.0
+    centered = np.where(finite, values - offset, 0.0)
+    counts = _finite_counts(values, starts)
+    s1 = _window_sums(centered, starts)
+    s2 = _window_sums(centered * centered, starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s1 / counts
+        var = np.maximum(s2 - s1 * mean, 0.0) / (counts - 1)
+    return mean + offset, np.sqrt(var), counts
+
+def returns_from_values(portfolio_values):
+    """Simple periodic returns of an equity curve; the first element is NaN."""
+    values = _as_float_array(portfolio_values)
+    returns = np.full(values.shape, np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns[1:] = values[1:] / values[:-1] - 1.0
+    return returns
+
+def rolling_volatility(returns, window=None, timestamps=None, min_periods=None, periods_per_year=252):
+    """Annualized rolling (or expanding) standard deviation of returns."""
+    r = _as_float_array(returns)
+    starts = _window_starts(len(r), window, timestamps)
+    _, std, counts = _rolling_mean_std(r, starts)
+    valid = _window_valid(counts, window, min_periods)
+    return np.where(valid, std * np.sqrt(periods_per_year), np.nan)
+
+def rolling_sharpe_ratio(returns, window=None, timestamps=None, risk_free_rate=0.0, min_periods=None, periods_per_year=252):
+    """Rolling annualized Sharpe ratio, consistent with calculate_sharpe_ratio for a full window."""
+    r = _as_float_array(returns)
+    starts = _window_starts(len(r), window, timestamps)
+    mean, std, counts = _rolling_mean_std(r, starts)
+    valid = _window_valid(counts, window, min_periods)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = (mean * periods_per_year - risk_free_rate) / (std * np.sqrt(periods_per_year))
+    return np.where(valid & (std > 0), sharpe, np.nan)
+
+def rolling_sortino_ratio(returns, window=None, timestamps=None, target_return=0.0, min_periods=None, periods_per_year=252):
+    """Rolling annualized Sortino ratio (downside deviation below target_return per period)."""
+    r = _as_float_array(returns)
+    starts = _window_starts(len(r), window, timestamps)
+    mean, _, counts = _rolling_mean_std(r, starts)
+    valid = _window_valid(counts, window, min_periods)
+    downside = np.where(np.isfinite(r), np.minimum(r - target_return, 0.0), 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        downside_dev = np.sqrt(_window_sums(downside * downside, starts) / counts)
+        sortino = ((mean - target_return) * periods_per_year) / (downside_dev * np.sqrt(periods_per_year))
+    return np.where(valid & (downside_dev > 0), sortino, np.nan)
+
+def rolling_beta(returns, benchmark_returns, window=None, timestamps=None, min_periods=None):
+    """Rolling beta of returns against benchmark returns (aligned, same length)."""
+    r = _as_float_array(returns)
+    b = _as_float_array(benchmark_returns)
+    if r.shape != b.shape:
+        raise ValueError("returns and benchmark_returns must be aligned and of equal length")
+    both = np.isfinite(r) & np.isfinite(b)
+    starts = _window_starts(len(r), window, timestamps)
+    # Center both series so cov/var via cumulative sums do not lose precision.
+    r = np.where(both, r - (r[both].mean() if both.any() else 0.0), 0.0)
+    b = np.where(both, b - (b[both].mean() if both.any() else 0.0), 0.0)
+    n = _window_sums(both.astype(np.float64), starts)
+    sr, sb = _window_sums(r, starts), _window_sums(b, starts)
+    srb, sbb = _window_sums(r * b, starts), _window_sums(b * b, starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = srb - sr * sb / n
+        var = sbb - sb * sb / n
+        beta = cov / var
+    return np.where(_window_valid(n, window, min_periods) & (var > 0), beta, np.nan)
+
+def underwater_curve(portfolio_values):
+    """Drawdown from the running peak at every point, in percent (0 at new highs)."""
+    values = _as_float_array(portfolio_values)
+    peak = np.fmax.accumulate(values)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (values - peak) / peak * 100
+
+def drawdown_duration(portfolio_values, timestamps=None):
+    """
+    Time spent below the previous peak at every point.
+    Returns a count of periods, or timedeltas when timestamps are given.
+    """
+    values = _as_float_array(portfolio_values)
+    idx = np.arange(len(values))
+    at_peak = values >= np.fmax.accumulate(values)
+    last_peak = np.maximum.accumulate(np.where(at_peak, idx, 0))
+    if timestamps is None:
+        return idx - last_peak
+    ts = np.asarray(pd.to_datetime(timestamps), dtype='datetime64[ns]')
+    return ts - ts[last_peak]
+
+def calculate_rolling_metrics(portfolio_value_history, window=None, benchmark_values=None,
+                              risk_free_rate=0.0, periods_per_year=252, min_periods=None):
+    """
+    Rolling analytics for a 'timestamp'/'portfolio_value' history DataFrame.
+    benchmark_values, if given, is the benchmark symbol's price series aligned row by row
+    with the history; it is reordered together with the rows when they are sorted by time.
+    """
+    order = np.argsort(portfolio_value_history['timestamp'].to_numpy(), kind='stable')
+    history = portfolio_value_history.iloc[order]
+    timestamps = history['timestamp'].to_numpy()
+    values = history['portfolio_value'].to_numpy(dtype=np.float64)
+    returns = returns_from_values(values)
+    time_window = timestamps if window is not None and not isinstance(window, (int, np.integer)) else None
+
+    result = pd.DataFrame({
+        'timestamp': timestamps,
+        'portfolio_value': values,
+        'volatility': rolling_volatility(returns, window, time_window, min_periods, periods_per_year),
+        'sharpe_ratio': rolling_sharpe_ratio(returns, window, time_window, risk_free_rate, min_periods, periods_per_year),
+        'sortino_ratio': rolling_sortino_ratio(returns, window, time_window, 0.0, min_periods, periods_per_year),
+        'underwater': underwater_curve(values),
+        'drawdown_duration': drawdown_duration(values, timestamps),
+    })
+    if benchmark_values is not None:
+        benchmark_values = np.asarray(benchmark_values, dtype=np.float64)
+        if len(benchmark_values) != len(order):
+            raise ValueError("benchmark_values must have one value per history row")
+        benchmark_returns = returns_from_values(benchmark_values[order])
+        result['beta'] = rolling_beta(returns, benchmark_returns, window, time_window, min_periods)
+    return result
@@ -1,5 +1,3 @@
-import pandas as pd
-
 class PnLCalculator:
     def __init__(self, portfolio_manager):
         self.portfolio_manager = portfolio_manager
@@ -1,4 +1,3 @@
-import pandas as pd
 from collections import defaultdict
 
 class PortfolioManager:
@@ -71,8 +70,25 @@ class PortfolioManager:
                 'Quantity': pos['quantity'],
                 'Avg Price': pos['avg_price']
             })
+        import pandas as pd # only these reports need pandas; the service path does not load it
         return pd.DataFrame(data)
 
+    def get_state(self):
+        # Plain, JSON-serializable copy of the portfolio (used to persist evicted accounts)
+        return {
+            'cash': self.cash,
+            'positions': {symbol: dict(pos) for symbol, pos in self.positions.items()},
+            'history': list(self.history)
+        }
+
+    def load_state(self, state):
+        self.cash = state['cash']
+        self.positions.clear()
+        for symbol, pos in state.get('positions', {}).items():
+            self.positions[symbol] = dict(pos)
+        self.history = list(state.get('history', []))
+
     def get_history_df(self):
+        import pandas as pd
         return pd.DataFrame(self.history)
 
@@ -0,0 +1,175 @@
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future
+
+# Command kinds understood by ShardSequencer
+PLACE = "place"
+CANCEL = "cancel"
+TICK = "tick"
+READ = "read"
+
+_STOP = object()
+
+
+class ShardUnavailable(RuntimeError):
+    """Raised for commands sent to a shard whose sequencer stopped applying them."""
+
+
+class ShardSequencer:
+    """
+    Single writer for one AccountShard.
+    A dedicated thread drains a FIFO queue of place/cancel/tick/read commands and applies
+    them to the shard one at a time, so account state is never touched concurrently and
+    every shard sees its commands in a deterministic order. Commands that arrive while a
+    batch is running are drained together on the next iteration (up to max_batch), and
+    their futures are resolved once the whole batch has been applied.
+
+    If making a batch durable fails (journal fsync, snapshot or rotation, e.g. disk full),
+    the batch's commands fail with that error and the shard stops serving: memory is
+    then ahead of the journal, so every later command fails with ShardUnavailable
+    instead of waiting on the thread. `error` holds the cause.
+    """
+
+    def __init__(self, shard, max_batch=1024):
+        self.shard = shard
+        self.max_batch = max_batch
+        self.batches = 0
+        self.commands = 0
+        self.error = None
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f"shard-{shard.shard_id}", daemon=True)
+        self._thread.start()
+
+    def submit(self, kind, *args):
+        """Enqueue a command and return a concurrent.futures.Future for its result."""
+        future = Future()
+        if self.error is not None:
+            future.set_exception(self._unavailable())
+        else:
+            self._queue.put((kind, args, future))
+        return future
+
+    def _unavailable(self):
+        return ShardUnavailable(f"Shard {self.shard.shard_id} stopped after failing to persist a batch: {self.error}")
+
+    def stop(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopping = False
+            outcomes = []
+            for command in batch:
+                if command is _STOP:
+                    stopping = True
+                    continue
+                kind, args, future = command
+                if self.error is not None:
+                    outcomes.append((future, None, self._unavailable()))
+                    continue
+                try:
+                    outcomes.append((future, self._apply(kind, args), None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+            if self.error is None:
+                try:
+                    self.after_batch(len(outcomes))
+                except Exception as e:
+                    # Applied in memory but not durable: no caller may see it succeed
+                    self.error = e
+                    outcomes = [(future, None, e) for future, _, _ in outcomes]
+
+            for future, result, error in outcomes:
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+            if stopping:
+                return
+
+    def after_batch(self, size):
+        # Runs on the shard thread once per batch, before any future of the batch resolves:
+        # one journal fsync covers every command in the batch (group commit)
+        self.shard.commit_journal()
+        self.shard.maybe_snapshot()
+        self.batches += 1
+        self.commands += size
+
+    def _apply(self, kind, args):
+        shard = self.shard
+        if kind == PLACE:
+            account_id, order = args
+            return shard.place_order(account_id, **order)
+        if kind == CANCEL:
+            account_id, order_id = args
+            return shard.cancel_order(account_id, order_id)
+        if kind == TICK:
+            return shard.process_market_data(*args)
+        if kind == READ:
+            # fn(account) runs on the shard thread; account is None if create=False and unknown
+            account_id, fn, create = args
+            if account_id is None:
+                return fn(shard)
+            return fn(shard.get_account(account_id, create=create))
+        raise ValueError(f"Unknown command kind: {kind}")
+
+
+class SequencedRegistry:
+    """Async facade over an AccountRegistry that funnels all access through ShardSequencers."""
+
+    def __init__(self, registry, max_batch=1024):
+        self.registry = registry
+        self.sequencers = [ShardSequencer(shard, max_batch=max_batch) for shard in registry.shards]
+
+    def _sequencer_for(self, account_id):
+        return self.sequencers[self.registry.shard_for(account_id).shard_id]
+
+    async def place_order(self, account_id, **order):
+        return await asyncio.wrap_future(self._sequencer_for(account_id).submit(PLACE, account_id, order))
+
+    async def cancel_order(self, account_id, order_id):
+        return await asyncio.wrap_future(self._sequencer_for(account_id).submit(CANCEL, account_id, order_id))
+
+    async def read(self, account_id, fn, create=True):
+        return await asyncio.wrap_future(self._sequencer_for(account_id).submit(READ, account_id, fn, create))
+
+    async def process_market_data(self, timestamp, symbol, current_price, bid_price=None, ask_price=None):
+        # Every shard applies the tick in its own queue order; merge the per-account fills
+        futures = [
+            asyncio.wrap_future(s.submit(TICK, timestamp, symbol, current_price, bid_price, ask_price))
+            for s in self.sequencers
+        ]
+        results = {}
+        for shard_results in await asyncio.gather(*futures):
+            results.update(shard_results)
+        return results
+
+    async def stats(self):
+        futures = [asyncio.wrap_future(s.submit(READ, None, lambda shard: shard.stats(), False)) for s in self.sequencers]
+        shards = await asyncio.gather(*futures)
+        for shard_stats, sequencer in zip(shards, self.sequencers):
+            shard_stats['batches'] = sequencer.batches
+            shard_stats['commands'] = sequencer.commands
+        return {
+            'process_index': self.registry.process_index,
+            'process_count': self.registry.process_count,
+            'shards': shards
+        }
+
+    def failed(self):
+        """Sequencers that stopped serving their shard, as {shard_id: error}."""
+        return {s.shard.shard_id: s.error for s in self.sequencers if s.error is not None}
+
+    def stop(self):
+        for sequencer in self.sequencers:
+            sequencer.stop()
+        self.registry.flush()
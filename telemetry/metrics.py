@@ -0,0 +1,315 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+Counters, gauges and histograms are plain Python objects with a lock per labelled child;
+an observation is a dict lookup (cached child), a bisect over the bucket bounds and two
+additions under an uncontended lock, well under a microsecond. Values that are cheap to
+read but expensive to track (queue sizes, connection counts) are registered as callback
+gauges and only evaluated when /metrics is scraped. Rates such as frames per second are
+exported as counters; take rate() over them in the scraper.
+"""
+import asyncio
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from http import HTTPStatus
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans sub-millisecond indicator math up to slow history pages
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional["Registry"] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        (REGISTRY if registry is None else registry).register(self)
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child (the value holder of one label combination)."""
+
+    def labels(self, *values):
+        """The child for these label values; keep a reference to it on hot paths."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _only(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels; use .labels(...)")
+        return self._children[()]
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        """Exposition lines of every child."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class _Value:
+    __slots__ = ("value", "_lock", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+        self.function = None
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+    def set_function(self, function: Callable[[], float]):
+        """Evaluate `function` at scrape time instead of tracking the value."""
+        self.function = function
+
+    def get(self) -> float:
+        return float(self.function()) if self.function is not None else self.value
+
+class Counter(_Metric):
+    """Monotonically increasing count; exported with a _total suffix."""
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._only().inc(amount)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}_total{_label_text(self.labelnames, key)} {_format_value(child.get())}"
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed on scrape with set_function()."""
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._only().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._only().dec(amount)
+
+    def set(self, value: float):
+        self._only().set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self._only().set_function(function)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_label_text(self.labelnames, key)} {_format_value(child.get())}"
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # last slot: above the highest bound
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        """Context manager observing the elapsed wall time in seconds."""
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations (seconds, unless the name says otherwise)."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional["Registry"] = None):
+        self.bounds = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.bounds)
+
+    def observe(self, value: float):
+        self._only().observe(value)
+
+    def time(self) -> _Timer:
+        return self._only().time()
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_label_text(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, key)} {_format_value(total)}"
+            yield f"{self.name}_count{_label_text(self.labelnames, key)} {cumulative}"
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> bytes:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ("\n".join(metric.render() for metric in metrics) + "\n").encode("utf-8")
+
+REGISTRY = Registry()
+
+def http_metrics(prefix: str, registry: Optional[Registry] = None) -> Tuple[Histogram, Counter]:
+    """The per-route request latency histogram and request counter of a service."""
+    duration = Histogram(f"{prefix}_http_request_duration_seconds",
+                         "HTTP request latency by route template", ("method", "route", "status"),
+                         registry=registry)
+    requests = Counter(f"{prefix}_http_requests", "HTTP requests by route template",
+                       ("method", "route", "status"), registry=registry)
+    return duration, requests
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template (/stocks/{symbol}/history,
+    not /stocks/AAPL/history) so label cardinality stays bounded. For streaming responses
+    the latency covers the whole body. Requests that match no route are labelled "unmatched".
+    """
+
+    def __init__(self, app, prefix: str, registry: Optional[Registry] = None):
+        self.app = app
+        self.duration, self.requests = http_metrics(prefix, registry)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"), status)
+            self.duration.labels(*labels).observe(time.perf_counter() - start)
+            self.requests.labels(*labels).inc()
+
+async def start_http_server(host: str, port: int, registry: Optional[Registry] = None,
+                            routes: Optional[Dict[str, Callable[[Dict[str, str]], tuple]]] = None
+                            ) -> asyncio.AbstractServer:
+    """
+    Minimal asyncio HTTP server answering GET /metrics, for processes without a web
+    framework (the WebSocket server). Runs on the caller's event loop. `routes` adds GET
+    paths whose handler takes the query parameters and returns (content type, body), or
+    (status code, content type, body).
+    """
+    registry = REGISTRY if registry is None else registry
+    routes = dict(routes or {})
+    routes.setdefault("/metrics", lambda query: (CONTENT_TYPE, registry.render()))
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass # headers are not needed
+            parts = request_line.decode("latin-1").split()
+            path, _, query = parts[1].partition("?") if len(parts) >= 2 else ("", "", "")
+            if parts and parts[0] == "GET" and path in routes:
+                try:
+                    result = routes[path](dict(parse_qsl(query)))
+                    # (content type, body), or (status code, content type, body)
+                    code, content_type, body = result if len(result) == 3 else (200, *result)
+                    status = f"{code} {HTTPStatus(code).phrase}"
+                except ValueError as e:
+                    status, content_type, body = "400 Bad Request", "text/plain", f"{e}\n".encode()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"Not Found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
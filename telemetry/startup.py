@@ -0,0 +1,158 @@
+"""
+Startup profile, lazy imports and readiness.
+Heavy dependencies that only some code paths need (pandas, psycopg2) are bound at module
+level with lazy_import(): the name is a stand-in module that imports the real one on
+first attribute access, so importing a service does not pay for them up front.
+
+Each service keeps one Startup. It records how long after the process started the
+service module finished importing, then runs an explicit warm-up (loading the lazy
+modules, filling caches, preallocating buffers and running the first call of each hot
+path) and only afterwards declares itself ready. /health stays a liveness check that
+answers as soon as the server listens; /ready answers 503 until warm-up is done and
+returns the startup report.
+"""
+import importlib
+import inspect
+import os
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from telemetry.metrics import Gauge, Registry
+
+_IMPORTED_AT = time.monotonic()
+
+def process_uptime() -> float:
+    """Seconds since this process started (from /proc on Linux, else since this module was imported)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after "pid (comm)": starttime is the 20th, in clock ticks since boot
+            start_ticks = int(f.read().rpartition(")")[2].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.monotonic() - _IMPORTED_AT
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __getattr__(self, attr):
+        # Only reached while the real module's attributes have not been copied in yet
+        return getattr(_load(self), attr)
+
+_lazy_modules: Dict[str, LazyModule] = {}
+_load_seconds: Dict[str, float] = {}
+_load_lock = threading.RLock()
+
+def _load(module: LazyModule) -> types.ModuleType:
+    name = module.__name__
+    with _load_lock:
+        if name not in _load_seconds:
+            start = time.perf_counter()
+            real = importlib.import_module(name)
+            _load_seconds[name] = time.perf_counter() - start
+            # Later lookups hit the stand-in's own __dict__ instead of __getattr__
+            module.__dict__.update(real.__dict__)
+    return sys.modules[name]
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    `name` as a lazily imported module, for `pd = lazy_import("pandas")` at module level.
+    Annotations that mention it must be strings, or they would import it at definition.
+    """
+    with _load_lock:
+        module = _lazy_modules.get(name)
+        if module is None:
+            module = _lazy_modules[name] = LazyModule(name)
+    return module
+
+def ensure_loaded(*modules: types.ModuleType):
+    """Import lazily bound modules now (e.g. during warm-up)."""
+    for module in modules:
+        if isinstance(module, LazyModule):
+            _load(module)
+
+class Startup:
+    """
+    Startup profile and readiness of one service. Metrics are named
+    {prefix}_startup_seconds{phase} and {prefix}_ready.
+    """
+
+    def __init__(self, prefix: str, registry: Optional[Registry] = None):
+        self.prefix = prefix
+        self.imported_after: Optional[float] = None
+        self.ready_after: Optional[float] = None
+        self.steps: List[Dict] = []
+        self._ready = threading.Event()
+        self._seconds = Gauge(f"{prefix}_startup_seconds", "Seconds from process start to each startup phase",
+                              ("phase",), registry=registry)
+        Gauge(f"{prefix}_ready", "1 once warm-up has finished", registry=registry).set_function(
+            lambda: 1 if self._ready.is_set() else 0)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def mark_imported(self):
+        """Call at the end of the service module."""
+        self.imported_after = process_uptime()
+        self._seconds.labels("imported").set(self.imported_after)
+
+    @contextmanager
+    def _step(self, name: str):
+        start = time.perf_counter()
+        step = {"name": name}
+        try:
+            yield
+        except Exception as e:
+            # Warm-up only saves later requests work; a failed step is reported, not fatal
+            step["error"] = repr(e)
+            print(f"{self.prefix}: warm-up step {name} failed: {e!r}")
+        step["seconds"] = time.perf_counter() - start
+        self.steps.append(step)
+
+    def _declare_ready(self):
+        self.ready_after = process_uptime()
+        self._seconds.labels("ready").set(self.ready_after)
+        self._ready.set()
+        steps = ", ".join(f"{step['name']} {step['seconds']:.3f}s" for step in self.steps)
+        print(f"{self.prefix}: imported after {self.imported_after or 0:.3f}s, "
+              f"ready after {self.ready_after:.3f}s (warm-up: {steps or 'none'})")
+
+    def warm_up(self, steps: Iterable[Tuple[str, Callable[[], object]]]):
+        """Run the (name, fn) warm-up steps in order, then declare the service ready."""
+        for name, fn in steps:
+            with self._step(name):
+                fn()
+        self._declare_ready()
+
+    def start_warm_up(self, steps: Iterable[Tuple[str, Callable[[], object]]]) -> threading.Thread:
+        """warm_up() in a daemon thread, so the server answers /health meanwhile."""
+        thread = threading.Thread(target=self.warm_up, args=(list(steps),), daemon=True, name=f"{self.prefix}-warm-up")
+        thread.start()
+        return thread
+
+    async def warm_up_async(self, steps: Iterable[Tuple[str, Callable[[], object]]]):
+        """warm_up() on the running event loop; steps may return awaitables."""
+        for name, fn in steps:
+            with self._step(name):
+                result = fn()
+                if inspect.isawaitable(result):
+                    await result
+        self._declare_ready()
+
+    def report(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "pid": os.getpid(),
+            "uptime_seconds": process_uptime(),
+            "imported_after_seconds": self.imported_after,
+            "ready_after_seconds": self.ready_after,
+            "warm_up": list(self.steps),
+            # Lazily imported modules and their import time; None if nothing needed them yet
+            "lazy_imports": {name: _load_seconds.get(name) for name in _lazy_modules}
+        }
@@ -0,0 +1,121 @@
+"""
+Sampled pipeline tracing.
+A Tracer starts a Trace for a sampled fraction of events (ticks); the trace records a
+monotonic timestamp as each pipeline stage completes. Stage durations are the gaps between
+consecutive marks, so an unsampled event costs one random() call and sampled ones a few
+perf_counter_ns() calls. Finished traces feed per-stage histograms and a bounded buffer of
+spans that can be exported as JSON.
+
+A trace may fan out: expect(n) makes the final stage complete only once n deliveries
+(e.g. one socket write per subscriber) have reported in, and the slowest one ends it.
+"""
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from telemetry.metrics import Histogram, Registry
+
+class Trace:
+    __slots__ = ("tracer", "trace_id", "name", "attributes", "start_unix_ns", "marks", "pending", "_last_stage")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict, start_ns: Optional[int] = None):
+        self.tracer = tracer
+        self.trace_id = os.urandom(8).hex()
+        self.name = name
+        self.attributes = attributes
+        now = time.perf_counter_ns()
+        start_ns = now if start_ns is None else start_ns
+        self.start_unix_ns = time.time_ns() - (now - start_ns) # wall-clock anchor for the monotonic marks
+        self.marks = [("start", start_ns)]
+        self.pending = 0
+        self._last_stage = None
+
+    def mark(self, stage: str, at_ns: Optional[int] = None):
+        """
+        Record that `stage` ended now (or at the earlier perf_counter_ns() reading `at_ns`,
+        e.g. taken by another process); it started at the previous mark.
+        """
+        self.marks.append((stage, time.perf_counter_ns() if at_ns is None else at_ns))
+
+    def expect(self, deliveries: int, stage: str):
+        """Finish with `stage` once `deliveries` calls to delivered() came in (now, if none)."""
+        self.pending = deliveries
+        self._last_stage = stage
+        if deliveries == 0:
+            self.finish()
+
+    def delivered(self):
+        self.pending -= 1
+        if self.pending == 0:
+            self.mark(self._last_stage)
+            self.finish()
+
+    def finish(self):
+        self.tracer._finish(self)
+
+    def to_span(self) -> Dict:
+        start = self.marks[0][1]
+        stages = [
+            {"name": stage, "start_ns": previous - start, "end_ns": end - start, "duration_ns": end - previous}
+            for (_, previous), (stage, end) in zip(self.marks, self.marks[1:])
+        ]
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "attributes": self.attributes,
+            "start_unix_ns": self.start_unix_ns,
+            "duration_ns": self.marks[-1][1] - start,
+            "stages": stages
+        }
+
+class Tracer:
+    """
+    Samples events at `sample_rate` (0..1) and keeps the last `max_spans` finished traces.
+    Metrics are named {prefix}_stage_seconds{stage} and {prefix}_seconds.
+    """
+
+    def __init__(self, prefix: str, stages: List[str], sample_rate: float = 0.01,
+                 max_spans: int = 1000, registry: Optional[Registry] = None):
+        self.sample_rate = sample_rate
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        stage_seconds = Histogram(f"{prefix}_stage_seconds", "Per-stage latency of sampled traces",
+                                  ("stage",), registry=registry)
+        self._stage_histograms = {stage: stage_seconds.labels(stage) for stage in stages}
+        self._stage_seconds = stage_seconds
+        self._total_seconds = Histogram(f"{prefix}_seconds", "End-to-end latency of sampled traces",
+                                        registry=registry)
+        self.started = 0
+        self.finished = 0
+
+    def start(self, name: str, start_ns: Optional[int] = None, **attributes) -> Optional[Trace]:
+        """
+        A new Trace if this event is sampled, else None. `start_ns` backdates the trace to an
+        earlier perf_counter_ns() reading, e.g. one taken by another process on the same host.
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        self.started += 1
+        return Trace(self, name, attributes, start_ns)
+
+    def _finish(self, trace: Trace):
+        marks = trace.marks
+        for (_, previous), (stage, end) in zip(marks, marks[1:]):
+            histogram = self._stage_histograms.get(stage)
+            if histogram is None:
+                histogram = self._stage_histograms[stage] = self._stage_seconds.labels(stage)
+            histogram.observe((end - previous) / 1e9)
+        self._total_seconds.observe((marks[-1][1] - marks[0][1]) / 1e9)
+        with self._lock:
+            self._spans.append(trace)
+            self.finished += 1
+
+    def spans(self, limit: Optional[int] = None) -> List[Dict]:
+        """The most recent finished traces as span dicts, oldest first."""
+        with self._lock:
+            traces = list(self._spans)
+        if limit is not None:
+            traces = traces[-limit:]
+        return [trace.to_span() for trace in traces]
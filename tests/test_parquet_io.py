@@ -0,0 +1,22 @@
+from datetime import datetime
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from data_ingestion.history import MockHistorySource
+from database.parquet_io import export_history, partition_range, read_ohlcv
+
+def test_partition_range_rounds_out_to_whole_partitions():
+    start, end = partition_range(datetime(2024, 1, 20, 13, 5), datetime(2024, 2, 10), "month")
+    assert start == datetime(2024, 1, 1)
+    assert end == datetime(2024, 2, 29, 23, 59, 59, 999999)
+    assert partition_range(None, datetime(2024, 12, 31, 10), "year") == (None, datetime(2024, 12, 31, 23, 59, 59, 999999))
+
+def test_partial_range_reexport_keeps_rest_of_partition(tmp_path):
+    source = MockHistorySource()
+    export_history(str(tmp_path), ["AAPL"], "1d", datetime(2024, 1, 1), datetime(2024, 3, 31), source=source)
+    before = read_ohlcv(str(tmp_path), "AAPL")
+    export_history(str(tmp_path), ["AAPL"], "1d", datetime(2024, 1, 20), datetime(2024, 1, 31), source=source)
+    after = read_ohlcv(str(tmp_path), "AAPL")
+    assert len(before) == 65
+    assert after.equals(before)